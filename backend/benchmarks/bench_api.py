@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+REST API 压测：逐个接口测量延迟分位数（p50/p95/p99）和吞吐量
+
+两种模式:
+- client: 进程内用 Flask 测试客户端顺序请求，只测应用本身（路由、查询、序列化）的开销
+- server: 启动 gunicorn（多 worker），用 --concurrency 个线程并发请求，包含 HTTP 和多进程的开销；
+  也可以用 --url 压测已经在运行的服务
+
+没有指定 --database-url 时先用 seed.py 在临时 SQLite 文件中生成数据（规模见 --users 等参数）。
+每个接口先预热 --warmup 次，再发 --requests 次请求，宠物/用户ID在合成数据中随机选取（--seed 固定）。
+写接口（创建饮食、体重记录）会向数据库插入数据，请使用专门的压测数据库。
+
+结果可以用 --json 保存，之后用 --baseline 对比：任意接口的 p95 比基线慢超过 --max-regression（默认 25%）
+时以退出码 1 结束，用于部署前发现性能回退。
+
+运行:
+    python benchmarks/bench_api.py --mode client --users 100 --json bench.json
+    python benchmarks/bench_api.py --mode server --workers 4 --concurrency 16 --baseline bench.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import select  # noqa: E402
+
+from benchmarks.seed import BENCH_PASSWORD, seed_database  # noqa: E402
+from config import db  # noqa: E402
+from main import create_app, init_db  # noqa: E402
+from models import Pet, User  # noqa: E402
+
+# (名称, 方法, URL 模板, 请求体模板)；模板中的 {pet_id} {user_id} {email} {pet_ids} {today} 按请求随机填充
+ENDPOINTS = [
+    ("users.list", "GET", "/users/?include=", None),
+    ("users.login", "POST", "/users/login", {"email": "{email}", "password": BENCH_PASSWORD}),
+    ("users.export", "GET", "/users/{user_id}/export", None),
+    ("pets.list", "GET", "/pets/?user_id={user_id}&sort=name", None),
+    ("pets.get", "GET", "/pets/{pet_id}", None),
+    ("pets.profile", "GET", "/pets/{pet_id}/profile", None),
+    ("pets.weight_logs", "GET", "/pets/{pet_id}/weight_logs", None),
+    ("diet_logs.pet", "GET", "/diet-logs/pet/{pet_id}?limit=50", None),
+    ("diet_logs.summary", "GET", "/diet-logs/pet/{pet_id}/summary?group=week", None),
+    ("diet_logs.latest", "GET", "/diet-logs/latest?pet_ids={pet_ids}&n=5", None),
+    ("diet_logs.create", "POST", "/diet-logs/", {
+        "pet_id": "{pet_id}", "date": "{today}", "description": "bench", "food_amount": 100, "unit": "g"
+    }),
+    ("weight_logs.pet", "GET", "/weight-logs/pet/{pet_id}?limit=50", None),
+    ("weight_logs.trend", "GET", "/weight-logs/pet/{pet_id}/trend?bucket=week", None),
+    ("weight_logs.latest", "GET", "/weight-logs/latest?pet_ids={pet_ids}&n=5", None),
+    ("weight_logs.create", "POST", "/weight-logs/", {"pet_id": "{pet_id}", "date": "{today}", "weight_kg": 10.5}),
+    ("vaccine_logs.pet", "GET", "/vaccine-logs/pet/{pet_id}", None),
+    ("vaccine_logs.upcoming", "GET", "/vaccine-logs/pet/{pet_id}/upcoming", None),
+    ("vaccine_logs.latest", "GET", "/vaccine-logs/latest?pet_ids={pet_ids}&n=5", None),
+    ("reminders.pet", "GET", "/reminders/pet/{pet_id}?limit=20", None),
+    ("reminders.upcoming", "GET", "/reminders/upcoming?pet_ids={pet_ids}&n=5", None),
+    ("reminders.overdue", "GET", "/reminders/overdue?user_id={user_id}", None),
+    ("reminders.due_soon", "GET", "/reminders/due-soon?user_id={user_id}&days=30", None),
+    ("reminders.due_soon_count", "GET", "/reminders/due-soon?user_id={user_id}&counts_only=1", None),
+    ("metrics.cache", "GET", "/metrics/cache", None),
+]
+
+
+def percentile(sorted_values, p):
+    """最近秩法（nearest-rank）分位数"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def load_ids(app):
+    """读取合成数据中的 (user_id, email, [pet_id, ...]) 列表"""
+    with app.app_context():
+        rows = db.session.execute(select(User.id, User.email).where(User.email.like("bench%@example.com"))).all()
+        pets = {}
+        for pet_id, user_id in db.session.execute(select(Pet.id, Pet.user_id)):
+            pets.setdefault(user_id, []).append(pet_id)
+    owners = [(user_id, email, pets[user_id]) for user_id, email in rows if user_id in pets]
+    if not owners:
+        sys.exit("❌ No benchmark data found, run benchmarks/seed.py first or omit --database-url")
+    return owners
+
+
+def fill(template, values):
+    if isinstance(template, dict):
+        return {key: fill(value, values) for key, value in template.items()}
+    if isinstance(template, str):
+        if template == "{pet_id}":  # 请求体中的宠物ID保持为整数
+            return values["pet_id"]
+        return template.format(**values)
+    return template
+
+
+def make_requests(endpoint, owners, count, rng):
+    name, method, url, body = endpoint
+    planned = []
+    for _ in range(count):
+        user_id, email, pet_ids = rng.choice(owners)
+        values = {
+            "user_id": user_id, "email": email, "pet_id": rng.choice(pet_ids),
+            "pet_ids": ",".join(str(pet_id) for pet_id in pet_ids), "today": date.today().isoformat(),
+        }
+        planned.append((method, fill(url, values), fill(body, values)))
+    return planned
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    ms = [value * 1000 for value in latencies]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "p99_ms": percentile(ms, 99),
+        "mean_ms": sum(ms) / len(ms) if ms else None,
+        "throughput_rps": len(latencies) / elapsed if elapsed else None,
+    }
+
+
+def run_client(app, planned):
+    client = app.test_client()
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for method, url, body in planned:
+        request_started = time.perf_counter()
+        response = client.open(url, method=method, json=body)
+        response.get_data()
+        latencies.append(time.perf_counter() - request_started)
+        if response.status_code >= 400:
+            errors += 1
+    return latencies, errors, time.perf_counter() - started
+
+
+def run_server(base_url, planned, concurrency):
+    import requests
+
+    local = threading.local()
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+
+    def send(job):
+        method, url, body = job
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        request_started = time.perf_counter()
+        try:
+            response = session.request(method, base_url + url, json=body, timeout=60)
+            failed = response.status_code >= 400
+        except requests.RequestException:
+            failed = True
+        elapsed = time.perf_counter() - request_started
+        with lock:
+            latencies.append(elapsed)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, planned))
+    return latencies, errors[0], time.perf_counter() - started
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url, workers, threads, cache_enabled):
+    import requests
+
+    port = free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        CACHE_ENABLED="1" if cache_enabled else "0",
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_THREADS=str(threads),
+        GUNICORN_ACCESS_LOG="/dev/null",
+        GUNICORN_LOG_LEVEL="warning",
+        GUNICORN_MAX_REQUESTS="0",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"], cwd=BACKEND_DIR, env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit("❌ gunicorn exited during startup")
+        try:
+            requests.get(base_url + "/metrics/cache", timeout=1)
+            return process, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    sys.exit("❌ gunicorn did not start within 30s")
+
+
+def compare(results, baseline, max_regression):
+    """返回 p95 超过基线 (1 + max_regression) 倍的接口列表 [(名称, 基线 p95, 当前 p95)]"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous.get("p95_ms") or current["p95_ms"] is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            regressions.append((name, previous["p95_ms"], current["p95_ms"]))
+    return regressions
+
+
+def print_report(results, baseline=None):
+    header = f"{'endpoint':<22} {'n':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9}"
+    if baseline:
+        header += f" {'p95 Δ':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        line = (
+            f"{name:<22} {result['requests']:>6} {result['errors']:>4} {result['p50_ms']:>9.2f} "
+            f"{result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['throughput_rps']:>9.1f}"
+        )
+        previous = (baseline or {}).get(name)
+        if previous and previous.get("p95_ms"):
+            line += f" {(result['p95_ms'] / previous['p95_ms'] - 1) * 100:>+7.0f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["client", "server"], default="client")
+    parser.add_argument("--database-url", help="已用 seed.py 生成数据的数据库；不指定时生成临时 SQLite 数据库")
+    parser.add_argument("--url", help="server 模式下压测已经在运行的服务（需要与 --database-url 指向同一个库）")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--pets-per-user", type=int, default=3)
+    parser.add_argument("--logs-per-pet", type=int, default=200)
+    parser.add_argument("--reminders-per-pet", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200, help="每个接口的请求数")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--no-cache", action="store_true", help="关闭响应缓存，测量每次请求的完整开销")
+    parser.add_argument("--endpoints", help="只压测这些接口（逗号分隔的名称前缀，例如 pets,diet_logs.pet）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="把结果保存为 JSON")
+    parser.add_argument("--baseline", help="之前保存的 JSON 结果，用于对比 p95")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    args = parser.parse_args()
+
+    tmpdir = None
+    database_url = args.database_url
+    overrides = {"CACHE_ENABLED": not args.no_cache}
+    if not database_url:
+        tmpdir = tempfile.TemporaryDirectory(prefix="paw-bench-")
+        database_url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+        app = create_app({"SQLALCHEMY_DATABASE_URI": database_url, **overrides})
+        init_db(app)
+        with app.app_context():
+            counts = seed_database(
+                users=args.users, pets_per_user=args.pets_per_user, logs_per_pet=args.logs_per_pet,
+                reminders_per_pet=args.reminders_per_pet, seed=args.seed,
+            )
+        print("Seeded: " + ", ".join(f"{table}={count}" for table, count in counts.items()))
+    else:
+        app = create_app({"SQLALCHEMY_DATABASE_URI": database_url, **overrides})
+
+    owners = load_ids(app)
+    endpoints = ENDPOINTS
+    if args.endpoints:
+        prefixes = tuple(prefix.strip() for prefix in args.endpoints.split(","))
+        endpoints = [endpoint for endpoint in ENDPOINTS if endpoint[0].startswith(prefixes)]
+
+    process = None
+    if args.mode == "server":
+        if args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            process, base_url = start_server(database_url, args.workers, args.threads, not args.no_cache)
+
+    rng = random.Random(args.seed)
+    results = {}
+    try:
+        for endpoint in endpoints:
+            warmup = make_requests(endpoint, owners, args.warmup, rng)
+            planned = make_requests(endpoint, owners, args.requests, rng)
+            if args.mode == "client":
+                run_client(app, warmup)
+                latencies, errors, elapsed = run_client(app, planned)
+            else:
+                run_server(base_url, warmup, args.concurrency)
+                latencies, errors, elapsed = run_server(base_url, planned, args.concurrency)
+            results[endpoint[0]] = summarize(latencies, errors, elapsed)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        if tmpdir is not None:
+            with app.app_context():
+                db.engine.dispose()
+            tmpdir.cleanup()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            saved = json.load(f)
+        baseline = saved["endpoints"]
+        if saved["meta"].get("mode") != args.mode:
+            print(f"⚠️  Baseline was recorded in {saved['meta'].get('mode')} mode, latencies are not comparable")
+
+    mode = f"server, {args.workers} workers x {args.threads} threads, concurrency {args.concurrency}" \
+        if args.mode == "server" else "client"
+    print(f"\nMode: {mode}; {args.requests} requests per endpoint; cache {'off' if args.no_cache else 'on'}\n")
+    print_report(results, baseline)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"meta": {**vars(args), "mode": args.mode}, "endpoints": results}, f, indent=2)
+        print(f"\nSaved to {args.json_path}")
+
+    failed = sum(result["errors"] for result in results.values())
+    if failed:
+        print(f"\n⚠️  {failed} requests failed")
+    if baseline:
+        regressions = compare(results, baseline, args.max_regression)
+        for name, previous, current in regressions:
+            print(f"❌ {name}: p95 {previous:.2f} ms -> {current:.2f} ms")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No endpoint is more than {args.max_regression:.0%} slower than the baseline (p95)")
+
+
+if __name__ == "__main__":
+    main()
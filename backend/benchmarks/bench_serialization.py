@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+饮食记录列表的序列化性能对比（内存 SQLite，不需要启动服务）
+
+- to_json: 查询 ORM 对象 -> 逐条 to_json()（strftime）-> Flask 默认 JSON 编码
+- serializer: RowSerializer 只查询需要的列 -> isoformat -> FastJSONProvider（orjson）
+- pages: 通过测试客户端按 limit=200 翻完 /diet-logs/pet/<id> 的全部记录
+
+运行: python benchmarks/bench_serialization.py --rows 10000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, time as dtime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from config import db  # noqa: E402
+from main import create_app  # noqa: E402
+from models import User, Pet, DietLog  # noqa: E402
+from serializers import FastJSONProvider, diet_log_serializer, orjson  # noqa: E402
+
+MEAL_TYPES = ["breakfast", "lunch", "dinner", "snack"]
+
+
+def seed(rows):
+    user = User(first_name="Bench", last_name="User", email="bench@example.com", password="x")
+    pet = Pet(name="Bench", owner=user)
+    db.session.add(pet)
+    db.session.commit()
+
+    start = date(2020, 1, 1)
+    db.session.execute(insert(DietLog), [
+        {
+            "pet_id": pet.id,
+            "date": start + timedelta(days=index // 4),
+            "description": f"food {index}",
+            "food_amount": round(random.uniform(20, 200), 1),
+            "unit": "g",
+            "meal_type": MEAL_TYPES[index % 4],
+            "feeding_time": dtime(7 + index % 4 * 4, 30),
+            "notes": None if index % 3 else "note",
+        }
+        for index in range(rows)
+    ])
+    db.session.commit()
+    return pet.id
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "CACHE_ENABLED": False})
+    default_json = DefaultJSONProvider(app)
+    fast_json = FastJSONProvider(app)
+
+    with app.app_context():
+        db.create_all()
+        pet_id = seed(args.rows)
+
+        def query():
+            return DietLog.query.filter_by(pet_id=pet_id).order_by(DietLog.date.desc(), DietLog.id.desc())
+
+        def to_json_path():
+            logs = [log.to_json() for log in query().all()]
+            return default_json.response({"diet_logs": logs})
+
+        def serializer_path():
+            return fast_json.response({"diet_logs": diet_log_serializer.all(query())})
+
+        def read_pages(provider):
+            app.json = provider
+            client = app.test_client()
+            url, count = f"/diet-logs/pet/{pet_id}?limit=200", 0
+            while url:
+                data = client.get(url).json
+                count += len(data["diet_logs"])
+                url = data["next_cursor"] and f"/diet-logs/pet/{pet_id}?limit=200&cursor={data['next_cursor']}"
+            assert count == args.rows
+
+        assert to_json_path().get_json() == serializer_path().get_json()
+        with app.test_request_context():
+            results = [
+                ("to_json + json", measure(to_json_path, args.repeat)),
+                ("serializer + " + ("orjson" if orjson else "json"), measure(serializer_path, args.repeat)),
+            ]
+        results += [
+            ("pages, json", measure(lambda: read_pages(default_json), args.repeat)),
+            ("pages, " + ("orjson" if orjson else "json"), measure(lambda: read_pages(fast_json), args.repeat)),
+        ]
+
+    print(f"{args.rows} diet logs, median of {args.repeat} runs")
+    # 每组第二行相对第一行的加速比
+    for index, (name, elapsed) in enumerate(results):
+        baseline = results[index - index % 2][1]
+        print(f"  {name:<22} {elapsed:9.1f} ms   x{baseline / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main()
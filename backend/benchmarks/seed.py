@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+生成用于压测的合成数据库
+
+按 --users / --pets-per-user / --logs-per-pet / --reminders-per-pet 控制规模，--seed 固定随机数，
+同样的参数每次生成完全相同的数据。表结构由迁移创建（与生产一致），数据用 executemany 批量写入，
+最后重建饮食汇总表。
+
+运行: python benchmarks/seed.py --database-url sqlite:///instance/bench.db --users 200 --pets-per-user 3 --logs-per-pet 365
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, time as dtime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select  # noqa: E402
+
+from config import db  # noqa: E402
+from diet_rollup import rebuild_diet_rollup  # noqa: E402
+from main import create_app, init_db  # noqa: E402
+from models import User, Pet, DietLog, WeightLog, VaccineLog, PetGrowthLog, Reminder  # noqa: E402
+
+BENCH_PASSWORD = "bench-password"
+SPECIES_BREEDS = {
+    "Dog": ["Corgi", "Poodle", "Shiba Inu", "Labrador", "Beagle"],
+    "Cat": ["British Shorthair", "Ragdoll", "Siamese", "Maine Coon"],
+    "Rabbit": ["Holland Lop", "Lionhead"],
+}
+PET_NAMES = ["Bobby", "Milo", "Luna", "Coco", "Bella", "Max", "Kitty", "Lucky", "Mochi", "Daisy", "Oscar", "Nala"]
+MEAL_TYPES = ["breakfast", "lunch", "dinner", "snack"]
+UNITS = ["g", "g", "g", "kg", "cup"]
+VACCINES = ["Rabies", "DHPP", "FVRCP", "Leptospirosis", "Bordetella"]
+REMINDER_TYPES = ["vaccine", "weight", "diet", "general"]
+BATCH_SIZE = 5000
+
+
+def insert_batches(model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+def seed_database(users=100, pets_per_user=3, logs_per_pet=100, reminders_per_pet=10, seed=42, today=None):
+    """在当前 app context 的数据库中写入合成数据，返回各表写入的行数"""
+    rng = random.Random(seed)
+    today = today or date.today()
+    first_day = today - timedelta(days=logs_per_pet)
+
+    insert_batches(User, [
+        {"first_name": f"Bench{n}", "last_name": "User", "email": f"bench{n}@example.com", "password": BENCH_PASSWORD}
+        for n in range(users)
+    ])
+    user_ids = db.session.scalars(select(User.id).where(User.email.like("bench%@example.com"))).all()
+
+    pets = []
+    for user_id in user_ids:
+        for _ in range(pets_per_user):
+            species = rng.choice(list(SPECIES_BREEDS))
+            pets.append({
+                "user_id": user_id,
+                "name": rng.choice(PET_NAMES),
+                "species": species,
+                "breed": rng.choice(SPECIES_BREEDS[species]),
+                "birth_date": today - timedelta(days=rng.randint(90, 15 * 365)),
+                "color": rng.choice(["black", "white", "brown", "golden", None]),
+                "notes": None,
+            })
+    insert_batches(Pet, pets)
+    pet_ids = db.session.scalars(select(Pet.id).where(Pet.user_id.in_(user_ids))).all()
+
+    counts = {"user": len(user_ids), "pet": len(pet_ids)}
+    diet_logs, weight_logs, vaccine_logs, growth_logs, reminders = [], [], [], [], []
+    for pet_id in pet_ids:
+        weight = rng.uniform(2, 35)
+        for day in range(logs_per_pet):
+            log_date = first_day + timedelta(days=day)
+            meal = MEAL_TYPES[day % len(MEAL_TYPES)]
+            diet_logs.append({
+                "pet_id": pet_id, "date": log_date, "description": f"{meal} food",
+                "food_amount": round(rng.uniform(20, 300), 1), "unit": rng.choice(UNITS),
+                "meal_type": meal, "feeding_time": dtime(7 + day % 4 * 4, 0), "notes": None,
+            })
+            if day % 7 == 0:
+                weight = max(0.5, weight + rng.uniform(-0.3, 0.3))
+                weight_logs.append({"pet_id": pet_id, "date": log_date, "weight_kg": round(weight, 2), "notes": None})
+            if day % 30 == 0:
+                growth_logs.append({
+                    "pet_id": pet_id, "date": log_date,
+                    "height_cm": round(rng.uniform(10, 70), 1), "length_cm": round(rng.uniform(20, 110), 1), "notes": None,
+                })
+        for index, vaccine in enumerate(rng.sample(VACCINES, 3)):
+            vaccinated = today - timedelta(days=rng.randint(30, 700))
+            vaccine_logs.append({
+                "pet_id": pet_id, "date": vaccinated, "vaccine_type": vaccine,
+                "next_due_date": today + timedelta(days=rng.randint(-30, 60)),
+                "reminder_enabled": index != 2, "notes": None,
+            })
+        for _ in range(reminders_per_pet):
+            due_date = today + timedelta(days=rng.randint(-60, 60))
+            reminders.append({
+                "pet_id": pet_id, "title": "Reminder", "description": None, "message": "Time to check on your pet",
+                "due_date": due_date, "reminder_type": rng.choice(REMINDER_TYPES),
+                "is_sent": due_date < today and rng.random() < 0.5, "is_completed": False,
+            })
+
+    for model, rows in [
+        (DietLog, diet_logs), (WeightLog, weight_logs), (VaccineLog, vaccine_logs),
+        (PetGrowthLog, growth_logs), (Reminder, reminders),
+    ]:
+        insert_batches(model, rows)
+        counts[model.__tablename__] = len(rows)
+
+    db.session.commit()
+    counts["diet_daily_rollup"] = rebuild_diet_rollup()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"), required=not os.environ.get("DATABASE_URL"))
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--pets-per-user", type=int, default=3)
+    parser.add_argument("--logs-per-pet", type=int, default=100)
+    parser.add_argument("--reminders-per-pet", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": args.database_url})
+    init_db(app)
+    started = time.perf_counter()
+    with app.app_context():
+        if db.session.scalar(select(User.id).where(User.email == "bench0@example.com")):
+            sys.exit("❌ Database already contains benchmark data, use an empty database")
+        counts = seed_database(
+            users=args.users, pets_per_user=args.pets_per_user, logs_per_pet=args.logs_per_pet,
+            reminders_per_pet=args.reminders_per_pet, seed=args.seed,
+        )
+
+    print(f"✅ Seeded in {time.perf_counter() - started:.1f}s")
+    for table, count in counts.items():
+        print(f"  {table:<18} {count:>9}")
+
+
+if __name__ == "__main__":
+    main()
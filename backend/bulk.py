@@ -0,0 +1,93 @@
+"""
+批量写入日志记录
+
+请求体可以是 JSON 数组、{"items": [...]}，或者 NDJSON（Content-Type: application/x-ndjson，每行一条记录）。
+所有记录先逐条校验，宠物ID用一条 IN 查询统一检查，合法的记录在同一个事务里用 executemany 插入，
+不合法的记录以 {"index": 行号, "message": 错误信息} 的形式返回
+"""
+
+import json
+
+from sqlalchemy import insert
+
+from conditional import touch_pets
+from config import db
+from models import Pet
+
+MAX_BULK_ROWS = 5000
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+def read_bulk_items(req):
+    """
+    读取批量请求体，返回 (items, errors)；
+    NDJSON 中无法解析的行记为该行的错误，不影响其他行；请求体整体不合法时抛出 ValueError
+    """
+    items, errors = [], []
+
+    if req.mimetype in NDJSON_MIMETYPES:
+        for index, line in enumerate(req.stream):
+            if len(items) + len(errors) >= MAX_BULK_ROWS:
+                raise ValueError(f"at most {MAX_BULK_ROWS} records are allowed per request")
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append((index, json.loads(line)))
+            except ValueError:
+                errors.append({"index": index, "message": "invalid JSON"})
+        return items, errors
+
+    data = req.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("items")
+    if not isinstance(data, list):
+        raise ValueError("request body must be a JSON array, {\"items\": [...]} or NDJSON")
+    if len(data) > MAX_BULK_ROWS:
+        raise ValueError(f"at most {MAX_BULK_ROWS} records are allowed per request")
+    return list(enumerate(data)), errors
+
+
+def existing_pet_ids(pet_ids):
+    """一条查询返回 pet_ids 中实际存在的宠物ID"""
+    if not pet_ids:
+        return set()
+    return set(db.session.scalars(db.select(Pet.id).where(Pet.id.in_(pet_ids))))
+
+
+def bulk_create(model, items, parse_record, errors=None, before_commit=None):
+    """
+    校验并插入一批记录，返回 (已插入的字段字典列表, 错误列表)
+    parse_record(data) 返回 (字段字典, None) 或 (None, 错误信息)，与单条创建接口共用同一套校验
+    before_commit(rows) 在同一个事务提交前调用，用于维护汇总表等派生数据
+    """
+    errors = list(errors or [])
+    parsed = []
+    for index, data in items:
+        if not isinstance(data, dict):
+            errors.append({"index": index, "message": "record must be a JSON object"})
+            continue
+        values, error = parse_record(data)
+        if error:
+            errors.append({"index": index, "message": error})
+            continue
+        parsed.append((index, values))
+
+    known_pets = existing_pet_ids({values["pet_id"] for _, values in parsed})
+    rows = []
+    for index, values in parsed:
+        if values["pet_id"] not in known_pets:
+            errors.append({"index": index, "message": "Pet not found"})
+            continue
+        rows.append(values)
+
+    if rows:
+        # 不带 RETURNING，驱动层一次 executemany 完成全部插入
+        db.session.execute(insert(model), rows)
+        touch_pets({values["pet_id"] for values in rows})
+        if before_commit:
+            before_commit(rows)
+        db.session.commit()
+
+    errors.sort(key=lambda error: error["index"])
+    return rows, errors
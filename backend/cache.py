@@ -0,0 +1,207 @@
+"""
+缓存工具
+
+- LRUCache: 进程内的 LRU 缓存，可选 TTL，统计命中/未命中次数
+- RedisCache: 与 LRUCache 接口相同、存放在 Redis（或兼容的本地服务）中的缓存，需要安装 redis 包
+- ResponseCache: 读多写少的 GET 接口的响应缓存，按宠物/用户划分作用域（scope），
+  写接口调用 invalidate() 让对应作用域的缓存全部失效
+
+作用域失效通过"代数"实现：缓存键里带上每个作用域当前的代数，失效时只把代数加一，
+旧的缓存条目不会再被命中，随后被 LRU/TTL 淘汰，不需要逐个查找删除
+
+进程内缓存每个 worker 各自一份，其他 worker 的写操作只能等 TTL 过期后才可见；
+同时带有 conditional() 的接口例外：缓存键还包含数据库中的版本号（g.resource_version，见 conditional.py），
+任何进程写入后都不会再命中旧的响应。多 worker 部署需要所有接口立即一致时设置 CACHE_REDIS_URL，所有 worker 共用同一份缓存和代数
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, make_response, request
+
+try:
+    import redis
+except ImportError:  # 可选依赖，只有设置了 CACHE_REDIS_URL 才需要
+    redis = None
+
+
+class LRUCache:
+    """线程安全的 LRU 缓存，超过 maxsize 时淘汰最久未使用的条目；ttl（秒）为 None 时不过期"""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+            return default if item is None else item[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self), "maxsize": self.maxsize}
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache:
+    """存放在 Redis 中的缓存，值为 bytes；所有键带上 prefix，clear() 只删除本应用的键"""
+
+    def __init__(self, url, ttl=None, prefix="paw-diary:"):
+        if redis is None:
+            raise RuntimeError("CACHE_REDIS_URL is set but the redis package is not installed")
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        self.client.set(self.prefix + key, value, ex=ttl or None)
+
+    def pop(self, key, default=None):
+        value = self.client.getdel(self.prefix + key)
+        return default if value is None else value
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": None, "maxsize": None}
+
+
+def pet_scope(pet_id):
+    return f"pet:{pet_id}"
+
+
+def user_scope(user_id):
+    return f"user:{user_id}"
+
+
+# 不按用户过滤的宠物列表
+ALL_PETS_SCOPE = "pets"
+
+
+class ResponseCache:
+    """
+    GET 接口的响应缓存，配置项（见 config.Config）:
+    CACHE_ENABLED, CACHE_TTL（秒）, CACHE_MAXSIZE（进程内缓存条目数）, CACHE_REDIS_URL
+    """
+
+    def __init__(self):
+        self.store = None
+        self.enabled = False
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config["CACHE_ENABLED"]
+        ttl = app.config["CACHE_TTL"]
+        if app.config.get("CACHE_REDIS_URL"):
+            self.store = RedisCache(app.config["CACHE_REDIS_URL"], ttl=ttl)
+        else:
+            self.store = LRUCache(maxsize=app.config["CACHE_MAXSIZE"], ttl=ttl)
+        self._generations = {}
+        app.extensions["response_cache"] = self
+
+    @property
+    def backend(self):
+        return "redis" if isinstance(self.store, RedisCache) else "memory"
+
+    def generation(self, scope):
+        if isinstance(self.store, RedisCache):
+            return int(self.store.client.get(f"{self.store.prefix}gen:{scope}") or 0)
+        return self._generations.get(scope, 0)
+
+    def invalidate(self, *scopes):
+        """让这些作用域下的所有缓存失效，写接口在提交成功后调用"""
+        if self.store is None:
+            return
+        for scope in scopes:
+            if isinstance(self.store, RedisCache):
+                self.store.incr(f"gen:{scope}")
+            else:
+                with self._lock:
+                    self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    def cached(self, scopes):
+        """
+        缓存 GET 接口 200 响应的装饰器
+        scopes(**view_args) 返回该请求所属的作用域列表，例如 lambda pet_id: [pet_scope(pet_id)]
+        放在 @conditional 之下时缓存键包含 conditional() 查到的版本号
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**view_args):
+                if not self.enabled or self.store is None:
+                    return view(**view_args)
+
+                versions = ",".join(f"{scope}@{self.generation(scope)}" for scope in scopes(**view_args))
+                key = f"response:{request.full_path}|{versions}|{g.get('resource_version', '')}"
+                body = self.store.get(key)
+                if body is not None:
+                    response = current_app.response_class(body, mimetype="application/json")
+                    response.headers["X-Cache"] = "HIT"
+                    return response
+
+                response = make_response(view(**view_args))
+                if response.status_code == 200 and not response.is_streamed:
+                    self.store.set(key, response.get_data())
+                response.headers["X-Cache"] = "MISS"
+                return response
+            return wrapper
+        return decorator
+
+    def stats(self):
+        stats = self.store.stats() if self.store is not None else {}
+        return {"backend": self.backend, "enabled": self.enabled, **stats}
+
+
+response_cache = ResponseCache()
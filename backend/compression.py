@@ -0,0 +1,137 @@
+"""
+响应压缩（gzip / Brotli）
+
+- 按请求的 Accept-Encoding 协商编码，安装了 brotli 包且客户端支持时优先使用 br，否则 gzip
+- 只压缩 JSON / NDJSON / CSV / 文本类型，且响应体不小于 COMPRESS_MIN_SIZE 字节；
+  流式响应（例如 /users/<id>/export）边生成边压缩，每积累 COMPRESS_STREAM_FLUSH_SIZE 字节刷新一次
+- COMPRESS_BLUEPRINTS 按 Blueprint 名称覆盖最小压缩大小，None 表示该 Blueprint 不压缩，例如
+  {"metrics": None, "users": 512}
+- 压缩后强 ETag 改为弱 ETag（同一内容的不同编码在语义上相同），If-None-Match 仍然可以匹配
+
+必须在 ETag 之后执行：after_request 按注册的相反顺序执行，所以 init_app() 要在注册其他 after_request 之前调用
+"""
+
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # 可选依赖，没有安装时只使用 gzip
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/ndjson",
+    "text/csv",
+    "text/plain",
+    "text/html",
+    "text/css",
+    "application/javascript",
+}
+
+
+def gzip_stream(chunks, level, flush_size):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    pending = 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        data = compressor.compress(chunk)
+        pending += len(chunk)
+        if pending >= flush_size:
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def brotli_stream(chunks, quality, flush_size):
+    compressor = brotli.Compressor(quality=quality)
+    pending = 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        data = compressor.process(chunk)
+        pending += len(chunk)
+        if pending >= flush_size:
+            data += compressor.flush()
+            pending = 0
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class Compress:
+    """
+    配置项（见 config.Config）: COMPRESS_ENABLED, COMPRESS_MIN_SIZE, COMPRESS_LEVEL（gzip 1-9）,
+    COMPRESS_BR_QUALITY（brotli 0-11）, COMPRESS_STREAM_FLUSH_SIZE, COMPRESS_BLUEPRINTS
+    """
+
+    def __init__(self):
+        self.config = {}
+
+    def init_app(self, app):
+        self.config = app.config
+        app.extensions["compress"] = self
+        if app.config["COMPRESS_ENABLED"]:
+            app.after_request(self.after_request)
+
+    def encodings(self):
+        return ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def min_size(self):
+        """当前请求的最小压缩大小，返回 None 表示不压缩"""
+        overrides = self.config.get("COMPRESS_BLUEPRINTS") or {}
+        if request.blueprint in overrides:
+            return overrides[request.blueprint]
+        return self.config["COMPRESS_MIN_SIZE"]
+
+    def after_request(self, response):
+        if (
+            response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        min_size = self.min_size()
+        if min_size is None:
+            return response
+        response.vary.add("Accept-Encoding")
+
+        encoding = request.accept_encodings.best_match(self.encodings())
+        if encoding is None:
+            return response
+
+        level = self.config["COMPRESS_LEVEL"]
+        quality = self.config["COMPRESS_BR_QUALITY"]
+        if response.is_streamed:
+            flush_size = self.config["COMPRESS_STREAM_FLUSH_SIZE"]
+            if encoding == "br":
+                response.response = brotli_stream(response.response, quality, flush_size)
+            else:
+                response.response = gzip_stream(response.response, level, flush_size)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            if encoding == "br":
+                response.set_data(brotli.compress(data, quality=quality))
+            else:
+                response.set_data(gzip.compress(data, compresslevel=level, mtime=0))
+
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+compress = Compress()
@@ -0,0 +1,111 @@
+"""
+ETag / 条件请求（If-None-Match）
+
+- 按宠物的接口用 pet.version 作为 ETag：宠物或它的任意记录、提醒写入时，在同一个事务里调用 touch_pet() 把版本号加一；
+  请求带着匹配的 If-None-Match 时只查一次版本号就返回 304，不查询列表、也不序列化
+- 按用户的宠物列表用 user.pets_version
+- 其他 GET 接口在 after_request 中按响应内容的哈希生成 ETag，省去重复下载（服务端仍需生成响应）
+
+conditional() 把算出的版本标识放在 g.resource_version，ResponseCache 把它加入缓存键：
+其他进程（gunicorn worker、reminder_worker.py）写入后版本号变化，本进程缓存的旧响应不会再被命中
+
+响应带 Cache-Control: no-cache，浏览器会缓存响应并在每次使用前用 If-None-Match 重新验证
+"""
+
+import zlib
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, g, make_response, request
+from sqlalchemy import select, update
+
+from config import db
+from models import Pet, User
+
+
+def touch_pets(pet_ids):
+    """在当前事务中把这些宠物的版本号加一，由调用方提交"""
+    pet_ids = list(pet_ids)
+    if pet_ids:
+        db.session.execute(
+            update(Pet).where(Pet.id.in_(pet_ids)).values(version=Pet.version + 1, updated_at=datetime.utcnow())
+        )
+
+
+def touch_pet(pet_id):
+    touch_pets([pet_id])
+
+
+def touch_user_pets(user_id):
+    """在当前事务中把该用户宠物列表的版本号加一，由调用方提交"""
+    db.session.execute(update(User).where(User.id == user_id).values(pets_version=User.pets_version + 1))
+
+
+def pet_version(pet_id):
+    """返回 (版本标识, 最后修改时间)，宠物不存在时返回 None"""
+    row = db.session.execute(select(Pet.version, Pet.updated_at).where(Pet.id == pet_id)).first()
+    if row is None:
+        return None
+    return f"pet{pet_id}v{row.version}", row.updated_at
+
+
+def dated_pet_version(pet_id):
+    """结果依赖"今天"的接口（即将到期、逾期等），日期变化后 ETag 也随之变化"""
+    version = pet_version(pet_id)
+    if version is None:
+        return None
+    tag, updated_at = version
+    return f"{tag}d{datetime.now().date():%Y%m%d}", updated_at
+
+
+def user_pets_version(user_id):
+    pets_version = db.session.scalar(select(User.pets_version).where(User.id == user_id))
+    if pets_version is None:
+        return None
+    return f"user{user_id}p{pets_version}", None
+
+
+def conditional(version_fn):
+    """
+    为 GET 接口加上 ETag 和 If-None-Match 处理的装饰器
+    version_fn(**view_args) 返回 (版本标识, 最后修改时间或 None)，返回 None 时直接调用视图（例如资源不存在）
+    ETag 同时包含查询参数，同一资源的不同分页/过滤条件有各自的 ETag
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**view_args):
+            version = version_fn(**view_args)
+            if version is None:
+                return view(**view_args)
+
+            tag, last_modified = version
+            g.resource_version = tag
+            etag = f"{tag}-{zlib.crc32(request.full_path.encode()):08x}"
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(**view_args))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+
+def add_content_etag(response):
+    """after_request: 还没有 ETag 的 GET 200 响应按内容哈希生成 ETag，匹配 If-None-Match 时改为 304"""
+    if (
+        request.method == "GET"
+        and response.status_code == 200
+        and not response.is_streamed
+        and "ETag" not in response.headers
+    ):
+        response.add_etag()
+        response.cache_control.no_cache = True
+        response.make_conditional(request)
+    return response
@@ -1,11 +1,53 @@
-from flask import Flask
+import os
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 
-app = Flask(__name__)
-CORS(app)
+from database import database_uri
 
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///mydatabase.db"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
-db = SQLAlchemy(app)
+class Config:
+    """默认配置，create_app() 时可以通过参数覆盖"""
+    # 数据库地址和连接池参数见 database.py
+    SQLALCHEMY_DATABASE_URI = database_uri()
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # 用于签发登录 token，生产环境务必通过环境变量设置
+    SECRET_KEY = os.environ.get("SECRET_KEY", "paw-diary-dev-secret")
+
+    # GET 接口的响应缓存（见 cache.py）；设置 CACHE_REDIS_URL 后多个 worker 共用 Redis 中的缓存
+    CACHE_ENABLED = os.environ.get("CACHE_ENABLED", "1") == "1"
+    CACHE_TTL = int(os.environ.get("CACHE_TTL", 60))
+    CACHE_MAXSIZE = int(os.environ.get("CACHE_MAXSIZE", 2048))
+    CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL")
+
+    # 响应压缩（见 compression.py）；COMPRESS_BLUEPRINTS 按 Blueprint 覆盖最小压缩大小，None 表示不压缩
+    COMPRESS_ENABLED = os.environ.get("COMPRESS_ENABLED", "1") == "1"
+    COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+    COMPRESS_LEVEL = int(os.environ.get("COMPRESS_LEVEL", 6))
+    COMPRESS_BR_QUALITY = int(os.environ.get("COMPRESS_BR_QUALITY", 4))
+    COMPRESS_STREAM_FLUSH_SIZE = int(os.environ.get("COMPRESS_STREAM_FLUSH_SIZE", 64 * 1024))
+    COMPRESS_BLUEPRINTS = {}
+
+    # 请求耗时/SQL 统计（见 instrumentation.py）；设置 PROFILE_SLOW_MS 后保存慢请求的 cProfile 结果
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+    PROFILE_SLOW_MS = float(os.environ["PROFILE_SLOW_MS"]) if os.environ.get("PROFILE_SLOW_MS") else None
+    PROFILE_DIR = os.environ.get("PROFILE_DIR")
+    # 多个 worker 进程把统计写入同一目录，/metrics 输出合并后的总数（gunicorn.conf.py 默认设置）
+    METRICS_MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR")
+    METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5))
+
+    # 调试/测试用的慢查询日志和 N+1 检测（见 query_debug.py），默认关闭
+    SLOW_QUERY_MS = float(os.environ["SLOW_QUERY_MS"]) if os.environ.get("SLOW_QUERY_MS") else None
+    NPLUSONE_THRESHOLD = int(os.environ["NPLUSONE_THRESHOLD"]) if os.environ.get("NPLUSONE_THRESHOLD") else None
+    NPLUSONE_RAISE = os.environ.get("NPLUSONE_RAISE", "0") == "1"
+
+    # 后台提醒任务（见 reminder_worker.py）：每隔 REMINDER_WORKER_INTERVAL 秒扫描一次，
+    # 提前 REMINDER_LEAD_DAYS 天把提醒写入通知队列，提前 VACCINE_REMINDER_DAYS 天为疫苗记录生成提醒
+    REMINDER_WORKER_INTERVAL = float(os.environ.get("REMINDER_WORKER_INTERVAL", 60))
+    REMINDER_WORKER_BATCH_SIZE = int(os.environ.get("REMINDER_WORKER_BATCH_SIZE", 500))
+    REMINDER_LEAD_DAYS = int(os.environ.get("REMINDER_LEAD_DAYS", 7))
+    VACCINE_REMINDER_DAYS = int(os.environ.get("VACCINE_REMINDER_DAYS", 30))
+
+
+# 扩展对象不绑定具体的 app，由 main.create_app() 调用 init_app() 完成初始化
+db = SQLAlchemy()
+cors = CORS()
@@ -50,15 +50,27 @@ def create_test_pet(user_id):
         print(f"❌ 创建宠物失败: {response.text}")
         return None
 
+def post_bulk(resource, records, label):
+    """通过批量接口一次请求创建多条记录"""
+    response = requests.post(f"{BASE_URL}/{resource}/bulk", json=records, headers=HEADERS)
+    if response.status_code == 201:
+        result = response.json()
+        print(f"✅ 创建{label} {result['created']} 条")
+        for error in result["errors"]:
+            print(f"❌ 第 {error['index'] + 1} 条{label}创建失败: {error['message']}")
+    else:
+        print(f"❌ 创建{label}失败: {response.text}")
+
 def create_diet_logs(pet_id, count=5):
     """创建饮食记录"""
     meal_types = ["早餐", "午餐", "晚餐", "零食"]
     foods = ["狗粮", "鸡肉", "牛肉", "蔬菜", "水果"]
     units = ["克", "杯", "块", "片"]
     
+    diet_logs = []
     for i in range(count):
         date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-        diet_data = {
+        diet_logs.append({
             "pet_id": pet_id,
             "date": date,
             "description": random.choice(foods),
@@ -66,56 +78,46 @@ def create_diet_logs(pet_id, count=5):
             "food_amount": round(random.uniform(50, 200), 1),
             "unit": random.choice(units),
             "feeding_time": f"{random.randint(6, 22):02d}:{random.randint(0, 59):02d}"
-        }
-        
-        response = requests.post(f"{BASE_URL}/diet-logs/", json=diet_data, headers=HEADERS)
-        if response.status_code == 201:
-            print(f"✅ 创建饮食记录 {i+1}: {diet_data['description']} ({diet_data['date']})")
-        else:
-            print(f"❌ 创建饮食记录失败: {response.text}")
+        })
+    
+    post_bulk("diet-logs", diet_logs, "饮食记录")
 
 def create_weight_logs(pet_id, count=7):
     """创建体重记录"""
     base_weight = 25.0
     
+    weight_logs = []
     for i in range(count):
         date = (datetime.now() - timedelta(days=i*3)).strftime("%Y-%m-%d")
         # 模拟体重变化
         weight_change = random.uniform(-0.5, 0.5)
-        weight_data = {
+        weight_logs.append({
             "pet_id": pet_id,
             "date": date,
             "weight_kg": round(base_weight + weight_change, 1)
-        }
-        
-        response = requests.post(f"{BASE_URL}/weight-logs/", json=weight_data, headers=HEADERS)
-        if response.status_code == 201:
-            print(f"✅ 创建体重记录 {i+1}: {weight_data['weight_kg']}kg ({weight_data['date']})")
-        else:
-            print(f"❌ 创建体重记录失败: {response.text}")
+        })
+    
+    post_bulk("weight-logs", weight_logs, "体重记录")
 
 def create_vaccine_logs(pet_id, count=3):
     """创建疫苗记录"""
     vaccine_types = ["狂犬疫苗", "三联疫苗", "六联疫苗", "狂犬疫苗加强针"]
     
+    vaccine_logs = []
     for i in range(count):
         date = (datetime.now() - timedelta(days=i*30)).strftime("%Y-%m-%d")
         next_due_date = (datetime.now() + timedelta(days=365-i*30)).strftime("%Y-%m-%d")
         
-        vaccine_data = {
+        vaccine_logs.append({
             "pet_id": pet_id,
             "date": date,
             "vaccine_type": vaccine_types[i % len(vaccine_types)],
             "notes": f"第{i+1}针",
             "next_due_date": next_due_date,
             "reminder_enabled": True
-        }
-        
-        response = requests.post(f"{BASE_URL}/vaccine-logs/", json=vaccine_data, headers=HEADERS)
-        if response.status_code == 201:
-            print(f"✅ 创建疫苗记录 {i+1}: {vaccine_data['vaccine_type']} ({vaccine_data['date']})")
-        else:
-            print(f"❌ 创建疫苗记录失败: {response.text}")
+        })
+    
+    post_bulk("vaccine-logs", vaccine_logs, "疫苗记录")
 
 def create_reminders(pet_id, count=4):
     """创建提醒"""
@@ -127,21 +129,18 @@ def create_reminders(pet_id, count=4):
         "健康检查提醒"
     ]
     
+    reminders = []
     for i in range(count):
         due_date = (datetime.now() + timedelta(days=random.randint(7, 90))).strftime("%Y-%m-%d")
         
-        reminder_data = {
+        reminders.append({
             "pet_id": pet_id,
             "reminder_type": reminder_types[i % len(reminder_types)],
             "due_date": due_date,
             "message": messages[i % len(messages)]
-        }
-        
-        response = requests.post(f"{BASE_URL}/reminders/", json=reminder_data, headers=HEADERS)
-        if response.status_code == 201:
-            print(f"✅ 创建提醒 {i+1}: {reminder_data['message']} ({reminder_data['due_date']})")
-        else:
-            print(f"❌ 创建提醒失败: {response.text}")
+        })
+    
+    post_bulk("reminders", reminders, "提醒")
 
 def main():
     """主函数"""
@@ -286,8 +286,8 @@ def test_9_query_functions(pet_data):
     print_response(response, "GET /vaccine-logs/pet/{pet_id}/upcoming")
     
     print("查询即将到期的提醒...")
-    response = requests.get(f"{BASE_URL}/reminders/due-soon")
-    print_response(response, "GET /reminders/due-soon")
+    response = requests.get(f"{BASE_URL}/reminders/due-soon?user_id={pet_data['user_id']}")
+    print_response(response, "GET /reminders/due-soon?user_id={user_id}")
 
 def main():
     """主函数"""
@@ -0,0 +1,163 @@
+"""
+饮食记录的每日汇总表（DietDailyRollup）维护
+
+- 食物数量统一换算成克；UNIT_TO_GRAMS 中没有的单位（杯、块、片等）只计入 unconverted_count
+- 创建/修改/删除饮食记录时调用 apply_diet_logs()，和饮食记录在同一个事务里用 INSERT ... ON CONFLICT DO UPDATE 增量更新
+- rebuild_diet_rollup() 用一条 INSERT ... SELECT 从 diet_log 全量重建：
+  flask --app main rebuild-diet-rollup
+"""
+
+from datetime import timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import case, delete, func, insert, select, tuple_
+
+from config import db
+from database import upsert
+from models import DietLog, DietDailyRollup
+
+UNIT_TO_GRAMS = {
+    "g": 1.0, "gram": 1.0, "grams": 1.0, "克": 1.0,
+    "kg": 1000.0, "千克": 1000.0, "公斤": 1000.0,
+    "mg": 0.001, "毫克": 0.001,
+    "斤": 500.0,
+    "oz": 28.349523125,
+    "lb": 453.59237, "lbs": 453.59237,
+}
+
+SUMMARY_GROUPS = ("day", "week", "month")
+
+ROLLUP_FIELDS = ("pet_id", "date", "meal_type", "food_amount", "unit")
+
+
+def snapshot(diet_log):
+    """记录影响汇总的字段，修改饮食记录前先保存一份用于扣除旧值"""
+    return {field: getattr(diet_log, field) for field in ROLLUP_FIELDS}
+
+
+def to_grams(food_amount, unit):
+    """换算成克；没有数量或单位无法换算时返回 None"""
+    if food_amount is None:
+        return None
+    factor = UNIT_TO_GRAMS.get((unit or "").strip().lower())
+    if factor is None:
+        return None
+    return food_amount * factor
+
+
+def apply_diet_logs(logs, sign=1):
+    """
+    把一批饮食记录（字段字典）计入汇总表，sign=-1 表示扣除；不提交事务，由调用方统一 commit
+    """
+    deltas = {}
+    for log in logs:
+        key = (log["pet_id"], log["date"], log.get("meal_type") or "")
+        delta = deltas.setdefault(key, {"total_grams": 0.0, "entry_count": 0, "unconverted_count": 0})
+        delta["entry_count"] += sign
+        grams = to_grams(log.get("food_amount"), log.get("unit"))
+        if grams is not None:
+            delta["total_grams"] += sign * grams
+        elif log.get("food_amount") is not None:
+            delta["unconverted_count"] += sign
+
+    if not deltas:
+        return
+
+    # 一条 INSERT ... ON CONFLICT DO UPDATE 在数据库里累加，并发写入同一天同一餐次时不会互相覆盖；
+    # 扣除后没有记录的汇总行再用一条 DELETE 删除
+    statement = upsert(DietDailyRollup, db.session)
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["pet_id", "date", "meal_type"],
+            set_={
+                field: getattr(DietDailyRollup, field) + getattr(statement.excluded, field)
+                for field in ("total_grams", "entry_count", "unconverted_count")
+            },
+        ),
+        [
+            {"pet_id": pet_id, "date": date, "meal_type": meal_type, **delta}
+            for (pet_id, date, meal_type), delta in deltas.items()
+        ],
+    )
+    db.session.execute(
+        delete(DietDailyRollup).where(
+            tuple_(DietDailyRollup.pet_id, DietDailyRollup.date, DietDailyRollup.meal_type).in_(list(deltas)),
+            DietDailyRollup.entry_count <= 0,
+        ),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def grams_expression():
+    """与 to_grams() 相同规则的 SQL 表达式"""
+    unit = func.lower(func.trim(DietLog.unit))
+    return DietLog.food_amount * case(UNIT_TO_GRAMS, value=unit)
+
+
+def rollup_insert_statement(pet_ids=None):
+    """从 diet_log 聚合生成汇总行的 INSERT ... SELECT；指定 pet_ids 时只处理这些宠物"""
+    grams = grams_expression()
+    meal_type = func.coalesce(DietLog.meal_type, "")
+    aggregated = select(
+        DietLog.pet_id,
+        DietLog.date,
+        meal_type,
+        func.coalesce(func.sum(grams), 0.0),
+        func.count(DietLog.id),
+        func.count(DietLog.food_amount) - func.count(grams),
+    ).group_by(DietLog.pet_id, DietLog.date, meal_type)
+    if pet_ids is not None:
+        aggregated = aggregated.where(DietLog.pet_id.in_(pet_ids))
+
+    return insert(DietDailyRollup).from_select(
+        ["pet_id", "date", "meal_type", "total_grams", "entry_count", "unconverted_count"],
+        aggregated,
+    )
+
+
+def rebuild_diet_rollup():
+    """清空并从 diet_log 重新计算汇总表，返回汇总行数"""
+    db.session.execute(delete(DietDailyRollup))
+    db.session.execute(rollup_insert_statement())
+    db.session.commit()
+    return db.session.scalar(select(func.count()).select_from(DietDailyRollup))
+
+
+def period_start(date, group):
+    if group == "week":
+        return date - timedelta(days=date.weekday())
+    if group == "month":
+        return date.replace(day=1)
+    return date
+
+
+def summarize(rows, group="day"):
+    """把按 (日期, 餐次) 的汇总行合并为按天/周/月的汇总，每个周期附带各餐次的明细"""
+    periods = {}
+    for row in rows:
+        start = period_start(row.date, group)
+        period = periods.setdefault(start, {
+            "period_start": start.strftime("%Y-%m-%d"),
+            "total_grams": 0.0,
+            "entry_count": 0,
+            "unconverted_count": 0,
+            "meals": {},
+        })
+        meal = period["meals"].setdefault(row.meal_type or "unspecified", {
+            "total_grams": 0.0, "entry_count": 0, "unconverted_count": 0
+        })
+        for target in (period, meal):
+            target["total_grams"] += row.total_grams
+            target["entry_count"] += row.entry_count
+            target["unconverted_count"] += row.unconverted_count
+
+    return [periods[start] for start in sorted(periods)]
+
+
+@click.command("rebuild-diet-rollup")
+@with_appcontext
+def rebuild_diet_rollup_command():
+    """从全部饮食记录重建每日汇总表"""
+    count = rebuild_diet_rollup()
+    click.echo(f"✅ Rebuilt diet rollup: {count} rows")
@@ -0,0 +1,54 @@
+"""
+gunicorn 配置: gunicorn -c gunicorn.conf.py wsgi:app
+
+所有参数都可以用环境变量覆盖，默认值按 CPU 核数计算
+"""
+
+import glob
+import multiprocessing
+import os
+import tempfile
+
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', '5001')}")
+
+# 每个 worker 是一个独立进程，可以用满多核；gthread 让每个进程再用线程处理并发的 I/O 等待
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+# 超过 timeout 秒没有响应的 worker 会被重启；keepalive 让前端的连续请求复用连接
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# 处理一定数量的请求后重启 worker，避免内存持续增长；jitter 防止所有 worker 同时重启
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+# 各个 worker 把请求统计写入同一目录，/metrics 输出所有 worker 的总数（见 instrumentation.py）；
+# 必须在导入应用之前设置，config.Config 在导入时读取环境变量
+os.environ.setdefault("METRICS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "paw-diary-metrics"))
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    """在 fork worker 之前执行数据库迁移，避免多个 worker 同时迁移；清空上次运行留下的请求统计"""
+    from main import create_app, init_db
+
+    metrics_dir = os.environ["METRICS_MULTIPROC_DIR"]
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, "metrics-*.json")):
+        os.remove(path)
+
+    init_db(create_app())
+
+
+def worker_exit(server, worker):
+    """worker 退出（max_requests 重启等）前写入最后一次统计"""
+    from instrumentation import instrumentation
+
+    if instrumentation.multiproc_dir:
+        instrumentation.flush()
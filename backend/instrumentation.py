@@ -0,0 +1,257 @@
+"""
+请求级别的性能统计
+
+- 每个请求记录总耗时、SQL 语句条数和 SQL 总耗时（SQLAlchemy 的 before/after_cursor_execute 事件），
+  写入响应头 Server-Timing，浏览器开发者工具的 Timing 面板可以直接看到：
+  Server-Timing: app;dur=12.3, db;dur=4.5;desc="3 queries"
+- 按 Blueprint 和请求方法汇总为直方图，GET /metrics 以 Prometheus 文本格式输出
+- gunicorn 有多个 worker 进程，每个进程只有自己的统计；设置 METRICS_MULTIPROC_DIR 后每个进程最多每隔
+  METRICS_FLUSH_INTERVAL 秒把统计写入该目录下的 metrics-<pid>.json，/metrics 合并目录中所有文件后输出，
+  不管请求落到哪个 worker 都是全部进程的总数（gunicorn.conf.py 默认打开，启动时清空目录；
+  已退出的 worker 的文件保留，计数不会因为 worker 重启而变小）
+- 设置 PROFILE_SLOW_MS 后每个请求都在 cProfile 下运行，耗时超过阈值的请求把 .prof 文件写入 PROFILE_DIR，
+  用 python -m pstats 或 snakeviz 查看；cProfile 本身有明显开销，只在排查问题时打开
+"""
+
+import cProfile
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Prometheus 风格的累积直方图，按标签分组"""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, labels, value):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series["counts"][index] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+    def snapshot(self):
+        """可以写入 JSON 的 [[标签, 各桶计数, sum, count], ...]"""
+        return [[labels, series["counts"], series["sum"], series["count"]] for labels, series in self._series.items()]
+
+    def merge(self, entries):
+        """累加 snapshot() 的结果（来自其他进程）"""
+        for labels, counts, total, count in entries:
+            labels = tuple(tuple(pair) for pair in labels)
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            series["counts"] = [a + b for a, b in zip(series["counts"], counts)]
+            series["sum"] += total
+            series["count"] += count
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            label_text = format_labels(labels)
+            for bound, count in zip(self.buckets, series["counts"]):
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {series["count"]}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {series['sum']:.6f}")
+            lines.append(f"{self.name}_count{{{label_text}}} {series['count']}")
+        return lines
+
+
+def format_labels(labels):
+    return ",".join(f'{key}="{value}"' for key, value in labels)
+
+
+class Instrumentation:
+    """
+    配置项（见 config.Config）: METRICS_ENABLED, PROFILE_SLOW_MS, PROFILE_DIR,
+    METRICS_MULTIPROC_DIR, METRICS_FLUSH_INTERVAL
+    """
+
+    def __init__(self):
+        self.profile_slow_ms = None
+        self.profile_dir = None
+        self.multiproc_dir = None
+        self.flush_interval = 0
+        self._flushed_at = 0.0
+        # 计数器名称 -> (说明, 返回 {标签: 值} 的函数)，例如各个缓存的命中次数
+        self.counter_sources = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.request_duration = Histogram(
+            "paw_request_duration_seconds", "Request wall time by blueprint and method", DURATION_BUCKETS
+        )
+        self.sql_duration = Histogram(
+            "paw_request_sql_duration_seconds", "Total SQL time per request", DURATION_BUCKETS
+        )
+        self.sql_queries = Histogram(
+            "paw_request_sql_queries", "SQL statements executed per request", QUERY_COUNT_BUCKETS
+        )
+        self.responses = {}
+
+    def init_app(self, app, engine):
+        if not app.config["METRICS_ENABLED"]:
+            return
+        self.profile_slow_ms = app.config.get("PROFILE_SLOW_MS")
+        self.profile_dir = app.config.get("PROFILE_DIR") or os.path.join(app.instance_path, "profiles")
+        self.multiproc_dir = app.config.get("METRICS_MULTIPROC_DIR")
+        self.flush_interval = app.config.get("METRICS_FLUSH_INTERVAL", 5)
+        if self.multiproc_dir:
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+        self.reset()
+        event.listen(engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self.after_cursor_execute)
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.extensions["instrumentation"] = self
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        if has_request_context() and "request_started" in g:
+            g.sql_count += 1
+            g.sql_time += time.perf_counter() - started
+
+    def before_request(self):
+        g.sql_count = 0
+        g.sql_time = 0.0
+        g.profiler = None
+        if self.profile_slow_ms is not None:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                g.profiler = profiler
+            except ValueError:  # 同一进程中另一个线程正在 profile
+                pass
+        g.request_started = time.perf_counter()
+
+    def after_request(self, response):
+        if "request_started" not in g:
+            return response
+        elapsed = time.perf_counter() - g.pop("request_started")
+        if g.profiler is not None:
+            g.profiler.disable()
+            if elapsed * 1000 >= self.profile_slow_ms:
+                self.dump_profile(g.profiler, elapsed)
+
+        response.headers.add(
+            "Server-Timing",
+            f'app;dur={elapsed * 1000:.1f}, db;dur={g.sql_time * 1000:.1f};desc="{g.sql_count} queries"'
+        )
+
+        labels = (("blueprint", request.blueprint or "none"), ("method", request.method))
+        status_labels = labels + (("status", str(response.status_code)),)
+        with self._lock:
+            self.request_duration.observe(labels, elapsed)
+            self.sql_duration.observe(labels, g.sql_time)
+            self.sql_queries.observe(labels, g.sql_count)
+            self.responses[status_labels] = self.responses.get(status_labels, 0) + 1
+        if self.multiproc_dir and time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+        return response
+
+    def dump_profile(self, profiler, elapsed):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        endpoint = (request.endpoint or "none").replace(".", "-")
+        filename = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{request.method}-{endpoint}-{elapsed * 1000:.0f}ms.prof"
+        path = os.path.join(self.profile_dir, filename)
+        profiler.dump_stats(path)
+        logger.warning("Slow request %s %s took %.0f ms, profile saved to %s",
+                       request.method, request.path, elapsed * 1000, path)
+
+    def add_counter(self, name, help_text, collect):
+        """注册一个计数器，collect() 返回 {((标签, 值), ...): 计数}，输出 /metrics 时调用"""
+        self.counter_sources[name] = (help_text, collect)
+
+    def histograms(self):
+        return (self.request_duration, self.sql_duration, self.sql_queries)
+
+    def snapshot(self):
+        """当前进程的全部统计，可以写入 JSON"""
+        counters = {name: collect() for name, (help_text, collect) in self.counter_sources.items()}
+        with self._lock:
+            counters["paw_responses_total"] = dict(self.responses)
+            return {
+                "counters": {name: list(values.items()) for name, values in counters.items()},
+                "histograms": {histogram.name: histogram.snapshot() for histogram in self.histograms()},
+            }
+
+    def flush(self):
+        """把当前进程的统计写入 METRICS_MULTIPROC_DIR/metrics-<pid>.json（先写临时文件再替换）"""
+        with self._flush_lock:
+            path = os.path.join(self.multiproc_dir, f"metrics-{os.getpid()}.json")
+            with open(f"{path}.tmp", "w") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(f"{path}.tmp", path)
+            self._flushed_at = time.monotonic()
+
+    def load_snapshots(self):
+        snapshots = []
+        for path in glob.glob(os.path.join(self.multiproc_dir, "metrics-*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                logger.warning("Skipping unreadable metrics file %s", path)
+        return snapshots
+
+    def render(self):
+        """Prometheus 文本格式（text/plain; version=0.0.4），设置了 METRICS_MULTIPROC_DIR 时为所有进程的总数"""
+        if self.multiproc_dir:
+            self.flush()
+            snapshots = self.load_snapshots()
+        else:
+            snapshots = [self.snapshot()]
+
+        counters = {}
+        histograms = {
+            histogram.name: Histogram(histogram.name, histogram.help_text, histogram.buckets)
+            for histogram in self.histograms()
+        }
+        for snapshot in snapshots:
+            for name, entries in snapshot["counters"].items():
+                values = counters.setdefault(name, {})
+                for labels, value in entries:
+                    labels = tuple(tuple(pair) for pair in labels)
+                    values[labels] = values.get(labels, 0) + value
+            for name, entries in snapshot["histograms"].items():
+                if name in histograms:
+                    histograms[name].merge(entries)
+
+        help_texts = {"paw_responses_total": "Responses by blueprint, method and status"}
+        help_texts.update({name: help_text for name, (help_text, collect) in self.counter_sources.items()})
+        lines = []
+        for name, help_text in help_texts.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for labels, value in sorted(counters.get(name, {}).items()):
+                lines.append(f"{name}{{{format_labels(labels)}}} {value}")
+        for histogram in histograms.values():
+            lines.extend(histogram.render())
+        return "\n".join(lines) + "\n"
+
+
+instrumentation = Instrumentation()
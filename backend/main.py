@@ -1,37 +1,92 @@
 from flask import Flask, send_from_directory
-from config import app, db
+from config import Config, db, cors
+from database import configure_engine, engine_options
 import os
 
 # 导入Blueprint - 现在可以从routes包直接导入
-from routes import users_bp, pets_bp, diet_logs_bp, weight_logs_bp, vaccine_logs_bp, reminders_bp
-
-# 注册Blueprint
-app.register_blueprint(users_bp)
-app.register_blueprint(pets_bp)
-app.register_blueprint(diet_logs_bp)
-app.register_blueprint(weight_logs_bp)
-app.register_blueprint(vaccine_logs_bp)
-app.register_blueprint(reminders_bp)
-
-# 前端服务路由 (仅在开发环境需要时启用)
-# @app.route("/", defaults={"path": ""})
-# @app.route("/<path:path>")
-# def serve_frontend(path):
-#     # /home/ubuntu/FLASK-REACT-FULL-STACK-APP/frontend/dist
-#     dist_dir = os.path.join(os.path.dirname(__file__), "..", "frontend", "dist")
-#     file_path = os.path.join(dist_dir, path)
-#
-#     if path and os.path.exists(file_path):
-#         return send_from_directory(dist_dir, path)
-#     return send_from_directory(dist_dir, "index.html")
+from routes import users_bp, pets_bp, diet_logs_bp, weight_logs_bp, vaccine_logs_bp, reminders_bp, metrics_bp, notifications_bp
+from cache import response_cache
+from conditional import add_content_etag
+from serializers import FastJSONProvider
+from compression import compress
+from instrumentation import instrumentation
+from query_debug import query_debugger
 
-if __name__ == "__main__":
+from diet_rollup import rebuild_diet_rollup_command
+from reminder_worker import reminder_worker_command
+from migrations import upgrade, upgrade_command, status_command
+
+
+def create_app(config_overrides=None):
+    """
+    应用工厂：每次调用返回一个新的 Flask 应用
+    - 开发环境: python main.py 或 flask --app main run
+    - 生产环境: gunicorn -c gunicorn.conf.py wsgi:app
+    """
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.config.from_object(Config)
+    if config_overrides:
+        app.config.update(config_overrides)
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config["SQLALCHEMY_DATABASE_URI"]))
+
+    db.init_app(app)
+    # after_request 按注册的相反顺序执行：请求统计最先注册、最后执行，耗时包含 ETag 和压缩；
+    # 压缩要在生成 ETag 之后，所以在 add_content_etag 之前注册
     with app.app_context():
-        db.create_all()
+        configure_engine(db.engine)
+        instrumentation.init_app(app, db.engine)
+        query_debugger.init_app(app, db.engine)
+    cors.init_app(app)
+    response_cache.init_app(app)
+    compress.init_app(app)
+    app.after_request(add_content_etag)
+
+    # 注册Blueprint
+    app.register_blueprint(users_bp)
+    app.register_blueprint(pets_bp)
+    app.register_blueprint(diet_logs_bp)
+    app.register_blueprint(weight_logs_bp)
+    app.register_blueprint(vaccine_logs_bp)
+    app.register_blueprint(reminders_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(notifications_bp)
+
+    # 命令行: flask --app main rebuild-diet-rollup / db-upgrade / db-status / reminder-worker
+    app.cli.add_command(rebuild_diet_rollup_command)
+    app.cli.add_command(upgrade_command)
+    app.cli.add_command(status_command)
+    app.cli.add_command(reminder_worker_command)
+
+    # 前端服务路由 (仅在开发环境需要时启用)
+    # @app.route("/", defaults={"path": ""})
+    # @app.route("/<path:path>")
+    # def serve_frontend(path):
+    #     # /home/ubuntu/FLASK-REACT-FULL-STACK-APP/frontend/dist
+    #     dist_dir = os.path.join(os.path.dirname(__file__), "..", "frontend", "dist")
+    #     file_path = os.path.join(dist_dir, path)
+    #
+    #     if path and os.path.exists(file_path):
+    #         return send_from_directory(dist_dir, path)
+    #     return send_from_directory(dist_dir, "index.html")
+
+    return app
 
-    print("🚀 启动后端服务...")
-    print("🌐 服务地址: http://localhost:5001")
+
+def init_db(app):
+    """执行未执行的数据库迁移（见 migrations/）；多进程部署时只在主进程启动前调用一次"""
+    with app.app_context():
+        upgrade(db.engine)
+
+
+if __name__ == "__main__":
+    app = create_app()
+    init_db(app)
+
+    port = int(os.environ.get("PORT", 5001))
+    print("🚀 启动后端服务（开发模式）...")
+    print(f"🌐 服务地址: http://localhost:{port}")
     print("📝 使用端口5001避免与macOS系统服务冲突")
+    print("🏭 生产环境请使用: gunicorn -c gunicorn.conf.py wsgi:app")
     
-    app.run(debug=True, port=5001)
-
+    app.run(debug=os.environ.get("FLASK_DEBUG", "1") == "1", port=port)
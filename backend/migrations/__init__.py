@@ -0,0 +1,94 @@
+"""
+版本化的数据库迁移
+
+- versions/ 下每个 NNNN_name.py 是一个迁移，提供 upgrade(conn)，按编号顺序执行
+- 已执行的版本记录在 schema_version 表中，每个迁移只执行一次
+- 迁移只使用 migrations.ops 中的幂等操作，中途失败后重新运行会从失败的迁移继续
+
+用法:
+    flask --app main db-upgrade      # 执行所有未执行的迁移
+    flask --app main db-status       # 查看迁移状态
+    python -m migrations [status]
+"""
+
+import importlib
+import os
+import re
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select
+
+from config import db
+
+VERSIONS_DIR = os.path.join(os.path.dirname(__file__), "versions")
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+schema_version = db.Table(
+    "schema_version",
+    db.Column("version", db.Integer, primary_key=True),
+    db.Column("name", db.String(100), nullable=False),
+    db.Column("applied_at", db.DateTime, nullable=False),
+)
+
+
+def discover():
+    """按编号返回全部迁移 [(version, name, module)]"""
+    migrations = []
+    for filename in sorted(os.listdir(VERSIONS_DIR)):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        module = importlib.import_module(f"{__name__}.versions.{filename[:-3]}")
+        migrations.append((int(match.group(1)), match.group(2), module))
+    return migrations
+
+
+def applied_versions(conn):
+    schema_version.create(conn, checkfirst=True)
+    conn.commit()
+    return set(conn.scalars(select(schema_version.c.version)))
+
+
+def upgrade(engine, target=None):
+    """执行所有未执行的迁移（target 指定时只执行到该版本），返回本次执行的版本号列表"""
+    executed = []
+    with engine.connect() as conn:
+        applied = applied_versions(conn)
+        for version, name, module in discover():
+            if version in applied or (target is not None and version > target):
+                continue
+            print(f"⏳ {version:04d} {name}")
+            module.upgrade(conn)
+            conn.execute(insert(schema_version).values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+            conn.commit()
+            executed.append(version)
+            print(f"✅ {version:04d} {name}")
+    return executed
+
+
+def status(engine):
+    """返回 [(version, name, 是否已执行)]"""
+    with engine.connect() as conn:
+        applied = applied_versions(conn)
+    return [(version, name, version in applied) for version, name, _ in discover()]
+
+
+@click.command("db-upgrade")
+@click.option("--target", type=int, default=None, help="只迁移到指定版本")
+@with_appcontext
+def upgrade_command(target):
+    """执行未执行的数据库迁移"""
+    executed = upgrade(db.engine, target)
+    click.echo(f"🎉 Applied {len(executed)} migration(s)" if executed else "✅ Database is up to date")
+
+
+@click.command("db-status")
+@with_appcontext
+def status_command():
+    """查看数据库迁移状态"""
+    for version, name, applied in status(db.engine):
+        click.echo(f"{'✅' if applied else '⏳'} {version:04d} {name}")
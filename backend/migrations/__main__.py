@@ -0,0 +1,17 @@
+"""python -m migrations [upgrade|status]"""
+
+import sys
+
+from config import db
+from main import create_app
+from migrations import status, upgrade
+
+if __name__ == "__main__":
+    app = create_app()
+    with app.app_context():
+        if sys.argv[1:] == ["status"]:
+            for version, name, applied in status(db.engine):
+                print(f"{'✅' if applied else '⏳'} {version:04d} {name}")
+        else:
+            upgrade(db.engine)
+            print("🎉 Database migration completed!")
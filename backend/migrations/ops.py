@@ -0,0 +1,122 @@
+"""
+迁移脚本使用的幂等操作：已经存在的列/索引直接跳过，同一个迁移重复执行不会出错
+
+回填数据按主键区间分批 UPDATE，每批单独提交；SQLite 在 WAL 模式下写锁只在每批提交前持有很短时间，
+其他进程的读请求不受影响，写请求最多等待一批的时间（受 busy_timeout 保护）
+"""
+
+import os
+import time
+
+from sqlalchemy import func, inspect, select, table, column, update
+
+BATCH_SIZE = int(os.environ.get("MIGRATION_BATCH_SIZE", 1000))
+# 每批之间暂停的秒数，给线上的写请求让出数据库锁
+BATCH_PAUSE = float(os.environ.get("MIGRATION_BATCH_PAUSE", 0))
+
+
+def quote(conn, name):
+    return conn.dialect.identifier_preparer.quote(name)
+
+
+def has_table(conn, table_name):
+    return inspect(conn).has_table(table_name)
+
+
+def column_names(conn, table_name):
+    return {col["name"] for col in inspect(conn).get_columns(table_name)}
+
+
+def index_names(conn, table_name):
+    return {index["name"] for index in inspect(conn).get_indexes(table_name)}
+
+
+def add_column(conn, table_name, col):
+    """
+    ALTER TABLE ... ADD COLUMN；列已存在时跳过，NOT NULL 的列必须带 server_default
+    SQLite 和 PostgreSQL 添加带常量默认值的列都只修改表结构，不会重写整张表
+    """
+    if col.name in column_names(conn, table_name):
+        return False
+
+    ddl = f"ALTER TABLE {quote(conn, table_name)} ADD COLUMN {quote(conn, col.name)} {col.type.compile(dialect=conn.dialect)}"
+    if col.server_default is not None:
+        default = col.server_default.arg
+        if not isinstance(default, str):
+            default = str(default.compile(dialect=conn.dialect))
+        else:
+            default = f"'{default}'"
+        ddl += f" DEFAULT {default}"
+    if not col.nullable:
+        ddl += " NOT NULL"
+    conn.exec_driver_sql(ddl)
+    conn.commit()
+    print(f"   + {table_name}.{col.name}")
+    return True
+
+
+def create_index(conn, name, table_name, columns, unique=False, where=None):
+    """
+    创建索引；已存在时跳过，where 为部分索引的条件（SQL 片段）
+    PostgreSQL 使用 CREATE INDEX CONCURRENTLY，建索引期间不阻塞写入
+    """
+    if name in index_names(conn, table_name):
+        return False
+
+    cols = ", ".join(quote(conn, c) for c in columns)
+    condition = f" WHERE {where}" if where else ""
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    if conn.dialect.name == "postgresql":
+        conn.commit()
+        with conn.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as autocommit:
+            autocommit.exec_driver_sql(
+                f"CREATE {kind} CONCURRENTLY IF NOT EXISTS {quote(conn, name)} ON {quote(conn, table_name)} ({cols}){condition}"
+            )
+    else:
+        conn.exec_driver_sql(
+            f"CREATE {kind} IF NOT EXISTS {quote(conn, name)} ON {quote(conn, table_name)} ({cols}){condition}"
+        )
+        conn.commit()
+    print(f"   + index {name}")
+    return True
+
+
+def drop_index(conn, name, table_name):
+    if name not in index_names(conn, table_name):
+        return False
+    conn.exec_driver_sql(f"DROP INDEX {quote(conn, name)}")
+    conn.commit()
+    print(f"   - index {name}")
+    return True
+
+
+def id_batches(conn, table_name, batch_size=None):
+    """按主键把整张表切成 (起始id, 结束id] 区间，每个区间最多 batch_size 个id"""
+    batch_size = batch_size or BATCH_SIZE
+    t = table(table_name, column("id"))
+    max_id = conn.scalar(select(func.max(t.c.id)))
+    conn.commit()
+    if max_id is None:
+        return
+    for lower in range(0, max_id, batch_size):
+        yield lower, lower + batch_size
+
+
+def backfill(conn, table_name, values, where=None, batch_size=None):
+    """
+    分批执行 UPDATE table SET values WHERE where，返回更新的行数
+    values 为 {列名: 值}，where 为用 column("列名") 构造的附加条件（可选）
+    """
+    t = table(table_name, column("id"), *(column(name) for name in values))
+    total = 0
+    for lower, upper in id_batches(conn, table_name, batch_size):
+        statement = update(t).where(t.c.id > lower, t.c.id <= upper).values(values)
+        if where is not None:
+            statement = statement.where(where)
+        total += conn.execute(statement).rowcount
+        conn.commit()
+        if BATCH_PAUSE:
+            time.sleep(BATCH_PAUSE)
+    if total:
+        print(f"   ~ {table_name}: {total} rows backfilled")
+    return total
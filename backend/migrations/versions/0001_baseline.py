@@ -0,0 +1,14 @@
+"""
+创建还不存在的数据表
+
+新数据库直接按 models.py 建出完整的表结构，之后的迁移检测到列和索引已存在会自动跳过；
+已有的数据库只补建缺少的表，已有的表由后续迁移补齐
+"""
+
+from config import db
+import models  # noqa: F401  注册所有模型
+
+
+def upgrade(conn):
+    db.metadata.create_all(conn, checkfirst=True)
+    conn.commit()
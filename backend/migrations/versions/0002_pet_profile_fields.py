@@ -0,0 +1,11 @@
+"""为宠物添加毛色、芯片ID和备注（取代 add_pet_fields.py）"""
+
+from sqlalchemy import Column, String, Text
+
+from migrations.ops import add_column
+
+
+def upgrade(conn):
+    add_column(conn, "pet", Column("color", String(100)))
+    add_column(conn, "pet", Column("microchip_id", String(100)))
+    add_column(conn, "pet", Column("notes", Text))
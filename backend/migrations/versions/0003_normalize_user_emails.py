@@ -0,0 +1,27 @@
+"""
+把已有用户的邮箱统一为小写（与 User.email 的规范化规则一致，取代 migrate_db.py）
+规范化后与其他用户冲突的邮箱保持不变，只打印警告
+"""
+
+from sqlalchemy import column, func, select, table, update
+
+from migrations.ops import id_batches
+
+user = table("user", column("id"), column("email"))
+
+
+def upgrade(conn):
+    for lower, upper in id_batches(conn, "user"):
+        rows = conn.execute(select(user.c.id, user.c.email).where(
+            user.c.id > lower, user.c.id <= upper,
+            user.c.email != func.lower(func.trim(user.c.email)),
+        )).fetchall()
+
+        for user_id, email in rows:
+            normalized = email.strip().lower()
+            conflict = conn.scalar(select(user.c.id).where(user.c.email == normalized, user.c.id != user_id))
+            if conflict:
+                print(f"⚠️  Skipped user {user_id}: {normalized} already used by user {conflict}")
+                continue
+            conn.execute(update(user).where(user.c.id == user_id).values(email=normalized))
+        conn.commit()
@@ -0,0 +1,34 @@
+"""
+补齐路由中用到、但旧数据库或旧模型中缺少的列：
+- diet_log.feeding_time / notes, weight_log.notes, vaccine_log.notes / reminder_enabled
+- pet_growth_log.height_cm / length_cm / notes
+- reminder.message / is_sent / title / description / is_completed / created_at
+已有数据中布尔列的 NULL 分批回填为默认值
+"""
+
+from sqlalchemy import Boolean, Column, DateTime, Float, String, Text, Time, column, false, true
+
+from migrations.ops import add_column, backfill
+
+
+def upgrade(conn):
+    add_column(conn, "diet_log", Column("feeding_time", Time))
+    add_column(conn, "diet_log", Column("notes", Text))
+    add_column(conn, "weight_log", Column("notes", Text))
+    add_column(conn, "vaccine_log", Column("notes", Text))
+    add_column(conn, "vaccine_log", Column("reminder_enabled", Boolean, server_default=true()))
+
+    add_column(conn, "pet_growth_log", Column("height_cm", Float))
+    add_column(conn, "pet_growth_log", Column("length_cm", Float))
+    add_column(conn, "pet_growth_log", Column("notes", Text))
+
+    add_column(conn, "reminder", Column("message", Text))
+    add_column(conn, "reminder", Column("is_sent", Boolean, server_default=false()))
+    add_column(conn, "reminder", Column("title", String(200)))
+    add_column(conn, "reminder", Column("description", Text))
+    add_column(conn, "reminder", Column("is_completed", Boolean, server_default=false()))
+    add_column(conn, "reminder", Column("created_at", DateTime))
+
+    backfill(conn, "vaccine_log", {"reminder_enabled": True}, where=column("reminder_enabled").is_(None))
+    backfill(conn, "reminder", {"is_sent": False}, where=column("is_sent").is_(None))
+    backfill(conn, "reminder", {"is_completed": False}, where=column("is_completed").is_(None))
@@ -0,0 +1,28 @@
+"""
+列表、最新N条、到期提醒等高频查询用到的索引（见 test_query_plans.py）
+SQLite 建索引期间会阻塞写入（读不受影响），PostgreSQL 使用 CONCURRENTLY 不阻塞
+"""
+
+from migrations.ops import create_index, drop_index
+
+INDEXES = [
+    ("ix_user_email", "user", ["email"]),
+    ("ix_diet_log_pet_id_date", "diet_log", ["pet_id", "date"]),
+    ("ix_weight_log_pet_id_date", "weight_log", ["pet_id", "date"]),
+    ("ix_vaccine_log_pet_id_date", "vaccine_log", ["pet_id", "date"]),
+    ("ix_vaccine_log_next_due_date", "vaccine_log", ["next_due_date"]),
+    ("ix_pet_growth_log_pet_id_date", "pet_growth_log", ["pet_id", "date"]),
+    ("ix_reminder_pet_id_due_date", "reminder", ["pet_id", "due_date"]),
+    # /reminders/overdue 和 /reminders/due-soon: is_sent = false AND due_date 范围
+    ("ix_reminder_is_sent_due_date", "reminder", ["is_sent", "due_date"]),
+    # /reminders/upcoming: 每只宠物 is_sent = false AND is_completed = false AND due_date >= 今天，按 due_date 取前 n 条
+    ("ix_reminder_pet_id_is_sent_is_completed_due_date", "reminder", ["pet_id", "is_sent", "is_completed", "due_date"]),
+]
+
+
+def upgrade(conn):
+    for name, table_name, columns in INDEXES:
+        create_index(conn, name, table_name, columns)
+    # migrate_db.py 早期版本建的 (is_completed, due_date)：没有 pet_id 和 is_sent，/reminders/upcoming 用不上，
+    # 由上面的 ix_reminder_pet_id_is_sent_is_completed_due_date 代替
+    drop_index(conn, "ix_reminder_is_completed_due_date", "reminder")
@@ -0,0 +1,24 @@
+"""
+为已有的饮食记录生成每日汇总（diet_daily_rollup 表由 0001 新建时为空）
+按宠物分批 INSERT ... SELECT，每批单独提交
+"""
+
+from sqlalchemy import func, select
+
+from diet_rollup import rollup_insert_statement
+from migrations.ops import BATCH_SIZE
+from models import DietDailyRollup, DietLog
+
+
+def upgrade(conn):
+    if conn.scalar(select(func.count()).select_from(DietDailyRollup)):
+        return
+
+    pet_ids = list(conn.scalars(select(DietLog.pet_id).distinct().order_by(DietLog.pet_id)))
+    # 每批的宠物数按平均每只宠物约 100 条记录估算
+    pets_per_batch = max(BATCH_SIZE // 100, 1)
+    for start in range(0, len(pet_ids), pets_per_batch):
+        conn.execute(rollup_insert_statement(pet_ids[start:start + pets_per_batch]))
+        conn.commit()
+    if pet_ids:
+        print(f"   ~ diet_daily_rollup: {len(pet_ids)} pets")
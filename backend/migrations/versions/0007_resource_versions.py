@@ -0,0 +1,14 @@
+"""
+ETag 使用的版本号: pet.version / pet.updated_at 和 user.pets_version
+已有的行通过列默认值得到版本号 1，不需要回填
+"""
+
+from sqlalchemy import Column, DateTime, Integer, text
+
+from migrations.ops import add_column
+
+
+def upgrade(conn):
+    add_column(conn, "pet", Column("version", Integer, nullable=False, server_default=text("1")))
+    add_column(conn, "pet", Column("updated_at", DateTime))
+    add_column(conn, "user", Column("pets_version", Integer, nullable=False, server_default=text("1")))
@@ -0,0 +1,15 @@
+"""
+宠物列表（GET /pets）的过滤和排序索引：按用户列出并按名字排序、按种类和品种过滤
+"""
+
+from migrations.ops import create_index
+
+INDEXES = [
+    ("ix_pet_user_id_name", "pet", ["user_id", "name"]),
+    ("ix_pet_species_breed", "pet", ["species", "breed"]),
+]
+
+
+def upgrade(conn):
+    for name, table_name, columns in INDEXES:
+        create_index(conn, name, table_name, columns)
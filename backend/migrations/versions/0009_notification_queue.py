@@ -0,0 +1,16 @@
+"""
+后台提醒任务（reminder_worker.py）使用的通知队列表 notification，
+以及疫苗记录自动生成的提醒: reminder.vaccine_log_id
+"""
+
+from sqlalchemy import Column, Integer
+
+from migrations.ops import add_column, create_index
+from models import Notification
+
+
+def upgrade(conn):
+    Notification.__table__.create(conn, checkfirst=True)
+    conn.commit()
+    add_column(conn, "reminder", Column("vaccine_log_id", Integer))
+    create_index(conn, "ix_reminder_vaccine_log_id_due_date", "reminder", ["vaccine_log_id", "due_date"], unique=True)
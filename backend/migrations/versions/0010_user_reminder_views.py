@@ -0,0 +1,9 @@
+"""
+按用户查询过期/即将到期的提醒（GET /reminders/overdue、/reminders/due-soon?user_id=）使用的索引
+"""
+
+from migrations.ops import create_index
+
+
+def upgrade(conn):
+    create_index(conn, "ix_reminder_pet_id_is_sent_due_date", "reminder", ["pet_id", "is_sent", "due_date"])
@@ -0,0 +1,14 @@
+"""
+循环提醒: reminder.recurrence_rule / recurrence_end / completed_through（见 recurrence.py）；
+已有的提醒都是单次提醒，新列为空即可
+"""
+
+from sqlalchemy import Column, Date, String
+
+from migrations.ops import add_column
+
+
+def upgrade(conn):
+    add_column(conn, "reminder", Column("recurrence_rule", String(255)))
+    add_column(conn, "reminder", Column("recurrence_end", Date))
+    add_column(conn, "reminder", Column("completed_through", Date))
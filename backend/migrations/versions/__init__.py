@@ -0,0 +1 @@
+"""迁移脚本，文件名格式为 NNNN_name.py"""
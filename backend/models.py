@@ -1,28 +1,63 @@
 from config import db
 from datetime import datetime
+from sqlalchemy.orm import validates
+
+
+def normalize_email(email):
+    """邮箱统一去空格并转小写，注册、登录和查询都使用同一种形式"""
+    if email is None:
+        return None
+    return email.strip().lower()
 
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(80), unique=False, nullable=False)
     last_name = db.Column(db.String(80), unique=False, nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False, index=True)  # 统一小写存储
     password = db.Column(db.String(120),unique=False,nullable=False)
+    # 宠物列表的版本号，新增/修改/删除该用户的宠物时加一（用于 ETag，见 conditional.py）
+    pets_version = db.Column(db.Integer, nullable=False, default=1, server_default=db.text("1"))
     pets = db.relationship('Pet', backref='owner', lazy=True)
-    #是否创建一个以email为key的password字典
-    
-    def to_json(self):
+
+    @validates("email")
+    def validate_email(self, key, email):
+        return normalize_email(email)
+
+    def to_identity_json(self):
+        """登录等场景使用的精简字段，不含密码和宠物"""
         return {
             "id": self.id,
             "firstName": self.first_name,
             "lastName": self.last_name,
             "email": self.email,
+        }
+
+    def to_json(self, fields=None, include_pets=True):
+        """
+        fields: 只返回指定的字段（例如 ["id", "email"]），None 表示全部字段
+        include_pets: 是否序列化 pets；批量序列化时请先用 selectinload(User.pets) 预加载，避免 N+1 查询
+        """
+        data = {
+            "id": self.id,
+            "firstName": self.first_name,
+            "lastName": self.last_name,
+            "email": self.email,
             "password": self.password,
-            "pets": [pet.to_json() for pet in self.pets]  # 改这里
         }
+        if fields is not None:
+            data = {key: value for key, value in data.items() if key in fields}
+        if include_pets:
+            data["pets"] = [pet.to_json() for pet in self.pets]
+        return data
 
 
 class Pet(db.Model):
+    __table_args__ = (
+        db.Index("ix_pet_user_id_name", "user_id", "name"),
+        db.Index("ix_pet_species_breed", "species", "breed"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100))
     species = db.Column(db.String(100))   # 动物种类例如猫、狗
@@ -32,6 +67,9 @@ class Pet(db.Model):
     microchip_id = db.Column(db.String(100))  # 芯片ID
     notes = db.Column(db.Text)            # 备注
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # 宠物本身或它的任意记录、提醒发生变化时加一（用于 ETag，见 conditional.py）
+    version = db.Column(db.Integer, nullable=False, default=1, server_default=db.text("1"))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
     diet_logs = db.relationship('DietLog', backref='pet', lazy=True)
     weight_logs = db.relationship('WeightLog', backref='pet', lazy=True)
     vaccine_logs = db.relationship('VaccineLog', backref='pet', lazy=True)  # 疫苗接种记录  
@@ -51,6 +89,10 @@ class Pet(db.Model):
         }
 
 class DietLog(db.Model):
+    __table_args__ = (
+        db.Index("ix_diet_log_pet_id_date", "pet_id", "date"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     pet_id = db.Column(db.Integer, db.ForeignKey('pet.id'), nullable=False)
     date = db.Column(db.Date, nullable=False)
@@ -58,6 +100,7 @@ class DietLog(db.Model):
     food_amount = db.Column(db.Float)  # 食物数量
     unit = db.Column(db.String(20))  # 单位 (g, kg, cups, etc.)
     meal_type = db.Column(db.String(50))  # 餐次类型 (breakfast, lunch, dinner, snack)
+    feeding_time = db.Column(db.Time)  # 喂食时间
     notes = db.Column(db.Text)  # 备注
 
     def to_json(self):
@@ -69,10 +112,39 @@ class DietLog(db.Model):
             "food_amount": self.food_amount,
             "unit": self.unit,
             "meal_type": self.meal_type,
+            "feeding_time": self.feeding_time.strftime("%H:%M") if self.feeding_time else None,
             "notes": self.notes
         }
 
+class DietDailyRollup(db.Model):
+    """每只宠物每天每个餐次的进食汇总，由 diet_rollup.py 随饮食记录的增删改增量维护"""
+    __table_args__ = (
+        db.UniqueConstraint("pet_id", "date", "meal_type", name="uq_diet_daily_rollup_pet_date_meal"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    pet_id = db.Column(db.Integer, db.ForeignKey('pet.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    meal_type = db.Column(db.String(50), nullable=False, default="")  # 未填写餐次时为空字符串
+    total_grams = db.Column(db.Float, nullable=False, default=0.0)  # 换算成克后的总量
+    entry_count = db.Column(db.Integer, nullable=False, default=0)  # 记录条数
+    unconverted_count = db.Column(db.Integer, nullable=False, default=0)  # 单位无法换算成克的记录条数
+
+    def to_json(self):
+        return {
+            "pet_id": self.pet_id,
+            "date": self.date.strftime("%Y-%m-%d") if self.date else None,
+            "meal_type": self.meal_type or None,
+            "total_grams": self.total_grams,
+            "entry_count": self.entry_count,
+            "unconverted_count": self.unconverted_count
+        }
+
 class WeightLog(db.Model):
+    __table_args__ = (
+        db.Index("ix_weight_log_pet_id_date", "pet_id", "date"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     pet_id = db.Column(db.Integer, db.ForeignKey('pet.id'), nullable=False)
     date = db.Column(db.Date, nullable=False)
@@ -89,11 +161,17 @@ class WeightLog(db.Model):
         }
 
 class VaccineLog(db.Model):
+    __table_args__ = (
+        db.Index("ix_vaccine_log_pet_id_date", "pet_id", "date"),
+        db.Index("ix_vaccine_log_next_due_date", "next_due_date"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     pet_id = db.Column(db.Integer, db.ForeignKey('pet.id'), nullable=False)
     date = db.Column(db.Date, nullable=False)
     vaccine_type = db.Column(db.String(100), nullable=False)  # 疫苗类型
     next_due_date = db.Column(db.Date)  # 下次接种日期
+    reminder_enabled = db.Column(db.Boolean, default=True, server_default=db.true())  # 是否提醒下次接种
     notes = db.Column(db.Text)  # 备注
 
     def to_json(self):
@@ -103,10 +181,15 @@ class VaccineLog(db.Model):
             "date": self.date.strftime("%Y-%m-%d") if self.date else None,
             "vaccine_type": self.vaccine_type,
             "next_due_date": self.next_due_date.strftime("%Y-%m-%d") if self.next_due_date else None,
+            "reminder_enabled": self.reminder_enabled,
             "notes": self.notes
         }
 
 class PetGrowthLog(db.Model):
+    __table_args__ = (
+        db.Index("ix_pet_growth_log_pet_id_date", "pet_id", "date"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     pet_id = db.Column(db.Integer, db.ForeignKey('pet.id'), nullable=False)
     date = db.Column(db.Date, nullable=False)
@@ -125,14 +208,34 @@ class PetGrowthLog(db.Model):
         }
 
 class Reminder(db.Model):
+    __table_args__ = (
+        db.Index("ix_reminder_is_sent_due_date", "is_sent", "due_date"),
+        db.Index("ix_reminder_pet_id_due_date", "pet_id", "due_date"),
+        # 按用户查询过期/即将到期的提醒: pet_id IN (该用户的宠物) AND is_sent = false AND due_date 范围，
+        # 循环提醒的窗口查询（见 recurrence.py）同样使用
+        db.Index("ix_reminder_pet_id_is_sent_due_date", "pet_id", "is_sent", "due_date"),
+        # /reminders/upcoming: 每只宠物未发送、未完成、今天及以后到期的前 n 条
+        db.Index("ix_reminder_pet_id_is_sent_is_completed_due_date", "pet_id", "is_sent", "is_completed", "due_date"),
+        # 每条疫苗记录的每个到期日只自动生成一条提醒（见 reminder_worker.py）
+        db.Index("ix_reminder_vaccine_log_id_due_date", "vaccine_log_id", "due_date", unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     pet_id = db.Column(db.Integer, db.ForeignKey('pet.id'), nullable=False)
-    title = db.Column(db.String(200), nullable=False)
+    title = db.Column(db.String(200))
     description = db.Column(db.Text)
+    message = db.Column(db.Text)  # 提醒内容
     due_date = db.Column(db.Date, nullable=False)
-    reminder_type = db.Column(db.String(50))  # 提醒类型 (vaccine, checkup, medication, etc.)
-    is_completed = db.Column(db.Boolean, default=False)
+    reminder_type = db.Column(db.String(50))  # 提醒类型 (vaccine, weight, diet, general)
+    is_sent = db.Column(db.Boolean, default=False, server_default=db.false())  # 是否已发送
+    is_completed = db.Column(db.Boolean, default=False, server_default=db.false())
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # 由疫苗记录的 next_due_date 自动生成的提醒
+    vaccine_log_id = db.Column(db.Integer, db.ForeignKey('vaccine_log.id'))
+    # 循环提醒（见 recurrence.py）: RRULE、最后一次可能发生的日期、已发送到哪一天
+    recurrence_rule = db.Column(db.String(255))
+    recurrence_end = db.Column(db.Date)
+    completed_through = db.Column(db.Date)
 
     def to_json(self):
         return {
@@ -140,8 +243,45 @@ class Reminder(db.Model):
             "pet_id": self.pet_id,
             "title": self.title,
             "description": self.description,
+            "message": self.message,
             "due_date": self.due_date.strftime("%Y-%m-%d") if self.due_date else None,
             "reminder_type": self.reminder_type,
+            "is_sent": self.is_sent,
             "is_completed": self.is_completed,
+            "created_at": self.created_at.strftime("%Y-%m-%d %H:%M:%S") if self.created_at else None,
+            "vaccine_log_id": self.vaccine_log_id,
+            "recurrence_rule": self.recurrence_rule,
+            "recurrence_end": self.recurrence_end.strftime("%Y-%m-%d") if self.recurrence_end else None,
+            "completed_through": self.completed_through.strftime("%Y-%m-%d") if self.completed_through else None
+        }
+
+class Notification(db.Model):
+    """
+    通知队列：后台任务（reminder_worker.py）把到期的提醒写入这张表并把提醒标记为已发送，
+    接口只读取这张小表，不需要每次扫描全部提醒
+    """
+    __table_args__ = (
+        db.UniqueConstraint("reminder_id", "due_date", name="uq_notification_reminder_id_due_date"),
+        db.Index("ix_notification_pet_id_is_read_id", "pet_id", "is_read", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    pet_id = db.Column(db.Integer, db.ForeignKey('pet.id'), nullable=False)
+    reminder_id = db.Column(db.Integer, db.ForeignKey('reminder.id'), nullable=False)
+    reminder_type = db.Column(db.String(50))
+    message = db.Column(db.Text)
+    due_date = db.Column(db.Date, nullable=False)
+    is_read = db.Column(db.Boolean, default=False, server_default=db.false())
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "pet_id": self.pet_id,
+            "reminder_id": self.reminder_id,
+            "reminder_type": self.reminder_type,
+            "message": self.message,
+            "due_date": self.due_date.strftime("%Y-%m-%d") if self.due_date else None,
+            "is_read": self.is_read,
             "created_at": self.created_at.strftime("%Y-%m-%d %H:%M:%S") if self.created_at else None
         }
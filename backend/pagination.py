@@ -0,0 +1,167 @@
+"""
+日志列表的游标分页（keyset pagination）和"每只宠物最新 N 条"查询
+
+按 (date, id) 倒序翻页，游标是上一页最后一条记录的 (date, id)，
+查询时只取游标之后的记录，配合 (pet_id, date) 索引，无论历史记录多长，每页的代价都是固定的
+
+宠物列表数量有限、需要总数和多种排序，使用页码分页（get_page_number_args）
+"""
+
+import base64
+from datetime import datetime
+
+from sqlalchemy import select, tuple_, union_all
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+DEFAULT_LATEST_COUNT = 5
+MAX_LATEST_COUNT = 50
+MAX_LATEST_PETS = 50
+
+
+def encode_cursor(log):
+    """把一条记录的 (date, id) 编码为不透明的游标字符串"""
+    return encode_key(log.date, log.id)
+
+
+def encode_key(date, id_):
+    raw = f"{date.strftime('%Y-%m-%d')}:{id_}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """解析游标，返回 (date, id)；格式不正确时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        date_str, id_str = raw.split(":")
+        return datetime.strptime(date_str, "%Y-%m-%d").date(), int(id_str)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("cursor is invalid")
+
+
+def get_page_args(args):
+    """
+    从 query string 读取分页参数: ?cursor=<next_cursor>&limit=50
+    返回 (cursor, limit)，cursor 为 None 表示第一页；参数不合法时抛出 ValueError
+    """
+    cursor = args.get("cursor")
+    if cursor:
+        cursor = decode_cursor(cursor)
+
+    limit = args.get("limit", DEFAULT_PAGE_SIZE)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    if limit <= 0:
+        raise ValueError("limit must be positive")
+
+    return cursor or None, min(limit, MAX_PAGE_SIZE)
+
+
+def get_page_number_args(args):
+    """
+    读取按页码翻页的参数: ?page=1&per_page=50（用于宠物列表等需要总数和跳页的列表）
+    返回 (page, per_page)；参数不合法时抛出 ValueError
+    """
+    try:
+        page = int(args.get("page", 1))
+        per_page = int(args.get("per_page", DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise ValueError("page and per_page must be integers")
+    if page <= 0 or per_page <= 0:
+        raise ValueError("page and per_page must be positive")
+
+    return page, min(per_page, MAX_PAGE_SIZE)
+
+
+def apply_keyset(query, model, cursor=None):
+    """按 (date, id) 倒序排序，并只保留游标之后的记录（Query 和 select() 都适用）"""
+    if cursor is not None:
+        query = query.filter(tuple_(model.date, model.id) < tuple_(*cursor))
+    return query.order_by(model.date.desc(), model.id.desc())
+
+
+def paginate_logs(query, model, cursor, limit):
+    """
+    取一页记录，返回 (logs, next_cursor)；next_cursor 为 None 表示已经是最后一页
+    多取一条用来判断是否还有下一页，不需要额外的 COUNT 查询
+    """
+    logs = apply_keyset(query, model, cursor).limit(limit + 1).all()
+    if len(logs) > limit:
+        logs = logs[:limit]
+        return logs, encode_cursor(logs[-1])
+    return logs, None
+
+
+def paginate_ascending(query, date_column, id_column, cursor, limit):
+    """
+    按 (日期, id) 升序翻页（提醒等按到期日排列、最早的在前的列表），返回 (rows, next_cursor)
+    query 的结果需要包含这两列（ORM 对象或 with_entities 的行都可以）
+    """
+    if cursor is not None:
+        query = query.filter(tuple_(date_column, id_column) > tuple_(*cursor))
+    rows = query.order_by(date_column, id_column).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, encode_key(getattr(last, date_column.key), getattr(last, id_column.key))
+    return rows, None
+
+
+def get_latest_args(args):
+    """
+    读取 ?pet_ids=1,2,3&n=5，返回 (pet_ids, n)；参数不合法时抛出 ValueError
+    """
+    raw_ids = args.get("pet_ids", "")
+    try:
+        pet_ids = list(dict.fromkeys(int(pet_id) for pet_id in raw_ids.split(",") if pet_id.strip()))
+    except ValueError:
+        raise ValueError("pet_ids must be a comma separated list of integers")
+    if not pet_ids:
+        raise ValueError("pet_ids is required")
+    if len(pet_ids) > MAX_LATEST_PETS:
+        raise ValueError(f"at most {MAX_LATEST_PETS} pet_ids are allowed")
+
+    n = args.get("n", DEFAULT_LATEST_COUNT)
+    try:
+        n = int(n)
+    except (TypeError, ValueError):
+        raise ValueError("n must be an integer")
+    if n <= 0:
+        raise ValueError("n must be positive")
+
+    return pet_ids, min(n, MAX_LATEST_COUNT)
+
+
+def latest_ids_statement(model, pet_ids, n, order_by, filters=()):
+    """
+    每只宠物一个 "ORDER BY ... LIMIT n" 分支，用 UNION ALL 合并成一条 SQL，
+    每个分支只在 (pet_id, date) 索引上读取 n 条，代价与历史记录总数无关
+    """
+    branches = [
+        select(model.id)
+        .where(model.pet_id == pet_id, *filters)
+        .order_by(*order_by)
+        .limit(n)
+        .subquery()
+        .select()
+        for pet_id in pet_ids
+    ]
+    return union_all(*branches) if len(branches) > 1 else branches[0]
+
+
+def latest_per_pet(model, pet_ids, n, order_by=None, filters=()):
+    """每只宠物按 order_by（默认日期倒序）各取前 n 条，返回 {pet_id: [记录, ...]}"""
+    if order_by is None:
+        order_by = (model.date.desc(), model.id.desc())
+
+    latest_ids = latest_ids_statement(model, pet_ids, n, order_by, filters)
+    logs = model.query.filter(model.id.in_(latest_ids)).order_by(model.pet_id, *order_by).all()
+
+    grouped = {pet_id: [] for pet_id in pet_ids}
+    for log in logs:
+        grouped[log.pet_id].append(log)
+    return grouped
@@ -0,0 +1,108 @@
+"""
+调试/测试用的 SQL 检查
+
+- 慢查询日志: 单条语句超过 SLOW_QUERY_MS 毫秒时记录语句、绑定参数和所属接口
+- N+1 检测: 一个请求中同一形状的语句（参数不同、IN 列表长度不同视为同一形状）执行超过 NPLUSONE_THRESHOLD 次时
+  记录警告；NPLUSONE_RAISE 为真时抛出 NPlusOneError，测试中（conftest.py）接口一旦出现逐行懒加载就会失败。
+  普通响应在 after_request 中检查，流式响应（例如 /users/<id>/export）在响应关闭时检查
+
+两项默认都关闭，不设置时不注册任何事件监听
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# IN (?, ?, ?) / IN (%(id_1_1)s, %(id_1_2)s) 统一为 IN (?)
+PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|\$\d+)\s*,)*\s*(?:\?|%\(\w+\)s|\$\d+)\s*\)")
+MAX_PARAMETERS_LENGTH = 500
+
+
+class NPlusOneError(RuntimeError):
+    pass
+
+
+def statement_shape(statement):
+    return " ".join(PLACEHOLDER_LIST.sub("(?)", statement).split())
+
+
+def current_route():
+    if not has_request_context():
+        return "-"
+    rule = request.url_rule.rule if request.url_rule else request.path
+    return f"{request.method} {rule}"
+
+
+class QueryDebugger:
+    """
+    配置项（见 config.Config）: SLOW_QUERY_MS, NPLUSONE_THRESHOLD, NPLUSONE_RAISE
+    """
+
+    def __init__(self):
+        self.slow_query_ms = None
+        self.nplusone_threshold = None
+        self.nplusone_raise = False
+
+    def init_app(self, app, engine):
+        self.slow_query_ms = app.config.get("SLOW_QUERY_MS")
+        self.nplusone_threshold = app.config.get("NPLUSONE_THRESHOLD")
+        self.nplusone_raise = app.config.get("NPLUSONE_RAISE", False)
+        if self.slow_query_ms is None and self.nplusone_threshold is None:
+            return
+
+        event.listen(engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self.after_cursor_execute)
+        if self.nplusone_threshold is not None:
+            app.before_request(self.before_request)
+            app.after_request(self.after_request)
+        app.extensions["query_debugger"] = self
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("debug_query_started", []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["debug_query_started"].pop()) * 1000
+        if self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms:
+            logger.warning(
+                "Slow query (%.1f ms) in %s: %s | parameters: %.*s",
+                elapsed_ms, current_route(), " ".join(statement.split()),
+                MAX_PARAMETERS_LENGTH, repr(parameters),
+            )
+        if has_request_context() and "query_shapes" in g:
+            g.query_shapes[statement_shape(statement)] += 1
+
+    def before_request(self):
+        g.query_shapes = Counter()
+
+    def after_request(self, response):
+        shapes = g.get("query_shapes")
+        if shapes is None:
+            return response
+        route = current_route()
+        if response.is_streamed:
+            # 流式响应（stream_with_context）的查询在生成响应体时才执行，响应关闭时再检查
+            response.call_on_close(lambda: self.check(shapes, route))
+            return response
+        g.pop("query_shapes")
+        self.check(shapes, route)
+        return response
+
+    def check(self, shapes, route):
+        repeated = [(shape, count) for shape, count in shapes.most_common() if count > self.nplusone_threshold]
+        if not repeated:
+            return
+
+        details = "; ".join(f"{count}x {shape}" for shape, count in repeated)
+        message = f"Possible N+1 queries in {route}: {details}"
+        if self.nplusone_raise:
+            raise NPlusOneError(message)
+        logger.warning(message)
+
+
+query_debugger = QueryDebugger()
@@ -0,0 +1,144 @@
+"""
+循环提醒（RRULE）
+
+Reminder.recurrence_rule 保存 RFC 5545 的 RRULE（例如 FREQ=MONTHLY、FREQ=DAILY;COUNT=14、FREQ=WEEKLY;BYDAY=MO,TH），
+due_date 是第一次发生的日期（DTSTART）。每个循环提醒只存一行，接口只在请求的日期窗口内展开发生日期：
+
+- recurrence_end: 最后一次可能发生的日期（规则中 UNTIL/COUNT 对应的日期和单独设置的结束日期中较早的一个），
+  为空表示不结束；查询窗口时用 due_date <= 窗口结束 AND (recurrence_end 为空 OR recurrence_end >= 窗口开始)
+  取出可能在窗口内发生的规则（索引 ix_reminder_pet_id_is_sent_due_date 上 due_date <= 窗口结束的范围）
+- completed_through: 这一天及之前的发生视为已发送，由 reminder_worker.py 推进；
+  循环提醒的 is_sent 只在整个系列结束后才置为真
+"""
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from itertools import islice, takewhile
+
+from dateutil.rrule import rrulestr
+from sqlalchemy import or_
+
+from models import Reminder
+from serializers import reminder_serializer
+
+# 一次展开最多返回的发生次数（每日提醒展开很长的窗口时截断）
+MAX_OCCURRENCES = 1000
+# 有限规则（COUNT/UNTIL）允许的最多发生次数
+MAX_SERIES_LENGTH = 10000
+# 提醒只精确到日期，不支持按小时/分钟/秒重复
+SUBDAILY_FREQUENCIES = ("HOURLY", "MINUTELY", "SECONDLY")
+
+
+def normalize_rule(text):
+    """去掉 RRULE: 前缀并转为大写；格式不正确时抛出 ValueError"""
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("recurrence_rule must be a non-empty string")
+    rule = text.strip().upper()
+    if rule.startswith("RRULE:"):
+        rule = rule[len("RRULE:"):]
+    if "DTSTART" in rule or "\n" in rule or ":" in rule:
+        raise ValueError("recurrence_rule must be a single RRULE without DTSTART (due_date is the start)")
+
+    try:
+        parts = dict(part.split("=", 1) for part in rule.split(";") if part)
+    except ValueError:
+        raise ValueError("recurrence_rule is invalid")
+    if "FREQ" not in parts:
+        raise ValueError("recurrence_rule must contain FREQ")
+    if parts["FREQ"] in SUBDAILY_FREQUENCIES:
+        raise ValueError("recurrence_rule must repeat at most daily")
+    return rule
+
+
+@lru_cache(maxsize=1024)
+def build_rule(rule, start):
+    try:
+        return rrulestr(rule, dtstart=datetime.combine(start, time()))
+    except (ValueError, TypeError):
+        raise ValueError("recurrence_rule is invalid")
+
+
+def parse_recurrence(text, due_date, recurrence_end=None):
+    """
+    校验循环规则，返回 (规范化的规则, 系列结束日期或 None)；不合法时抛出 ValueError
+    创建和修改提醒时调用，结果写入 recurrence_rule / recurrence_end
+    """
+    rule = normalize_rule(text)
+    parsed = build_rule(rule, due_date)
+
+    end = None
+    if "COUNT=" in rule or "UNTIL=" in rule:
+        occurrences = list(islice(parsed, MAX_SERIES_LENGTH + 1))
+        if len(occurrences) > MAX_SERIES_LENGTH:
+            raise ValueError(f"recurrence_rule must have at most {MAX_SERIES_LENGTH} occurrences")
+        if not occurrences:
+            raise ValueError("recurrence_rule has no occurrences")
+        end = occurrences[-1].date()
+    if recurrence_end is not None:
+        if recurrence_end < due_date:
+            raise ValueError("recurrence_end must not be before due_date")
+        end = min(end, recurrence_end) if end else recurrence_end
+    return rule, end
+
+
+def separate_recurrence_end(rule, due_date, recurrence_end):
+    """
+    recurrence_end 中单独设置的结束日期；和规则本身（COUNT/UNTIL）推算出的日期相同时视为推算值，返回 None
+    修改提醒时没有传入 recurrence_end 就沿用这个日期
+    """
+    if not rule or recurrence_end is None:
+        return None
+    try:
+        rule_end = parse_recurrence(rule, due_date)[1]
+    except ValueError:
+        return recurrence_end
+    return None if rule_end == recurrence_end else recurrence_end
+
+
+def occurrences(rule, start, window_start, window_end, recurrence_end=None, after=None):
+    """
+    规则在 [window_start, window_end] 内、after 之后（不含）的发生日期，按日期升序，最多 MAX_OCCURRENCES 个
+    start 为第一次发生的日期（due_date）
+    """
+    lower = max(window_start, start)
+    if after is not None:
+        lower = max(lower, after + timedelta(days=1))
+    upper = min(window_end, recurrence_end) if recurrence_end else window_end
+    if lower > upper:
+        return []
+
+    upper_dt = datetime.combine(upper, time())
+    dates = build_rule(rule, start).xafter(datetime.combine(lower, time()), count=MAX_OCCURRENCES, inc=True)
+    return [occurrence.date() for occurrence in takewhile(lambda occurrence: occurrence <= upper_dt, dates)]
+
+
+def next_occurrence(rule, start, recurrence_end=None, after=None):
+    """after 之后（不含）的下一次发生日期，系列已经结束时返回 None"""
+    upcoming = occurrences(rule, start, start, recurrence_end or date.max, recurrence_end, after)
+    return upcoming[0] if upcoming else None
+
+
+def recurring_in_window(window_start, window_end):
+    """可能在 [window_start, window_end] 内发生的循环提醒的过滤条件"""
+    return (
+        Reminder.recurrence_rule.isnot(None),
+        Reminder.due_date <= window_end,
+        or_(Reminder.recurrence_end.is_(None), Reminder.recurrence_end >= window_start),
+    )
+
+
+def expand_reminders(rows, window_start, window_end, unsent_only=False):
+    """
+    把循环提醒（reminder_serializer.select() 查询出的行）展开为窗口内的每次发生，返回按 (due_date, id) 排序的字典列表
+    每次发生的 due_date 是发生日期，is_sent 表示这一次是否已经发送；unsent_only 为真时只返回未发送的
+    """
+    items = []
+    for row in rows:
+        after = row.completed_through if unsent_only else None
+        for day in occurrences(row.recurrence_rule, row.due_date, window_start, window_end, row.recurrence_end, after):
+            item = reminder_serializer.row(row)
+            item["due_date"] = day.isoformat()
+            item["is_sent"] = row.completed_through is not None and day <= row.completed_through
+            items.append(item)
+    items.sort(key=lambda item: (item["due_date"], item["id"]))
+    return items
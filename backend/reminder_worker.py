@@ -0,0 +1,283 @@
+"""
+后台提醒任务：定期把到期的疫苗和提醒写入通知队列（notification 表），接口只读取这张小表
+
+每一轮扫描:
+1. 疫苗记录: 开启了提醒、next_due_date 在今天前后 VACCINE_REMINDER_DAYS 天内、还没有对应提醒的，
+   生成一条 reminder_type="vaccine" 的提醒（ix_vaccine_log_next_due_date 上的范围查询）
+2. 提醒: 未发送且 due_date <= 今天 + REMINDER_LEAD_DAYS 的，写入通知队列并标记为已发送
+   （ix_reminder_is_sent_due_date 上的范围查询）
+3. 循环提醒（见 recurrence.py）: 展开 completed_through 之后、今天 + REMINDER_LEAD_DAYS 之前的每次发生并写入通知队列，
+   completed_through 推进到窗口末尾；系列没有更多发生时标记为已发送
+
+每批最多 REMINDER_WORKER_BATCH_SIZE 条，一批一个事务；处理过的行不再满足查询条件，重新查询就是下一批。
+PostgreSQL 上用 FOR UPDATE SKIP LOCKED 取批次，同时运行多个 worker 也不会重复处理，
+唯一索引保证同一提醒的同一到期日最多一条通知：通知用 INSERT ... ON CONFLICT DO NOTHING 写入，
+提醒被改回未发送（is_sent=false）后再次处理时跳过已有的通知，只重新标记为已发送。
+一批处理失败时逐行重试，出错的行记录日志后跳过，不影响同一批的其他行
+
+worker 是单独的进程，写入时同时更新 pet.version：带 ETag 的接口（conditional()）的 ETag 和进程内响应缓存
+都按版本号区分，API 进程立即看到新数据；其他只按作用域缓存的接口（没有设置 CACHE_REDIS_URL 时）最多在 CACHE_TTL 秒后更新
+
+用法:
+    python reminder_worker.py                       # 常驻运行（docker compose 中的 reminder-worker 服务）
+    flask --app main reminder-worker [--once]
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from cache import response_cache, pet_scope
+from conditional import touch_pets
+from config import db
+from database import upsert
+from models import Notification, Reminder, VaccineLog
+from recurrence import next_occurrence, occurrences
+
+logger = logging.getLogger(__name__)
+
+SERIES_CATCH_UP_DAYS = 365
+
+
+def vaccine_reminders_statement(today, days, batch_size):
+    """还没有生成提醒的即将到期（或刚过期）的疫苗记录"""
+    return (
+        select(VaccineLog.id, VaccineLog.pet_id, VaccineLog.vaccine_type, VaccineLog.next_due_date)
+        .outerjoin(Reminder, and_(
+            Reminder.vaccine_log_id == VaccineLog.id, Reminder.due_date == VaccineLog.next_due_date
+        ))
+        .where(
+            VaccineLog.next_due_date.between(today - timedelta(days=days), today + timedelta(days=days)),
+            VaccineLog.reminder_enabled == True,
+            Reminder.id.is_(None),
+        )
+        .order_by(VaccineLog.next_due_date, VaccineLog.id)
+        .limit(batch_size)
+        .with_for_update(of=VaccineLog, skip_locked=True)
+    )
+
+
+def due_reminders_statement(today, lead_days, batch_size):
+    """未发送、提前 lead_days 天内到期（包括已过期）的单次提醒"""
+    return (
+        select(Reminder.id, Reminder.pet_id, Reminder.reminder_type, Reminder.title, Reminder.message, Reminder.due_date)
+        .where(
+            Reminder.is_sent == False,
+            Reminder.due_date <= today + timedelta(days=lead_days),
+            Reminder.recurrence_rule.is_(None),
+        )
+        .order_by(Reminder.due_date, Reminder.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def due_series_statement(horizon, batch_size):
+    """还有发生日期没有写入通知队列（completed_through 早于 horizon）的循环提醒"""
+    return (
+        select(
+            Reminder.id, Reminder.pet_id, Reminder.reminder_type, Reminder.title, Reminder.message, Reminder.due_date,
+            Reminder.recurrence_rule, Reminder.recurrence_end, Reminder.completed_through,
+        )
+        .where(
+            Reminder.is_sent == False,
+            Reminder.recurrence_rule.isnot(None),
+            Reminder.due_date <= horizon,
+            or_(Reminder.completed_through.is_(None), Reminder.completed_through < horizon),
+        )
+        .order_by(Reminder.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def create_vaccine_reminders(rows):
+    db.session.execute(insert(Reminder), [{
+        "pet_id": row.pet_id,
+        "vaccine_log_id": row.id,
+        "reminder_type": "vaccine",
+        "title": row.vaccine_type,
+        "message": f"{row.vaccine_type} 疫苗到期提醒",
+        "due_date": row.next_due_date,
+        "is_sent": False,
+    } for row in rows])
+
+
+def notification_values(row, due_date):
+    return {
+        "pet_id": row.pet_id,
+        "reminder_id": row.id,
+        "reminder_type": row.reminder_type,
+        "message": row.message or row.title,
+        "due_date": due_date,
+    }
+
+
+def insert_notifications(values):
+    """写入通知；同一提醒同一到期日已经有通知时跳过"""
+    statement = upsert(Notification, db.session).on_conflict_do_nothing(index_elements=["reminder_id", "due_date"])
+    db.session.execute(statement, values)
+
+
+def create_notifications(rows):
+    insert_notifications([notification_values(row, row.due_date) for row in rows])
+    db.session.execute(
+        update(Reminder).where(Reminder.id.in_([row.id for row in rows])).values(is_sent=True),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def create_series_notifications(rows, horizon):
+    """
+    每个循环提醒在 (completed_through, horizon] 内的发生各写一条通知；
+    第一次处理（或 worker 停了很久）时最多补 SERIES_CATCH_UP_DAYS 天内的发生
+    """
+    notifications = []
+    progress = []
+    for row in rows:
+        days = occurrences(
+            row.recurrence_rule, row.due_date, horizon - timedelta(days=SERIES_CATCH_UP_DAYS), horizon,
+            row.recurrence_end, after=row.completed_through,
+        )
+        notifications.extend(notification_values(row, day) for day in days)
+        progress.append({
+            "id": row.id,
+            "completed_through": horizon,
+            "is_sent": next_occurrence(row.recurrence_rule, row.due_date, row.recurrence_end, after=horizon) is None,
+        })
+    if notifications:
+        insert_notifications(notifications)
+    db.session.execute(update(Reminder), progress)
+
+
+def commit_batch(rows, handle):
+    """在一个事务里处理一批行，失败时回滚并抛出 SQLAlchemyError"""
+    pet_ids = {row.pet_id for row in rows}
+    try:
+        handle(rows)
+        touch_pets(pet_ids)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+    response_cache.invalidate(*(pet_scope(pet_id) for pet_id in pet_ids))
+
+
+def commit_rows(rows, handle):
+    """逐行处理（一行一个事务），出错的行记录日志后跳过，返回成功处理的行数"""
+    processed = 0
+    for row in rows:
+        try:
+            commit_batch([row], handle)
+        except SQLAlchemyError:
+            logger.exception("Reminder worker skipped row %s", row.id)
+            continue
+        processed += 1
+    return processed
+
+
+def process_batches(statement, handle, batch_size):
+    """
+    反复取一批行交给 handle 处理并提交，直到取不满一批，返回处理的总行数
+    一批失败时改为逐行处理；一整批都失败（剩下的都是出错的行）时停止，下一轮再试
+    """
+    total = 0
+    while True:
+        rows = db.session.execute(statement).all()
+        if not rows:
+            return total
+        try:
+            commit_batch(rows, handle)
+            processed = len(rows)
+        except SQLAlchemyError:
+            logger.exception("Reminder worker batch failed, retrying %d row(s) one by one", len(rows))
+            processed = commit_rows(rows, handle)
+            if not processed:
+                return total
+        total += processed
+        if len(rows) < batch_size:
+            return total
+
+
+def run_once(today=None):
+    """执行一轮扫描，返回 (生成的疫苗提醒数, 处理的提醒数)；循环提醒一个系列计一次"""
+    config = current_app.config
+    today = today or datetime.now().date()
+    batch_size = config["REMINDER_WORKER_BATCH_SIZE"]
+    vaccine_reminders = process_batches(
+        vaccine_reminders_statement(today, config["VACCINE_REMINDER_DAYS"], batch_size),
+        create_vaccine_reminders, batch_size,
+    )
+    notifications = process_batches(
+        due_reminders_statement(today, config["REMINDER_LEAD_DAYS"], batch_size),
+        create_notifications, batch_size,
+    )
+    horizon = today + timedelta(days=config["REMINDER_LEAD_DAYS"])
+    notifications += process_batches(
+        due_series_statement(horizon, batch_size),
+        lambda rows: create_series_notifications(rows, horizon), batch_size,
+    )
+    return vaccine_reminders, notifications
+
+
+def run_forever(interval):
+    """每隔 interval 秒执行一轮；数据库暂时不可用时记录错误，下一轮重试"""
+    logger.info("Reminder worker started, interval %.0fs", interval)
+    while True:
+        started = time.monotonic()
+        try:
+            vaccine_reminders, notifications = run_once()
+            if vaccine_reminders or notifications:
+                logger.info("Created %d vaccine reminder(s), queued notifications for %d reminder(s)",
+                            vaccine_reminders, notifications)
+        except SQLAlchemyError:
+            logger.exception("Reminder worker run failed")
+        finally:
+            db.session.remove()
+        time.sleep(max(interval - (time.monotonic() - started), 0))
+
+
+def discard_vaccine_reminders(vaccine_log_id, unlink=False):
+    """
+    疫苗记录修改或删除时调用（由调用方提交）：删除它还未发送的自动提醒，下一轮扫描按新的到期日重新生成；
+    unlink 为真时（删除疫苗记录）已发送的提醒保留，只解除关联
+    """
+    db.session.execute(
+        delete(Reminder).where(Reminder.vaccine_log_id == vaccine_log_id, Reminder.is_sent == False),
+        execution_options={"synchronize_session": False},
+    )
+    if unlink:
+        db.session.execute(
+            update(Reminder).where(Reminder.vaccine_log_id == vaccine_log_id).values(vaccine_log_id=None),
+            execution_options={"synchronize_session": False},
+        )
+
+
+@click.command("reminder-worker")
+@click.option("--once", is_flag=True, help="只执行一轮扫描")
+@click.option("--interval", type=float, default=None, help="扫描间隔（秒），默认 REMINDER_WORKER_INTERVAL")
+@with_appcontext
+def reminder_worker_command(once, interval):
+    """把到期的疫苗和提醒写入通知队列"""
+    if once:
+        vaccine_reminders, notifications = run_once()
+        click.echo(
+            f"✅ Created {vaccine_reminders} vaccine reminder(s), queued notifications for {notifications} reminder(s)"
+        )
+        return
+    run_forever(interval or current_app.config["REMINDER_WORKER_INTERVAL"])
+
+
+if __name__ == "__main__":
+    from main import create_app
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    app = create_app()
+    with app.app_context():
+        run_forever(app.config["REMINDER_WORKER_INTERVAL"])
@@ -8,14 +8,16 @@ This package contains all the route blueprints for different features:
 """
 
 from .users import users_bp
-from .pets_backup import pets_bp
+from .pets import pets_bp
 from .diet_logs import diet_logs_bp
 from .weight_logs import weight_logs_bp
 from .vaccine_logs import vaccine_logs_bp
 from .reminders import reminders_bp
+from .metrics import metrics_bp
+from .notifications import notifications_bp
 
 # Export all blueprints for easy importing
-__all__ = ['users_bp', 'pets_bp', 'diet_logs_bp', 'weight_logs_bp', 'vaccine_logs_bp', 'reminders_bp']
+__all__ = ['users_bp', 'pets_bp', 'diet_logs_bp', 'weight_logs_bp', 'vaccine_logs_bp', 'reminders_bp', 'metrics_bp', 'notifications_bp']
 
 # Package version
 __version__ = '1.0.0' 
\ No newline at end of file
@@ -1,12 +1,66 @@
 from flask import Blueprint, request, jsonify
-from models import DietLog, Pet, User
+from models import DietLog, DietDailyRollup, Pet, User
 from config import db
+from pagination import get_page_args, paginate_logs, get_latest_args, latest_per_pet
+from bulk import read_bulk_items, bulk_create
+from cache import response_cache, pet_scope
+from serializers import diet_log_serializer
+from conditional import conditional, pet_version, touch_pet
+from diet_rollup import SUMMARY_GROUPS, apply_diet_logs, snapshot, summarize
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
 
 # 创建diet_logs Blueprint
 diet_logs_bp = Blueprint('diet_logs', __name__, url_prefix='/diet-logs')
 
+def parse_diet_log(data):
+    """
+    校验并解析一条饮食记录，返回 (字段字典, None) 或 (None, 错误信息)
+    单条创建和批量创建共用
+    """
+    # 验证必需字段
+    required_fields = ["pet_id", "date", "description"]
+    for field in required_fields:
+        if not data.get(field):
+            return None, f"{field} is required"
+    
+    try:
+        pet_id = int(data.get("pet_id"))
+    except (ValueError, TypeError):
+        return None, "pet_id must be an integer"
+    
+    # 解析日期
+    try:
+        date = datetime.strptime(data.get("date"), "%Y-%m-%d").date()
+    except (ValueError, TypeError):
+        return None, "date must be YYYY-MM-DD"
+    
+    food_amount = data.get("food_amount")
+    if food_amount is not None:
+        try:
+            food_amount = float(food_amount)
+        except (ValueError, TypeError):
+            return None, "food_amount must be a valid number"
+    
+    values = {
+        "pet_id": pet_id,
+        "date": date,
+        "description": data.get("description"),
+        "meal_type": data.get("meal_type"),
+        "food_amount": food_amount,
+        "unit": data.get("unit"),
+        "feeding_time": None
+    }
+    
+    # 解析喂食时间
+    if data.get("feeding_time"):
+        try:
+            values["feeding_time"] = datetime.strptime(data.get("feeding_time"), "%H:%M").time()
+        except (ValueError, TypeError):
+            return None, "feeding_time must be HH:MM"
+    
+    return values, None
+
 @diet_logs_bp.route("/", methods=["POST"])
 def create_diet_log():
     """
@@ -23,60 +77,69 @@ def create_diet_log():
     """
     data = request.get_json() or {}
     
-    # 验证必需字段
-    required_fields = ["pet_id", "date"]
-    for field in required_fields:
-        if not data.get(field):
-            return jsonify({"message": f"{field} is required"}), 400
+    values, error = parse_diet_log(data)
+    if error:
+        return jsonify({"message": error}), 400
     
     # 验证宠物是否存在
-    pet = Pet.query.get(data.get("pet_id"))
+    pet = Pet.query.get(values["pet_id"])
     if not pet:
         return jsonify({"message": "Pet not found"}), 404
     
-    # 解析日期
-    try:
-        date = datetime.strptime(data.get("date"), "%Y-%m-%d").date()
-    except ValueError:
-        return jsonify({"message": "date must be YYYY-MM-DD"}), 400
-    
-    # 解析喂食时间
-    feeding_time = None
-    if data.get("feeding_time"):
-        try:
-            feeding_time = datetime.strptime(data.get("feeding_time"), "%H:%M").time()
-        except ValueError:
-            return jsonify({"message": "feeding_time must be HH:MM"}), 400
-    
-    diet_log = DietLog(
-        pet_id=pet.id,
-        date=date,
-        description=data.get("description"),
-        meal_type=data.get("meal_type"),
-        food_amount=data.get("food_amount"),
-        unit=data.get("unit"),
-        feeding_time=feeding_time
-    )
+    diet_log = DietLog(**values)
     
     try:
         db.session.add(diet_log)
+        apply_diet_logs([values])
+        touch_pet(diet_log.pet_id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
     
+    response_cache.invalidate(pet_scope(diet_log.pet_id))
     return jsonify({"message": "Diet log created", "diet_log": diet_log.to_json()}), 201
 
+@diet_logs_bp.route("/bulk", methods=["POST"])
+def bulk_create_diet_logs():
+    """
+    POST /diet-logs/bulk
+    JSON body: [{"pet_id": 1, "date": "2024-01-15", "description": "狗粮", ...}, ...]
+    也接受 {"items": [...]} 或 NDJSON（Content-Type: application/x-ndjson）
+    合法记录在一个事务中插入，不合法的记录在 errors 中按序号返回
+    """
+    try:
+        items, errors = read_bulk_items(request)
+        rows, errors = bulk_create(DietLog, items, parse_diet_log, errors, before_commit=apply_diet_logs)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+    
+    response_cache.invalidate(*{pet_scope(row["pet_id"]) for row in rows})
+    
+    status = 201 if rows or not errors else 400
+    return jsonify({"created": len(rows), "errors": errors}), status
+
 @diet_logs_bp.route("/pet/<int:pet_id>", methods=["GET"])
+@conditional(pet_version)
+@response_cache.cached(lambda pet_id: [pet_scope(pet_id)])
 def get_pet_diet_logs(pet_id):
     """
     GET /diet-logs/pet/<pet_id>
-    optional query params: ?start_date=2024-01-01&end_date=2024-01-31&meal_type=早餐
+    optional query params: ?start_date=2024-01-01&end_date=2024-01-31&meal_type=早餐&limit=50&cursor=<next_cursor>
+    按日期倒序分页返回，响应中的 next_cursor 用于获取下一页
     """
     pet = Pet.query.get(pet_id)
     if not pet:
         return jsonify({"message": "Pet not found"}), 404
     
+    try:
+        cursor, limit = get_page_args(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    
     # 构建查询
     query = DietLog.query.filter_by(pet_id=pet_id)
     
@@ -102,11 +165,66 @@ def get_pet_diet_logs(pet_id):
     if meal_type:
         query = query.filter_by(meal_type=meal_type)
     
-    # 排序
-    query = query.order_by(DietLog.date.desc(), DietLog.feeding_time.desc())
+    # 按日期降序分页（同一天内按记录创建顺序倒序）
+    diet_logs, next_cursor = paginate_logs(diet_log_serializer.select(query), DietLog, cursor, limit)
+    return jsonify({
+        "diet_logs": diet_log_serializer.rows(diet_logs),
+        "next_cursor": next_cursor
+    }), 200
+
+@diet_logs_bp.route("/latest", methods=["GET"])
+def get_latest_diet_logs():
+    """
+    GET /diet-logs/latest?pet_ids=1,2,3&n=5
+    一次请求获取多只宠物各自最新的 n 条饮食记录（仪表盘用），n 默认5、最大50
+    """
+    try:
+        pet_ids, n = get_latest_args(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     
-    diet_logs = query.all()
-    return jsonify({"diet_logs": [log.to_json() for log in diet_logs]}), 200
+    latest = latest_per_pet(DietLog, pet_ids, n)
+    return jsonify({
+        "diet_logs": {str(pet_id): [log.to_json() for log in logs] for pet_id, logs in latest.items()}
+    }), 200
+
+@diet_logs_bp.route("/pet/<int:pet_id>/summary", methods=["GET"])
+@conditional(pet_version)
+def get_pet_diet_summary(pet_id):
+    """
+    GET /diet-logs/pet/<pet_id>/summary
+    optional query params: ?start_date=2024-01-01&end_date=2024-01-31&group=day|week|month
+    从每日汇总表读取进食总量（换算为克），每个周期附带各餐次明细
+    """
+    pet = Pet.query.get(pet_id)
+    if not pet:
+        return jsonify({"message": "Pet not found"}), 404
+    
+    group = request.args.get("group", "day")
+    if group not in SUMMARY_GROUPS:
+        return jsonify({"message": f"group must be one of: {', '.join(SUMMARY_GROUPS)}"}), 400
+    
+    query = DietDailyRollup.query.filter_by(pet_id=pet_id)
+    
+    # 日期范围过滤
+    start_date = request.args.get("start_date")
+    if start_date:
+        try:
+            start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+            query = query.filter(DietDailyRollup.date >= start_date)
+        except ValueError:
+            return jsonify({"message": "start_date must be YYYY-MM-DD"}), 400
+    
+    end_date = request.args.get("end_date")
+    if end_date:
+        try:
+            end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+            query = query.filter(DietDailyRollup.date <= end_date)
+        except ValueError:
+            return jsonify({"message": "end_date must be YYYY-MM-DD"}), 400
+    
+    rows = query.order_by(DietDailyRollup.date, DietDailyRollup.meal_type).all()
+    return jsonify({"group": group, "unit": "g", "summary": summarize(rows, group)}), 200
 
 @diet_logs_bp.route("/<int:log_id>", methods=["GET"])
 def get_diet_log(log_id):
@@ -130,6 +248,7 @@ def update_diet_log(log_id):
         return jsonify({"message": "Diet log not found"}), 404
     
     data = request.get_json() or {}
+    before = snapshot(diet_log)
     
     # 更新字段
     if "date" in data:
@@ -145,7 +264,13 @@ def update_diet_log(log_id):
         diet_log.meal_type = data.get("meal_type")
     
     if "food_amount" in data:
-        diet_log.food_amount = data.get("food_amount")
+        food_amount = data.get("food_amount")
+        if food_amount is not None:
+            try:
+                food_amount = float(food_amount)
+            except (ValueError, TypeError):
+                return jsonify({"message": "food_amount must be a valid number"}), 400
+        diet_log.food_amount = food_amount
     
     if "unit" in data:
         diet_log.unit = data.get("unit")
@@ -160,11 +285,17 @@ def update_diet_log(log_id):
             diet_log.feeding_time = None
     
     try:
+        after = snapshot(diet_log)
+        if after != before:
+            apply_diet_logs([before], sign=-1)
+            apply_diet_logs([after])
+        touch_pet(diet_log.pet_id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
     
+    response_cache.invalidate(pet_scope(diet_log.pet_id))
     return jsonify({"message": "Diet log updated", "diet_log": diet_log.to_json()}), 200
 
 @diet_logs_bp.route("/<int:log_id>", methods=["DELETE"])
@@ -176,11 +307,15 @@ def delete_diet_log(log_id):
     if not diet_log:
         return jsonify({"message": "Diet log not found"}), 404
     
+    pet_id = diet_log.pet_id
     try:
+        apply_diet_logs([snapshot(diet_log)], sign=-1)
         db.session.delete(diet_log)
+        touch_pet(pet_id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
     
+    response_cache.invalidate(pet_scope(pet_id))
     return jsonify({"message": "Diet log deleted"}), 200 
\ No newline at end of file
@@ -0,0 +1,42 @@
+from flask import Blueprint, Response, jsonify
+from cache import response_cache
+from instrumentation import instrumentation
+from trends import _trend_cache
+from routes.users import _email_to_user_id
+
+# 创建metrics Blueprint
+metrics_bp = Blueprint('metrics', __name__, url_prefix='/metrics')
+
+def cache_stats():
+    return {
+        "response_cache": response_cache.stats(),
+        "weight_trend_cache": _trend_cache.stats(),
+        "email_lookup_cache": _email_to_user_id.stats()
+    }
+
+def cache_counters():
+    counters = {}
+    for name, stats in cache_stats().items():
+        counters[(("cache", name), ("result", "hit"))] = stats["hits"]
+        counters[(("cache", name), ("result", "miss"))] = stats["misses"]
+    return counters
+
+instrumentation.add_counter("paw_cache_requests_total", "Cache lookups by cache and result", cache_counters)
+
+@metrics_bp.route("", methods=["GET"])
+def get_metrics():
+    """
+    GET /metrics
+    Prometheus 文本格式: 按 Blueprint 和方法统计的请求耗时、每个请求的 SQL 条数和 SQL 耗时直方图，
+    各状态码的响应数，以及各个缓存的命中/未命中次数
+    设置了 METRICS_MULTIPROC_DIR 时是所有 worker 进程的总数，否则只统计处理这个请求的进程（见 instrumentation.py）
+    """
+    return Response(instrumentation.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+@metrics_bp.route("/cache", methods=["GET"])
+def get_cache_metrics():
+    """
+    GET /metrics/cache
+    各个缓存的命中/未命中次数和当前条目数（计数按 worker 进程统计）
+    """
+    return jsonify(cache_stats()), 200
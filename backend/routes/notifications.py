@@ -0,0 +1,89 @@
+from flask import Blueprint, request, jsonify
+from models import Notification, Pet
+from config import db
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from serializers import notification_serializer
+from sqlalchemy import select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+# 创建notifications Blueprint
+# 通知由后台任务 reminder_worker.py 写入，接口只读取通知队列，不扫描提醒表
+notifications_bp = Blueprint('notifications', __name__, url_prefix='/notifications')
+
+def user_pet_ids(user_id):
+    return select(Pet.id).where(Pet.user_id == user_id).scalar_subquery()
+
+@notifications_bp.route("/", methods=["GET"])
+def list_notifications():
+    """
+    GET /notifications?user_id=1
+    optional query params: ?unread=1&before_id=120&limit=50
+    按 id 倒序（最新的在前）翻页，下一页把响应中的 next_before_id 作为 before_id 传入
+    """
+    user_id = request.args.get("user_id", type=int)
+    if not user_id:
+        return jsonify({"message": "user_id is required"}), 400
+
+    before_id = request.args.get("before_id", type=int)
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    if limit <= 0:
+        return jsonify({"message": "limit must be a positive integer"}), 400
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    query = Notification.query.filter(Notification.pet_id.in_(user_pet_ids(user_id)))
+    if request.args.get("unread") == "1":
+        query = query.filter(Notification.is_read == False)
+    if before_id:
+        query = query.filter(Notification.id < before_id)
+
+    # 多取一条用来判断是否还有下一页
+    notifications = notification_serializer.all(query.order_by(Notification.id.desc()).limit(limit + 1))
+    next_before_id = None
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        next_before_id = notifications[-1]["id"]
+
+    return jsonify({"notifications": notifications, "next_before_id": next_before_id}), 200
+
+@notifications_bp.route("/<int:notification_id>/read", methods=["PATCH"])
+def mark_notification_read(notification_id):
+    """
+    PATCH /notifications/<notification_id>/read
+    """
+    notification = Notification.query.get(notification_id)
+    if not notification:
+        return jsonify({"message": "Notification not found"}), 404
+
+    notification.is_read = True
+
+    try:
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+
+    return jsonify({"message": "Notification marked as read", "notification": notification.to_json()}), 200
+
+@notifications_bp.route("/read-all", methods=["PATCH"])
+def mark_all_notifications_read():
+    """
+    PATCH /notifications/read-all?user_id=1
+    把该用户的全部未读通知标记为已读
+    """
+    user_id = request.args.get("user_id", type=int)
+    if not user_id:
+        return jsonify({"message": "user_id is required"}), 400
+
+    try:
+        updated = db.session.execute(
+            update(Notification)
+            .where(Notification.pet_id.in_(user_pet_ids(user_id)), Notification.is_read == False)
+            .values(is_read=True),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+
+    return jsonify({"message": "Notifications marked as read", "updated": updated}), 200
@@ -1,8 +1,15 @@
 from flask import Blueprint, request, jsonify
-from models import Pet, User, WeightLog, DietLog, VaccineLog
+from models import Pet, User, WeightLog, DietLog, VaccineLog, Reminder
 from config import db
+from cache import response_cache, pet_scope, user_scope, ALL_PETS_SCOPE
+from conditional import conditional, pet_version, dated_pet_version, user_pets_version, touch_pet, touch_user_pets
+from serializers import (
+    pet_serializer, diet_log_serializer, weight_log_serializer, vaccine_log_serializer, reminder_serializer
+)
+from pagination import get_page_args, get_page_number_args, paginate_logs, DEFAULT_LATEST_COUNT, MAX_LATEST_COUNT
+from sqlalchemy import func
 from sqlalchemy.exc import SQLAlchemyError
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # 创建pets Blueprint
 pets_bp = Blueprint('pets', __name__, url_prefix='/pets')
@@ -52,28 +59,87 @@ def create_pet():
 
     try:
         db.session.add(pet)
+        touch_user_pets(owner.id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
 
+    response_cache.invalidate(user_scope(pet.user_id), ALL_PETS_SCOPE)
     return jsonify({"message": "Pet created", "pet": pet.to_json()}), 201
 
+def list_pets_scopes():
+    user_id = request.args.get("user_id", type=int)
+    return [user_scope(user_id)] if user_id else [ALL_PETS_SCOPE]
+
+def list_pets_version():
+    # 不带 user_id 的全量列表没有版本号，由 after_request 按内容哈希生成 ETag
+    user_id = request.args.get("user_id", type=int)
+    return user_pets_version(user_id) if user_id else None
+
+# 宠物列表允许的排序字段，同名时按 id 排序保证翻页稳定
+PET_SORT_COLUMNS = {"id": Pet.id, "name": Pet.name, "birth_date": Pet.birth_date}
+
+def filter_pets(query, user_id=None, species=None, breed=None, name_prefix=None):
+    """宠物列表的过滤条件（Query 和 select() 都适用）；name_prefix 按名字前缀匹配，不区分大小写"""
+    if user_id:
+        query = query.filter(Pet.user_id == user_id)
+    if species:
+        query = query.filter(Pet.species == species)
+    if breed:
+        query = query.filter(Pet.breed == breed)
+    if name_prefix:
+        query = query.filter(func.lower(Pet.name).startswith(name_prefix.lower(), autoescape=True))
+    return query
+
+def order_pets(query, sort="id", descending=False):
+    column = PET_SORT_COLUMNS[sort]
+    if descending:
+        return query.order_by(column.desc(), Pet.id.desc())
+    return query.order_by(column, Pet.id)
+
 @pets_bp.route("/", methods=["GET"])
+@conditional(list_pets_version)
+@response_cache.cached(list_pets_scopes)
 def list_pets():
     """
     GET /pets
-    optional query param: ?user_id=1  (如果不传则返回所有宠物，开发阶段使用；上线建议强制过滤为当前登录用户)
+    optional query params: ?user_id=1&species=Dog&breed=Corgi&name_prefix=Bo&sort=name&order=asc&page=1&per_page=50
+    (如果不传 user_id 则返回所有宠物，开发阶段使用；上线建议强制过滤为当前登录用户)
+    排序字段: id（默认）, name, birth_date；按 (user_id, name) 和 (species, breed) 索引查询
     """
-    user_id = request.args.get("user_id", type=int)
-    if user_id:
-        pets = Pet.query.filter_by(user_id=user_id).all()
+    try:
+        page, per_page = get_page_number_args(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    sort = request.args.get("sort", "id")
+    if sort not in PET_SORT_COLUMNS:
+        return jsonify({"message": f"sort must be one of {', '.join(PET_SORT_COLUMNS)}"}), 400
+    order = request.args.get("order", "asc")
+    if order not in ("asc", "desc"):
+        return jsonify({"message": "order must be asc or desc"}), 400
+
+    query = filter_pets(
+        Pet.query,
+        user_id=request.args.get("user_id", type=int),
+        species=request.args.get("species"),
+        breed=request.args.get("breed"),
+        name_prefix=request.args.get("name_prefix"),
+    )
+    pets = pet_serializer.all(order_pets(query, sort, order == "desc").offset((page - 1) * per_page).limit(per_page))
+
+    # 第一页没有取满时就是全部结果，不需要再执行 COUNT
+    if page == 1 and len(pets) < per_page:
+        total = len(pets)
     else:
-        pets = Pet.query.all()
+        total = query.order_by(None).count()
 
-    return jsonify({"pets": [p.to_json() for p in pets]}), 200
+    return jsonify({"pets": pets, "page": page, "per_page": per_page, "total": total}), 200
 
 @pets_bp.route("/<int:pet_id>", methods=["GET"])
+@conditional(pet_version)
+@response_cache.cached(lambda pet_id: [pet_scope(pet_id)])
 def get_pet(pet_id):
     """
     GET /pets/<pet_id>
@@ -84,11 +150,12 @@ def get_pet(pet_id):
 
     return jsonify({"pet": pet.to_json()}), 200
 
-@pets_bp.route("/<int:pet_id>", methods=["PUT"])
+@pets_bp.route("/<int:pet_id>", methods=["PUT", "PATCH"])
 def update_pet(pet_id):
     """
-    PUT /pets/<pet_id>
+    PUT /pets/<pet_id>  (PATCH 同样可用)
     JSON body: { "name": "New Name", "species": "Cat", "breed": "Persian", "birth_date": "2020-05-01" }
+    optional JSON body or query param user_id 用于权限校验
     """
     pet = Pet.query.get(pet_id)
     if not pet:
@@ -96,6 +163,14 @@ def update_pet(pet_id):
 
     data = request.get_json() or {}
 
+    # 权限检查（没有认证时的临时做法，与删除宠物相同）
+    requester_id = request.args.get("user_id", type=int)
+    if requester_id is None:
+        requester_id = data.get("user_id")
+
+    if requester_id is not None and requester_id != pet.user_id:
+        return jsonify({"message": "Permission denied"}), 403
+
     if "name" in data:
         pet.name = data.get("name")
     if "species" in data:
@@ -119,11 +194,14 @@ def update_pet(pet_id):
         pet.notes = data.get("notes")
 
     try:
+        touch_pet(pet.id)
+        touch_user_pets(pet.user_id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
 
+    response_cache.invalidate(pet_scope(pet.id), user_scope(pet.user_id), ALL_PETS_SCOPE)
     return jsonify({"message": "Pet updated", "pet": pet.to_json()}), 200
 
 @pets_bp.route("/<int:pet_id>", methods=["DELETE"])
@@ -148,48 +226,133 @@ def delete_pet(pet_id):
     if requester_id is not None and requester_id != pet.user_id:
         return jsonify({"message": "Permission denied"}), 403
 
+    owner_id = pet.user_id
     try:
         db.session.delete(pet)
+        touch_user_pets(owner_id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
 
+    response_cache.invalidate(pet_scope(pet_id), user_scope(owner_id), ALL_PETS_SCOPE)
     return jsonify({"message": "Pet deleted"}), 200
 
 # 添加获取宠物日志的路由
 @pets_bp.route("/<int:pet_id>/weight_logs", methods=["GET"])
+@conditional(pet_version)
+@response_cache.cached(lambda pet_id: [pet_scope(pet_id)])
 def get_pet_weight_logs(pet_id):
     """
     GET /pets/<pet_id>/weight_logs
+    optional query params: ?limit=50&cursor=<next_cursor>
     """
     pet = Pet.query.get(pet_id)
     if not pet:
         return jsonify({"message": "Pet not found"}), 404
     
-    weight_logs = WeightLog.query.filter_by(pet_id=pet_id).order_by(WeightLog.date.desc()).all()
-    return jsonify({"weight_logs": [log.to_json() for log in weight_logs]}), 200
+    try:
+        cursor, limit = get_page_args(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    
+    query = weight_log_serializer.select(WeightLog.query.filter_by(pet_id=pet_id))
+    weight_logs, next_cursor = paginate_logs(query, WeightLog, cursor, limit)
+    return jsonify({
+        "weight_logs": weight_log_serializer.rows(weight_logs),
+        "next_cursor": next_cursor
+    }), 200
 
 @pets_bp.route("/<int:pet_id>/diet_logs", methods=["GET"])
+@conditional(pet_version)
+@response_cache.cached(lambda pet_id: [pet_scope(pet_id)])
 def get_pet_diet_logs(pet_id):
     """
     GET /pets/<pet_id>/diet_logs
+    optional query params: ?limit=50&cursor=<next_cursor>
     """
     pet = Pet.query.get(pet_id)
     if not pet:
         return jsonify({"message": "Pet not found"}), 404
     
-    diet_logs = DietLog.query.filter_by(pet_id=pet_id).order_by(DietLog.date.desc()).all()
-    return jsonify({"diet_logs": [log.to_json() for log in diet_logs]}), 200
+    try:
+        cursor, limit = get_page_args(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    
+    query = diet_log_serializer.select(DietLog.query.filter_by(pet_id=pet_id))
+    diet_logs, next_cursor = paginate_logs(query, DietLog, cursor, limit)
+    return jsonify({
+        "diet_logs": diet_log_serializer.rows(diet_logs),
+        "next_cursor": next_cursor
+    }), 200
 
 @pets_bp.route("/<int:pet_id>/vaccine_logs", methods=["GET"])
+@conditional(pet_version)
+@response_cache.cached(lambda pet_id: [pet_scope(pet_id)])
 def get_pet_vaccine_logs(pet_id):
     """
     GET /pets/<pet_id>/vaccine_logs
+    optional query params: ?limit=50&cursor=<next_cursor>
     """
     pet = Pet.query.get(pet_id)
     if not pet:
         return jsonify({"message": "Pet not found"}), 404
     
-    vaccine_logs = VaccineLog.query.filter_by(pet_id=pet_id).order_by(VaccineLog.date.desc()).all()
-    return jsonify({"vaccine_logs": [log.to_json() for log in vaccine_logs]}), 200
+    try:
+        cursor, limit = get_page_args(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    
+    query = vaccine_log_serializer.select(VaccineLog.query.filter_by(pet_id=pet_id))
+    vaccine_logs, next_cursor = paginate_logs(query, VaccineLog, cursor, limit)
+    return jsonify({
+        "vaccine_logs": vaccine_log_serializer.rows(vaccine_logs),
+        "next_cursor": next_cursor
+    }), 200
+
+@pets_bp.route("/<int:pet_id>/profile", methods=["GET"])
+@conditional(dated_pet_version)
+@response_cache.cached(lambda pet_id: [pet_scope(pet_id)])
+def get_pet_profile(pet_id):
+    """
+    GET /pets/<pet_id>/profile?n=5
+    宠物详情页一次性获取：宠物信息、各类记录最新的 n 条、30天内到期的疫苗、未完成的提醒
+    共 6 条 SQL，宠物只查询一次
+    """
+    n = request.args.get("n", DEFAULT_LATEST_COUNT, type=int)
+    if n <= 0:
+        return jsonify({"message": "n must be positive"}), 400
+    n = min(n, MAX_LATEST_COUNT)
+
+    pet = db.session.get(Pet, pet_id)
+    if not pet:
+        return jsonify({"message": "Pet not found"}), 404
+
+    def latest(serializer):
+        model = serializer.model
+        return serializer.all(
+            model.query.filter_by(pet_id=pet_id).order_by(model.date.desc(), model.id.desc()).limit(n)
+        )
+
+    today = datetime.now().date()
+    upcoming_vaccines = vaccine_log_serializer.all(VaccineLog.query.filter(
+        VaccineLog.pet_id == pet_id,
+        VaccineLog.next_due_date >= today,
+        VaccineLog.next_due_date <= today + timedelta(days=30),
+        VaccineLog.reminder_enabled == True
+    ).order_by(VaccineLog.next_due_date))
+
+    open_reminders = reminder_serializer.all(Reminder.query.filter(
+        Reminder.pet_id == pet_id,
+        Reminder.is_sent == False
+    ).order_by(Reminder.due_date, Reminder.id).limit(n))
+
+    return jsonify({
+        "pet": pet.to_json(),
+        "weight_logs": latest(weight_log_serializer),
+        "diet_logs": latest(diet_log_serializer),
+        "vaccine_logs": latest(vaccine_log_serializer),
+        "upcoming_vaccines": upcoming_vaccines,
+        "open_reminders": open_reminders
+    }), 200
@@ -1,12 +1,123 @@
 from flask import Blueprint, request, jsonify
-from models import Reminder, Pet
+from models import Reminder, Pet, Notification
 from config import db
+from pagination import (
+    MAX_LATEST_PETS, get_page_args, paginate_ascending, encode_key, get_latest_args, latest_ids_statement, latest_per_pet
+)
+from bulk import read_bulk_items, bulk_create
+from cache import response_cache, pet_scope
+from serializers import reminder_serializer
+from recurrence import (
+    parse_recurrence, separate_recurrence_end, next_occurrence, recurring_in_window, expand_reminders
+)
+from conditional import conditional, dated_pet_version, touch_pet
+from sqlalchemy import and_, or_, select
 from sqlalchemy.exc import SQLAlchemyError
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 # 创建reminders Blueprint
 reminders_bp = Blueprint('reminders', __name__, url_prefix='/reminders')
 
+VALID_REMINDER_TYPES = ["vaccine", "weight", "diet", "general"]
+
+# /reminders/due-soon 的默认天数和两个视图 days 参数的上限
+DEFAULT_DUE_SOON_DAYS = 7
+MAX_WINDOW_DAYS = 365
+
+def parse_reminder(data):
+    """
+    校验并解析一条提醒，返回 (字段字典, None) 或 (None, 错误信息)
+    单条创建和批量创建共用
+    """
+    # 验证必需字段
+    required_fields = ["pet_id", "reminder_type", "due_date", "message"]
+    for field in required_fields:
+        if not data.get(field):
+            return None, f"{field} is required"
+    
+    try:
+        pet_id = int(data.get("pet_id"))
+    except (ValueError, TypeError):
+        return None, "pet_id must be an integer"
+    
+    # 验证提醒类型
+    if data.get("reminder_type") not in VALID_REMINDER_TYPES:
+        return None, f"reminder_type must be one of: {', '.join(VALID_REMINDER_TYPES)}"
+    
+    # 解析到期日期
+    try:
+        due_date = datetime.strptime(data.get("due_date"), "%Y-%m-%d").date()
+    except (ValueError, TypeError):
+        return None, "due_date must be YYYY-MM-DD"
+    
+    recurrence, error = parse_recurrence_fields(data, due_date)
+    if error:
+        return None, error
+    
+    return {
+        "pet_id": pet_id,
+        "reminder_type": data.get("reminder_type"),
+        "due_date": due_date,
+        "message": data.get("message"),
+        "is_sent": False,
+        "recurrence_rule": recurrence[0],
+        "recurrence_end": recurrence[1]
+    }, None
+
+def parse_recurrence_fields(data, due_date):
+    """
+    解析循环提醒的 recurrence_rule（RRULE，例如 FREQ=MONTHLY）和可选的 recurrence_end，见 recurrence.py
+    返回 ((规则, 结束日期), None) 或 (None, 错误信息)；没有规则时返回 ((None, None), None)
+    """
+    recurrence_end = data.get("recurrence_end")
+    if recurrence_end and not isinstance(recurrence_end, date):
+        try:
+            recurrence_end = datetime.strptime(recurrence_end, "%Y-%m-%d").date()
+        except (ValueError, TypeError):
+            return None, "recurrence_end must be YYYY-MM-DD"
+    
+    if not data.get("recurrence_rule"):
+        if recurrence_end:
+            return None, "recurrence_end requires recurrence_rule"
+        return (None, None), None
+    
+    try:
+        return parse_recurrence(data.get("recurrence_rule"), due_date, recurrence_end or None), None
+    except ValueError as e:
+        return None, str(e)
+
+def get_window_args(args):
+    """
+    读取 ?start_date=2024-01-01&end_date=2024-03-31，返回 (start, end)，没有传入时返回 None
+    循环提醒只在这个窗口内展开，窗口最长 MAX_WINDOW_DAYS 天；参数不合法时抛出 ValueError
+    """
+    start_date = args.get("start_date")
+    end_date = args.get("end_date")
+    if not start_date and not end_date:
+        return None
+    if not (start_date and end_date):
+        raise ValueError("start_date and end_date must be given together")
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError("start_date and end_date must be YYYY-MM-DD")
+    if not 0 <= (end - start).days <= MAX_WINDOW_DAYS:
+        raise ValueError(f"end_date must be within {MAX_WINDOW_DAYS} days after start_date")
+    return start, end
+
+def merge_page(singles, single_cursor, occurrences, limit):
+    """
+    合并一页单次提醒（已按 (due_date, id) 分页）和展开的循环提醒，返回 (items, next_cursor)
+    single_cursor 不为空表示还有更多单次提醒
+    """
+    items = sorted(singles + occurrences, key=lambda item: (item["due_date"], item["id"]))
+    if len(items) <= limit and single_cursor is None:
+        return items, None
+    items = items[:limit]
+    last = items[-1]
+    return items, encode_key(date.fromisoformat(last["due_date"]), last["id"])
+
 @reminders_bp.route("/", methods=["POST"])
 def create_reminder():
     """
@@ -20,51 +131,64 @@ def create_reminder():
     """
     data = request.get_json() or {}
     
-    # 验证必需字段
-    required_fields = ["pet_id", "reminder_type", "due_date", "message"]
-    for field in required_fields:
-        if not data.get(field):
-            return jsonify({"message": f"{field} is required"}), 400
+    values, error = parse_reminder(data)
+    if error:
+        return jsonify({"message": error}), 400
     
     # 验证宠物是否存在
-    pet = Pet.query.get(data.get("pet_id"))
+    pet = Pet.query.get(values["pet_id"])
     if not pet:
         return jsonify({"message": "Pet not found"}), 404
     
-    # 验证提醒类型
-    valid_types = ["vaccine", "weight", "diet", "general"]
-    if data.get("reminder_type") not in valid_types:
-        return jsonify({"message": f"reminder_type must be one of: {', '.join(valid_types)}"}), 400
-    
-    # 解析到期日期
-    try:
-        due_date = datetime.strptime(data.get("due_date"), "%Y-%m-%d").date()
-    except ValueError:
-        return jsonify({"message": "due_date must be YYYY-MM-DD"}), 400
-    
-    reminder = Reminder(
-        pet_id=pet.id,
-        reminder_type=data.get("reminder_type"),
-        due_date=due_date,
-        message=data.get("message"),
-        is_sent=False
-    )
+    reminder = Reminder(**values)
     
     try:
         db.session.add(reminder)
+        touch_pet(reminder.pet_id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
     
+    response_cache.invalidate(pet_scope(reminder.pet_id))
     return jsonify({"message": "Reminder created", "reminder": reminder.to_json()}), 201
 
+@reminders_bp.route("/bulk", methods=["POST"])
+def bulk_create_reminders():
+    """
+    POST /reminders/bulk
+    JSON body: [{"pet_id": 1, "reminder_type": "vaccine", "due_date": "2024-02-15", "message": "..."}, ...]
+    也接受 {"items": [...]} 或 NDJSON（Content-Type: application/x-ndjson）
+    合法记录在一个事务中插入，不合法的记录在 errors 中按序号返回
+    """
+    try:
+        items, errors = read_bulk_items(request)
+        rows, errors = bulk_create(Reminder, items, parse_reminder, errors)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+    
+    response_cache.invalidate(*{pet_scope(row["pet_id"]) for row in rows})
+    
+    status = 201 if rows or not errors else 400
+    return jsonify({"created": len(rows), "errors": errors}), status
+
 @reminders_bp.route("/pet/<int:pet_id>", methods=["GET"])
+@conditional(dated_pet_version)
 def get_pet_reminders(pet_id):
     """
     GET /reminders/pet/<pet_id>
-    optional query params: ?reminder_type=vaccine&status=active&limit=10
+    optional query params: ?reminder_type=vaccine&status=active&limit=10&start_date=2024-01-01&end_date=2024-03-31
+    传入 start_date/end_date 时只返回窗口内的提醒，循环提醒展开为窗口内的每次发生；
+    不传时循环提醒按规则本身返回一条（due_date 为第一次发生的日期）
     """
+    try:
+        window = get_window_args(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    
     pet = Pet.query.get(pet_id)
     if not pet:
         return jsonify({"message": "Pet not found"}), 404
@@ -77,6 +201,16 @@ def get_pet_reminders(pet_id):
     if reminder_type:
         query = query.filter_by(reminder_type=reminder_type)
     
+    # 循环提醒在状态过滤之前取出，展开后按每次发生的日期和发送状态过滤
+    series = []
+    if window:
+        series = reminder_serializer.select(query.filter(*recurring_in_window(*window))).all()
+        query = query.filter(
+            Reminder.recurrence_rule.is_(None),
+            Reminder.due_date >= window[0],
+            Reminder.due_date <= window[1]
+        )
+    
     # 状态过滤
     status = request.args.get("status")
     if status == "active":
@@ -88,46 +222,156 @@ def get_pet_reminders(pet_id):
     elif status == "pending":
         query = query.filter_by(is_sent=False)
     
+    # 排序（按到期日期升序），必须在 limit 之前
+    query = query.order_by(Reminder.due_date, Reminder.id)
+    
     # 限制返回数量
     limit = request.args.get("limit", type=int)
     if limit:
         query = query.limit(limit)
     
-    # 排序（按到期日期升序）
-    query = query.order_by(Reminder.due_date)
+    reminders = reminder_serializer.all(query)
+    if series:
+        today = datetime.now().date().isoformat()
+        matches = {
+            "active": lambda item: item["due_date"] >= today,
+            "overdue": lambda item: item["due_date"] < today,
+            "sent": lambda item: item["is_sent"],
+            "pending": lambda item: not item["is_sent"],
+        }.get(status, lambda item: True)
+        occurrences = [item for item in expand_reminders(series, *window) if matches(item)]
+        reminders = sorted(reminders + occurrences, key=lambda item: (item["due_date"], item["id"]))[:limit or None]
     
-    reminders = query.all()
-    return jsonify({"reminders": [reminder.to_json() for reminder in reminders]}), 200
+    return jsonify({"reminders": reminders}), 200
+
+@reminders_bp.route("/upcoming", methods=["GET"])
+def get_upcoming_reminders():
+    """
+    GET /reminders/upcoming?pet_ids=1,2,3&n=5
+    一次请求获取多只宠物各自最近要到期、还没有发送和完成的 n 条提醒（仪表盘用），n 默认5、最大50
+    """
+    try:
+        pet_ids, n = get_latest_args(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    
+    upcoming = latest_per_pet(
+        Reminder, pet_ids, n,
+        order_by=(Reminder.due_date, Reminder.id),
+        filters=(
+            Reminder.is_sent == False,
+            Reminder.is_completed == False,
+            Reminder.due_date >= datetime.now().date(),
+        )
+    )
+    return jsonify({
+        "reminders": {str(pet_id): [reminder.to_json() for reminder in reminders] for pet_id, reminders in upcoming.items()}
+    }), 200
+
+def get_reminder_view_args(args, default_days):
+    """
+    读取过期/即将到期提醒的参数: ?user_id=1&days=7&cursor=...&limit=50&counts_only=1
+    返回 (user_id, days, cursor, limit, counts_only)，days 为 None 表示不限；参数不合法时抛出 ValueError
+    """
+    user_id = args.get("user_id", type=int)
+    if not user_id:
+        raise ValueError("user_id is required")
+
+    days = args.get("days", default_days)
+    if days is not None:
+        try:
+            days = int(days)
+        except (TypeError, ValueError):
+            raise ValueError("days must be an integer")
+        if not 0 < days <= MAX_WINDOW_DAYS:
+            raise ValueError(f"days must be between 1 and {MAX_WINDOW_DAYS}")
+
+    cursor, limit = get_page_args(args)
+    return user_id, days, cursor, limit, args.get("counts_only") == "1"
+
+def user_reminders(key, user_id, window_start, window_end, cursor, limit, counts_only):
+    """
+    该用户所有宠物中未发送、在 [window_start, window_end] 内到期的提醒，按 (due_date, id) 升序游标分页
+    window_start 为 None 表示不限（只用于单次提醒，循环提醒最多往前展开 MAX_WINDOW_DAYS 天）
+
+    用 pet_id IN (该用户的宠物) 关联 Pet：每只宠物走 (pet_id, is_sent, due_date) 索引的范围查询；
+    写成 JOIN 时 SQLite 可能改用全局的 (is_sent, due_date) 索引扫描所有用户的提醒。
+    取一页单次提醒时还带 ORDER BY due_date，SQLite 同样会为了省掉排序改用全局索引，
+    所以宠物不多时每只宠物各自按索引取 limit + 1 条再合并排序（与 latest_ids_statement() 相同的 UNION ALL）
+    """
+    user_pets = select(Pet.id).where(Pet.user_id == user_id)
+    query = Reminder.query.filter(Reminder.pet_id.in_(user_pets), Reminder.is_sent == False)
+    single_filters = [Reminder.is_sent == False, Reminder.recurrence_rule.is_(None), Reminder.due_date <= window_end]
+    if window_start is not None:
+        single_filters.append(Reminder.due_date >= window_start)
+    singles = Reminder.query.filter(Reminder.pet_id.in_(user_pets), *single_filters)
+
+    # 循环提醒逐条展开窗口内尚未发送的发生日期
+    series_start = window_start or window_end - timedelta(days=MAX_WINDOW_DAYS)
+    series = reminder_serializer.select(query.filter(*recurring_in_window(series_start, window_end))).all()
+    occurrences = expand_reminders(series, series_start, window_end, unsent_only=True)
+
+    # 数量是整个窗口的总数，忽略游标
+    if counts_only:
+        return jsonify({"count": singles.count() + len(occurrences)}), 200
+
+    if cursor is not None:
+        after = (cursor[0].isoformat(), cursor[1])
+        occurrences = [item for item in occurrences if (item["due_date"], item["id"]) > after]
+
+    page = singles
+    pet_ids = db.session.scalars(user_pets).all()
+    if 0 < len(pet_ids) <= MAX_LATEST_PETS:
+        if cursor is not None:
+            # 不用 (due_date, id) > (...) 的行值比较: SQLite 对它估算的代价不稳定，有时会改走全局的 (is_sent, due_date) 索引
+            due_date, last_id = cursor
+            single_filters.append(or_(
+                Reminder.due_date > due_date, and_(Reminder.due_date == due_date, Reminder.id > last_id)
+            ))
+        per_pet = latest_ids_statement(
+            Reminder, pet_ids, limit + 1, order_by=(Reminder.due_date, Reminder.id), filters=single_filters
+        )
+        page = Reminder.query.filter(Reminder.id.in_(per_pet))
+    rows, single_cursor = paginate_ascending(
+        reminder_serializer.select(page), Reminder.due_date, Reminder.id, cursor, limit
+    )
+    items, next_cursor = merge_page(reminder_serializer.rows(rows), single_cursor, occurrences, limit)
+    return jsonify({key: items, "next_cursor": next_cursor}), 200
 
 @reminders_bp.route("/overdue", methods=["GET"])
 def get_overdue_reminders():
     """
-    GET /reminders/overdue
-    获取所有过期的提醒
+    GET /reminders/overdue?user_id=1
+    optional query params: ?days=30&cursor=...&limit=50&counts_only=1
+    该用户未发送的过期提醒，days 只返回过期不超过 days 天的；counts_only=1 只返回总数（忽略 cursor）
     """
-    overdue_reminders = Reminder.query.filter(
-        Reminder.due_date < datetime.now().date(),
-        Reminder.is_sent == False
-    ).order_by(Reminder.due_date).all()
-    
-    return jsonify({"overdue_reminders": [reminder.to_json() for reminder in overdue_reminders]}), 200
+    try:
+        user_id, days, cursor, limit, counts_only = get_reminder_view_args(request.args, None)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    today = datetime.now().date()
+    window_start = today - timedelta(days=days) if days is not None else None
+    return user_reminders(
+        "overdue_reminders", user_id, window_start, today - timedelta(days=1), cursor, limit, counts_only
+    )
 
 @reminders_bp.route("/due-soon", methods=["GET"])
 def get_due_soon_reminders():
     """
-    GET /reminders/due-soon
-    获取7天内到期的提醒
+    GET /reminders/due-soon?user_id=1
+    optional query params: ?days=7&cursor=...&limit=50&counts_only=1
+    该用户未发送、今天起 days 天内（默认7天）到期的提醒；counts_only=1 只返回总数（忽略 cursor）
     """
+    try:
+        user_id, days, cursor, limit, counts_only = get_reminder_view_args(request.args, DEFAULT_DUE_SOON_DAYS)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
     today = datetime.now().date()
-    seven_days_later = today + timedelta(days=7)
-    
-    due_soon_reminders = Reminder.query.filter(
-        Reminder.due_date >= today,
-        Reminder.due_date <= seven_days_later,
-        Reminder.is_sent == False
-    ).order_by(Reminder.due_date).all()
-    
-    return jsonify({"due_soon_reminders": [reminder.to_json() for reminder in due_soon_reminders]}), 200
+    return user_reminders(
+        "due_soon_reminders", user_id, today, today + timedelta(days=days), cursor, limit, counts_only
+    )
 
 @reminders_bp.route("/<int:reminder_id>", methods=["GET"])
 def get_reminder(reminder_id):
@@ -144,19 +388,20 @@ def get_reminder(reminder_id):
 def update_reminder(reminder_id):
     """
     PUT /reminders/<reminder_id>
-    JSON body: 可包含 reminder_type, due_date, message, is_sent
+    JSON body: 可包含 reminder_type, due_date, message, is_sent, recurrence_rule, recurrence_end
     """
     reminder = Reminder.query.get(reminder_id)
     if not reminder:
         return jsonify({"message": "Reminder not found"}), 404
     
     data = request.get_json() or {}
+    # 修改前单独设置的结束日期（不是规则推算出的），没有传入 recurrence_end 时沿用
+    recurrence_end = separate_recurrence_end(reminder.recurrence_rule, reminder.due_date, reminder.recurrence_end)
     
     # 更新字段
     if "reminder_type" in data:
-        valid_types = ["vaccine", "weight", "diet", "general"]
-        if data.get("reminder_type") not in valid_types:
-            return jsonify({"message": f"reminder_type must be one of: {', '.join(valid_types)}"}), 400
+        if data.get("reminder_type") not in VALID_REMINDER_TYPES:
+            return jsonify({"message": f"reminder_type must be one of: {', '.join(VALID_REMINDER_TYPES)}"}), 400
         reminder.reminder_type = data.get("reminder_type")
     
     if "due_date" in data:
@@ -165,6 +410,29 @@ def update_reminder(reminder_id):
         except ValueError:
             return jsonify({"message": "due_date must be YYYY-MM-DD"}), 400
     
+    # 规则、结束日期或第一次发生的日期变化时重新校验并按规则重新计算结束日期
+    if {"recurrence_rule", "recurrence_end", "due_date"} & data.keys():
+        rule = data.get("recurrence_rule", reminder.recurrence_rule)
+        recurrence, error = parse_recurrence_fields({
+            "recurrence_rule": rule,
+            "recurrence_end": data["recurrence_end"] if "recurrence_end" in data else (recurrence_end if rule else None)
+        }, reminder.due_date)
+        if error:
+            return jsonify({"message": error}), 400
+        reminder.recurrence_rule, reminder.recurrence_end = recurrence
+        
+        # completed_through 限制在新系列的范围内，是否已发送按剩余的发生重新计算
+        completed_through = reminder.completed_through
+        if not reminder.recurrence_rule or (completed_through and completed_through < reminder.due_date):
+            completed_through = None
+        elif completed_through and reminder.recurrence_end and completed_through > reminder.recurrence_end:
+            completed_through = reminder.recurrence_end
+        reminder.completed_through = completed_through
+        if reminder.recurrence_rule:
+            reminder.is_sent = completed_through is not None and next_occurrence(
+                reminder.recurrence_rule, reminder.due_date, reminder.recurrence_end, after=completed_through
+            ) is None
+    
     if "message" in data:
         reminder.message = data.get("message")
     
@@ -172,31 +440,42 @@ def update_reminder(reminder_id):
         reminder.is_sent = bool(data.get("is_sent"))
     
     try:
+        touch_pet(reminder.pet_id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
     
+    response_cache.invalidate(pet_scope(reminder.pet_id))
     return jsonify({"message": "Reminder updated", "reminder": reminder.to_json()}), 200
 
 @reminders_bp.route("/<int:reminder_id>/mark-sent", methods=["PATCH"])
 def mark_reminder_sent(reminder_id):
     """
     PATCH /reminders/<reminder_id>/mark-sent
-    标记提醒为已发送
+    标记提醒为已发送；循环提醒只标记下一次未发送的发生（推进 completed_through），最后一次发送后整个系列标记为已发送
     """
     reminder = Reminder.query.get(reminder_id)
     if not reminder:
         return jsonify({"message": "Reminder not found"}), 404
     
-    reminder.is_sent = True
+    if reminder.recurrence_rule:
+        rule = (reminder.recurrence_rule, reminder.due_date, reminder.recurrence_end)
+        upcoming = next_occurrence(*rule, after=reminder.completed_through)
+        if upcoming is not None:
+            reminder.completed_through = upcoming
+        reminder.is_sent = upcoming is None or next_occurrence(*rule, after=upcoming) is None
+    else:
+        reminder.is_sent = True
     
     try:
+        touch_pet(reminder.pet_id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
     
+    response_cache.invalidate(pet_scope(reminder.pet_id))
     return jsonify({"message": "Reminder marked as sent", "reminder": reminder.to_json()}), 200
 
 @reminders_bp.route("/<int:reminder_id>", methods=["DELETE"])
@@ -208,11 +487,15 @@ def delete_reminder(reminder_id):
     if not reminder:
         return jsonify({"message": "Reminder not found"}), 404
     
+    pet_id = reminder.pet_id
     try:
+        Notification.query.filter_by(reminder_id=reminder_id).delete()
         db.session.delete(reminder)
+        touch_pet(pet_id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
     
+    response_cache.invalidate(pet_scope(pet_id))
     return jsonify({"message": "Reminder deleted"}), 200 
\ No newline at end of file
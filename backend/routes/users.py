@@ -1,15 +1,73 @@
-from flask import Blueprint, request, jsonify
-from models import User
+import csv
+import io
+import json
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from itsdangerous import URLSafeTimedSerializer
+from sqlalchemy.orm import selectinload
+from models import User, Pet, DietLog, WeightLog, VaccineLog, PetGrowthLog, Reminder, normalize_email
 from config import db
+from cache import LRUCache, response_cache, user_scope, ALL_PETS_SCOPE
+from serializers import SERIALIZERS, pet_serializer
 
 # 创建users Blueprint
 users_bp = Blueprint('users', __name__, url_prefix='/users')
 
+# email -> user_id 的进程内缓存，登录时先按主键查用户；更新/删除用户时失效
+_email_to_user_id = LRUCache(maxsize=4096)
+
+
+def find_user_by_email(email):
+    """按邮箱查找用户（邮箱会先规范化），优先走 email -> user_id 缓存"""
+    email = normalize_email(email)
+    if not email:
+        return None
+
+    user_id = _email_to_user_id.get(email)
+    if user_id is not None:
+        user = db.session.get(User, user_id)
+        if user is not None and user.email == email:
+            return user
+        _email_to_user_id.pop(email)
+
+    user = User.query.filter_by(email=email).first()
+    if user is not None:
+        _email_to_user_id.set(email, user.id)
+    return user
+
+
+def issue_session_token(user):
+    """签发登录 token（包含 user_id 和签发时间）"""
+    serializer = URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt="paw-diary-session")
+    return serializer.dumps({"user_id": user.id})
+
 @users_bp.route("/", methods=["GET"])
 def get_users():
-    """获取所有用户列表"""
-    users = User.query.all()
-    json_users = list(map(lambda x: x.to_json(), users))
+    """
+    获取所有用户列表
+    optional query params:
+        ?fields=id,email   只返回指定字段（不含 pets 时不会加载宠物）
+        ?include=pets      是否附带宠物列表，默认附带；?include= 表示不附带
+    """
+    fields_arg = request.args.get("fields")
+    fields = None
+    if fields_arg:
+        fields = [field.strip() for field in fields_arg.split(",") if field.strip()]
+
+    include_arg = request.args.get("include")
+    if include_arg is not None:
+        include_pets = "pets" in include_arg.split(",")
+    elif fields is not None:
+        include_pets = "pets" in fields
+    else:
+        include_pets = True
+
+    query = User.query
+    if include_pets:
+        # 一次性预加载所有用户的宠物（固定2条SQL），避免逐个用户懒加载 pets
+        query = query.options(selectinload(User.pets))
+
+    users = query.all()
+    json_users = [user.to_json(fields=fields, include_pets=include_pets) for user in users]
     return jsonify({"users": json_users})
 
 
@@ -29,7 +87,7 @@ def register_user():
         )
 
     # 检查邮箱是否已存在
-    existing_user = User.query.filter_by(email=email).first()
+    existing_user = find_user_by_email(email)
     if existing_user:
         return jsonify({"message": "Email already exists"}), 409
 
@@ -57,34 +115,39 @@ def update_user(user_id):
         return jsonify({"message": "User not found"}), 404
 
     data = request.json
+    old_email = user.email
     user.first_name = data.get("firstName", user.first_name)
     user.last_name = data.get("lastName", user.last_name)
     user.email = data.get("email", user.email)
 
     db.session.commit()
+    _email_to_user_id.pop(old_email)
 
     return jsonify({"message": "User updated."}), 200
 
 
 @users_bp.route("/login", methods=["POST"])
 def login_user():
-    """用户登录验证"""
-    data = request.get_json()
+    """
+    用户登录验证
+    只返回身份字段和 token，不序列化宠物
+    """
+    data = request.get_json() or {}
     email = data.get("email")
     password = data.get("password")
 
-    user = User.query.filter_by(email=email).first()
+    user = find_user_by_email(email)
 
     if not user:
         return jsonify({"message": "User not existing with this email"}), 404
-    
-    json_user = user.to_json()
-    
-    if password == user.password:
-        return jsonify(json_user), 200
-    else:
+
+    if password != user.password:
         return jsonify({"message": "Incorrect password"}), 401
 
+    json_user = user.to_identity_json()
+    json_user["token"] = issue_session_token(user)
+    return jsonify(json_user), 200
+
 
 @users_bp.route("/<int:user_id>", methods=["DELETE"])
 def delete_user(user_id):
@@ -94,7 +157,93 @@ def delete_user(user_id):
     if not user:
         return jsonify({"message": "User not found"}), 404
 
+    email = user.email
     db.session.delete(user)
     db.session.commit()
+    _email_to_user_id.pop(email)
+    response_cache.invalidate(user_scope(user_id), ALL_PETS_SCOPE)
+
+    return jsonify({"message": "User deleted!"}), 200 
+
+
+# 导出时依次输出的记录类型（宠物之后）
+EXPORT_LOG_MODELS = [
+    ("diet_log", DietLog),
+    ("weight_log", WeightLog),
+    ("vaccine_log", VaccineLog),
+    ("growth_log", PetGrowthLog),
+    ("reminder", Reminder),
+]
+EXPORT_BATCH_SIZE = 500
+
+
+def iter_user_records(user_id):
+    """
+    逐条产出 (记录类型, 与 to_json() 相同的字段字典)：先是宠物，再按类型输出全部日志
+    只查询需要的列并使用 yield_per 分批从游标读取，内存占用与历史记录总量无关
+    """
+    pets = pet_serializer.select(Pet.query.filter_by(user_id=user_id).order_by(Pet.id)).yield_per(EXPORT_BATCH_SIZE)
+    for pet in pets:
+        yield "pet", pet_serializer.row(pet)
+
+    pet_ids = db.select(Pet.id).where(Pet.user_id == user_id)
+    for record_type, model in EXPORT_LOG_MODELS:
+        order_column = model.due_date if model is Reminder else model.date
+        serializer = SERIALIZERS[model]
+        logs = serializer.select(model.query.filter(model.pet_id.in_(pet_ids)))\
+            .order_by(model.pet_id, order_column, model.id)\
+            .yield_per(EXPORT_BATCH_SIZE)
+        for log in logs:
+            yield record_type, serializer.row(log)
+
+
+def export_csv_columns():
+    """CSV 表头：记录类型 + 所有导出模型字段的并集"""
+    columns = ["record_type"]
+    for model in [Pet] + [model for _, model in EXPORT_LOG_MODELS]:
+        for column in model.__table__.columns.keys():
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+def generate_ndjson(records):
+    for record_type, data in records:
+        yield json.dumps({"type": record_type, "data": data}, ensure_ascii=False) + "\n"
+
+
+def generate_csv(records):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=export_csv_columns(), extrasaction="ignore")
+    writer.writeheader()
+    for record_type, data in records:
+        writer.writerow({"record_type": record_type, **data})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+@users_bp.route("/<int:user_id>/export", methods=["GET"])
+def export_user_data(user_id):
+    """
+    GET /users/<user_id>/export?format=ndjson|csv
+    流式导出该用户的全部宠物及其饮食、体重、疫苗、成长记录和提醒，默认 ndjson
+    """
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in ("ndjson", "csv"):
+        return jsonify({"message": "format must be ndjson or csv"}), 400
+
+    user = db.session.get(User, user_id)
+    if not user:
+        return jsonify({"message": "User not found"}), 404
+
+    records = iter_user_records(user_id)
+    if export_format == "csv":
+        body, mimetype = generate_csv(records), "text/csv"
+    else:
+        body, mimetype = generate_ndjson(records), "application/x-ndjson"
 
-    return jsonify({"message": "User deleted!"}), 200 
\ No newline at end of file
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename=paw-diary-user-{user_id}.{export_format}"
+    return response
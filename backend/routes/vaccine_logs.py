@@ -1,12 +1,60 @@
 from flask import Blueprint, request, jsonify
 from models import VaccineLog, Pet
 from config import db
+from pagination import get_page_args, paginate_logs, get_latest_args, latest_per_pet
+from bulk import read_bulk_items, bulk_create
+from cache import response_cache, pet_scope
+from serializers import vaccine_log_serializer
+from conditional import conditional, pet_version, dated_pet_version, touch_pet
+from reminder_worker import discard_vaccine_reminders
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta
 
 # 创建vaccine_logs Blueprint
 vaccine_logs_bp = Blueprint('vaccine_logs', __name__, url_prefix='/vaccine-logs')
 
+def parse_vaccine_log(data):
+    """
+    校验并解析一条疫苗记录，返回 (字段字典, None) 或 (None, 错误信息)
+    单条创建和批量创建共用
+    """
+    # 验证必需字段
+    required_fields = ["pet_id", "date", "vaccine_type"]
+    for field in required_fields:
+        if not data.get(field):
+            return None, f"{field} is required"
+    
+    try:
+        pet_id = int(data.get("pet_id"))
+    except (ValueError, TypeError):
+        return None, "pet_id must be an integer"
+    
+    # 解析日期
+    try:
+        date = datetime.strptime(data.get("date"), "%Y-%m-%d").date()
+    except (ValueError, TypeError):
+        return None, "date must be YYYY-MM-DD"
+    
+    # 解析下次接种日期
+    next_due_date = None
+    if data.get("next_due_date"):
+        try:
+            next_due_date = datetime.strptime(data.get("next_due_date"), "%Y-%m-%d").date()
+        except (ValueError, TypeError):
+            return None, "next_due_date must be YYYY-MM-DD"
+    
+    values = {
+        "pet_id": pet_id,
+        "date": date,
+        "vaccine_type": data.get("vaccine_type"),
+        "notes": data.get("notes"),
+        "next_due_date": next_due_date,
+        # 批量插入时每条记录的字段必须一致，未提供时默认开启
+        "reminder_enabled": bool(data.get("reminder_enabled", True))
+    }
+    
+    return values, None
+
 @vaccine_logs_bp.route("/", methods=["POST"])
 def create_vaccine_log():
     """
@@ -22,59 +70,68 @@ def create_vaccine_log():
     """
     data = request.get_json() or {}
     
-    # 验证必需字段
-    required_fields = ["pet_id", "date", "vaccine_type"]
-    for field in required_fields:
-        if not data.get(field):
-            return jsonify({"message": f"{field} is required"}), 400
+    values, error = parse_vaccine_log(data)
+    if error:
+        return jsonify({"message": error}), 400
     
     # 验证宠物是否存在
-    pet = Pet.query.get(data.get("pet_id"))
+    pet = Pet.query.get(values["pet_id"])
     if not pet:
         return jsonify({"message": "Pet not found"}), 404
     
-    # 解析日期
-    try:
-        date = datetime.strptime(data.get("date"), "%Y-%m-%d").date()
-    except ValueError:
-        return jsonify({"message": "date must be YYYY-MM-DD"}), 400
-    
-    # 解析下次接种日期
-    next_due_date = None
-    if data.get("next_due_date"):
-        try:
-            next_due_date = datetime.strptime(data.get("next_due_date"), "%Y-%m-%d").date()
-        except ValueError:
-            return jsonify({"message": "next_due_date must be YYYY-MM-DD"}), 400
-    
-    vaccine_log = VaccineLog(
-        pet_id=pet.id,
-        date=date,
-        vaccine_type=data.get("vaccine_type"),
-        notes=data.get("notes"),
-        next_due_date=next_due_date,
-        reminder_enabled=data.get("reminder_enabled", True)
-    )
+    vaccine_log = VaccineLog(**values)
     
     try:
         db.session.add(vaccine_log)
+        touch_pet(vaccine_log.pet_id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
     
+    response_cache.invalidate(pet_scope(vaccine_log.pet_id))
     return jsonify({"message": "Vaccine log created", "vaccine_log": vaccine_log.to_json()}), 201
 
+@vaccine_logs_bp.route("/bulk", methods=["POST"])
+def bulk_create_vaccine_logs():
+    """
+    POST /vaccine-logs/bulk
+    JSON body: [{"pet_id": 1, "date": "2024-01-15", "vaccine_type": "狂犬疫苗", ...}, ...]
+    也接受 {"items": [...]} 或 NDJSON（Content-Type: application/x-ndjson）
+    合法记录在一个事务中插入，不合法的记录在 errors 中按序号返回
+    """
+    try:
+        items, errors = read_bulk_items(request)
+        rows, errors = bulk_create(VaccineLog, items, parse_vaccine_log, errors)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+    
+    response_cache.invalidate(*{pet_scope(row["pet_id"]) for row in rows})
+    
+    status = 201 if rows or not errors else 400
+    return jsonify({"created": len(rows), "errors": errors}), status
+
 @vaccine_logs_bp.route("/pet/<int:pet_id>", methods=["GET"])
+@conditional(pet_version)
+@response_cache.cached(lambda pet_id: [pet_scope(pet_id)])
 def get_pet_vaccine_logs(pet_id):
     """
     GET /vaccine-logs/pet/<pet_id>
-    optional query params: ?start_date=2024-01-01&end_date=2024-01-31&vaccine_type=狂犬疫苗
+    optional query params: ?start_date=2024-01-01&end_date=2024-01-31&vaccine_type=狂犬疫苗&limit=50&cursor=<next_cursor>
+    按日期倒序分页返回，响应中的 next_cursor 用于获取下一页
     """
     pet = Pet.query.get(pet_id)
     if not pet:
         return jsonify({"message": "Pet not found"}), 404
     
+    try:
+        cursor, limit = get_page_args(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    
     # 构建查询
     query = VaccineLog.query.filter_by(pet_id=pet_id)
     
@@ -100,13 +157,31 @@ def get_pet_vaccine_logs(pet_id):
     if vaccine_type:
         query = query.filter_by(vaccine_type=vaccine_type)
     
-    # 排序（按日期降序）
-    query = query.order_by(VaccineLog.date.desc())
+    # 按日期降序分页
+    vaccine_logs, next_cursor = paginate_logs(vaccine_log_serializer.select(query), VaccineLog, cursor, limit)
+    return jsonify({
+        "vaccine_logs": vaccine_log_serializer.rows(vaccine_logs),
+        "next_cursor": next_cursor
+    }), 200
+
+@vaccine_logs_bp.route("/latest", methods=["GET"])
+def get_latest_vaccine_logs():
+    """
+    GET /vaccine-logs/latest?pet_ids=1,2,3&n=5
+    一次请求获取多只宠物各自最新的 n 条疫苗记录（仪表盘用），n 默认5、最大50
+    """
+    try:
+        pet_ids, n = get_latest_args(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     
-    vaccine_logs = query.all()
-    return jsonify({"vaccine_logs": [log.to_json() for log in vaccine_logs]}), 200
+    latest = latest_per_pet(VaccineLog, pet_ids, n)
+    return jsonify({
+        "vaccine_logs": {str(pet_id): [log.to_json() for log in logs] for pet_id, logs in latest.items()}
+    }), 200
 
 @vaccine_logs_bp.route("/pet/<int:pet_id>/upcoming", methods=["GET"])
+@conditional(dated_pet_version)
 def get_upcoming_vaccines(pet_id):
     """
     GET /vaccine-logs/pet/<pet_id>/upcoming
@@ -178,11 +253,16 @@ def update_vaccine_log(log_id):
         vaccine_log.reminder_enabled = bool(data.get("reminder_enabled"))
     
     try:
+        # 到期日、疫苗类型或提醒开关变化后，未发送的自动提醒由后台任务重新生成
+        if {"next_due_date", "vaccine_type", "reminder_enabled"} & data.keys():
+            discard_vaccine_reminders(log_id)
+        touch_pet(vaccine_log.pet_id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
     
+    response_cache.invalidate(pet_scope(vaccine_log.pet_id))
     return jsonify({"message": "Vaccine log updated", "vaccine_log": vaccine_log.to_json()}), 200
 
 @vaccine_logs_bp.route("/<int:log_id>", methods=["DELETE"])
@@ -194,11 +274,15 @@ def delete_vaccine_log(log_id):
     if not vaccine_log:
         return jsonify({"message": "Vaccine log not found"}), 404
     
+    pet_id = vaccine_log.pet_id
     try:
+        discard_vaccine_reminders(log_id, unlink=True)
         db.session.delete(vaccine_log)
+        touch_pet(pet_id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
     
+    response_cache.invalidate(pet_scope(pet_id))
     return jsonify({"message": "Vaccine log deleted"}), 200 
\ No newline at end of file
@@ -1,74 +1,127 @@
 from flask import Blueprint, request, jsonify
 from models import WeightLog, Pet
 from config import db
+from pagination import get_page_args, paginate_logs, get_latest_args, latest_per_pet
+from bulk import read_bulk_items, bulk_create
+from cache import response_cache, pet_scope
+from serializers import weight_log_serializer
+from conditional import conditional, pet_version, touch_pet
+from trends import BUCKETS, DEFAULT_WINDOW, MAX_WINDOW, get_weight_trend as get_weight_trend_series, invalidate_weight_trend
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
 
 # 创建weight_logs Blueprint
 weight_logs_bp = Blueprint('weight_logs', __name__, url_prefix='/weight-logs')
 
-@weight_logs_bp.route("/", methods=["POST"])
-def create_weight_log():
+def parse_weight_log(data):
     """
-    POST /weight-logs
-    JSON body: {
-        "pet_id": 1,
-        "date": "2024-01-15",
-        "weight_kg": 25.5
-    }
+    校验并解析一条体重记录，返回 (字段字典, None) 或 (None, 错误信息)
+    单条创建和批量创建共用
     """
-    data = request.get_json() or {}
-    
     # 验证必需字段
     required_fields = ["pet_id", "date", "weight_kg"]
     for field in required_fields:
         if not data.get(field):
-            return jsonify({"message": f"{field} is required"}), 400
+            return None, f"{field} is required"
     
-    # 验证宠物是否存在
-    pet = Pet.query.get(data.get("pet_id"))
-    if not pet:
-        return jsonify({"message": "Pet not found"}), 404
+    try:
+        pet_id = int(data.get("pet_id"))
+    except (ValueError, TypeError):
+        return None, "pet_id must be an integer"
     
     # 验证体重数据
     try:
         weight_kg = float(data.get("weight_kg"))
-        if weight_kg <= 0:
-            return jsonify({"message": "weight_kg must be positive"}), 400
     except (ValueError, TypeError):
-        return jsonify({"message": "weight_kg must be a valid number"}), 400
+        return None, "weight_kg must be a valid number"
+    if weight_kg <= 0:
+        return None, "weight_kg must be positive"
     
     # 解析日期
     try:
         date = datetime.strptime(data.get("date"), "%Y-%m-%d").date()
-    except ValueError:
-        return jsonify({"message": "date must be YYYY-MM-DD"}), 400
+    except (ValueError, TypeError):
+        return None, "date must be YYYY-MM-DD"
+    
+    return {"pet_id": pet_id, "date": date, "weight_kg": weight_kg}, None
+
+@weight_logs_bp.route("/", methods=["POST"])
+def create_weight_log():
+    """
+    POST /weight-logs
+    JSON body: {
+        "pet_id": 1,
+        "date": "2024-01-15",
+        "weight_kg": 25.5
+    }
+    """
+    data = request.get_json() or {}
     
-    weight_log = WeightLog(
-        pet_id=pet.id,
-        date=date,
-        weight_kg=weight_kg
-    )
+    values, error = parse_weight_log(data)
+    if error:
+        return jsonify({"message": error}), 400
+    
+    # 验证宠物是否存在
+    pet = Pet.query.get(values["pet_id"])
+    if not pet:
+        return jsonify({"message": "Pet not found"}), 404
+    
+    weight_log = WeightLog(**values)
     
     try:
         db.session.add(weight_log)
+        touch_pet(weight_log.pet_id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
     
+    invalidate_weight_trend(weight_log.pet_id)
+    response_cache.invalidate(pet_scope(weight_log.pet_id))
     return jsonify({"message": "Weight log created", "weight_log": weight_log.to_json()}), 201
 
+@weight_logs_bp.route("/bulk", methods=["POST"])
+def bulk_create_weight_logs():
+    """
+    POST /weight-logs/bulk
+    JSON body: [{"pet_id": 1, "date": "2024-01-15", "weight_kg": 25.5}, ...]
+    也接受 {"items": [...]} 或 NDJSON（Content-Type: application/x-ndjson）
+    合法记录在一个事务中插入，不合法的记录在 errors 中按序号返回
+    """
+    try:
+        items, errors = read_bulk_items(request)
+        rows, errors = bulk_create(WeightLog, items, parse_weight_log, errors)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+    
+    for pet_id in {row["pet_id"] for row in rows}:
+        invalidate_weight_trend(pet_id)
+        response_cache.invalidate(pet_scope(pet_id))
+    
+    status = 201 if rows or not errors else 400
+    return jsonify({"created": len(rows), "errors": errors}), status
+
 @weight_logs_bp.route("/pet/<int:pet_id>", methods=["GET"])
+@conditional(pet_version)
+@response_cache.cached(lambda pet_id: [pet_scope(pet_id)])
 def get_pet_weight_logs(pet_id):
     """
     GET /weight-logs/pet/<pet_id>
-    optional query params: ?start_date=2024-01-01&end_date=2024-01-31&limit=10
+    optional query params: ?start_date=2024-01-01&end_date=2024-01-31&limit=10&cursor=<next_cursor>
+    按日期倒序分页返回，limit 为每页条数（默认50），响应中的 next_cursor 用于获取下一页
     """
     pet = Pet.query.get(pet_id)
     if not pet:
         return jsonify({"message": "Pet not found"}), 404
     
+    try:
+        cursor, limit = get_page_args(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    
     # 构建查询
     query = WeightLog.query.filter_by(pet_id=pet_id)
     
@@ -89,27 +142,66 @@ def get_pet_weight_logs(pet_id):
         except ValueError:
             return jsonify({"message": "end_date must be YYYY-MM-DD"}), 400
     
-    # 限制返回数量
-    limit = request.args.get("limit", type=int)
-    if limit:
-        query = query.limit(limit)
-    
-    # 排序（按日期降序）
-    query = query.order_by(WeightLog.date.desc())
+    # 按日期降序分页
+    weight_logs, next_cursor = paginate_logs(weight_log_serializer.select(query), WeightLog, cursor, limit)
+    return jsonify({
+        "weight_logs": weight_log_serializer.rows(weight_logs),
+        "next_cursor": next_cursor
+    }), 200
+
+@weight_logs_bp.route("/latest", methods=["GET"])
+def get_latest_weight_logs():
+    """
+    GET /weight-logs/latest?pet_ids=1,2,3&n=5
+    一次请求获取多只宠物各自最新的 n 条体重记录（仪表盘用），n 默认5、最大50
+    """
+    try:
+        pet_ids, n = get_latest_args(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     
-    weight_logs = query.all()
-    return jsonify({"weight_logs": [log.to_json() for log in weight_logs]}), 200
+    latest = latest_per_pet(WeightLog, pet_ids, n)
+    return jsonify({
+        "weight_logs": {str(pet_id): [log.to_json() for log in logs] for pet_id, logs in latest.items()}
+    }), 200
 
 @weight_logs_bp.route("/pet/<int:pet_id>/trend", methods=["GET"])
+@conditional(pet_version)
 def get_weight_trend(pet_id):
     """
     GET /weight-logs/pet/<pet_id>/trend
     获取体重变化趋势，返回最近10次记录
+    
+    传入 bucket 时返回分桶统计序列:
+    ?bucket=day|week|month&start_date=2024-01-01&end_date=2024-12-31&window=3
+    每个桶包含 count/min_kg/max_kg/mean_kg、最近 window 个桶的滑动平均 rolling_mean_kg，
+    以及相对上一个桶的 change_kg 和 rate_kg_per_day
     """
     pet = Pet.query.get(pet_id)
     if not pet:
         return jsonify({"message": "Pet not found"}), 404
     
+    bucket = request.args.get("bucket")
+    if bucket:
+        if bucket not in BUCKETS:
+            return jsonify({"message": f"bucket must be one of: {', '.join(BUCKETS)}"}), 400
+        
+        window = request.args.get("window", DEFAULT_WINDOW, type=int)
+        if not 1 <= window <= MAX_WINDOW:
+            return jsonify({"message": f"window must be between 1 and {MAX_WINDOW}"}), 400
+        
+        dates = {}
+        for name in ("start_date", "end_date"):
+            value = request.args.get(name)
+            if value:
+                try:
+                    dates[name] = datetime.strptime(value, "%Y-%m-%d").date()
+                except ValueError:
+                    return jsonify({"message": f"{name} must be YYYY-MM-DD"}), 400
+        
+        series = get_weight_trend_series(pet_id, pet.version, bucket, dates.get("start_date"), dates.get("end_date"), window)
+        return jsonify({"bucket": bucket, "window": window, "series": series}), 200
+    
     weight_logs = WeightLog.query.filter_by(pet_id=pet_id)\
         .order_by(WeightLog.date.desc())\
         .limit(10)\
@@ -170,11 +262,14 @@ def update_weight_log(log_id):
             return jsonify({"message": "weight_kg must be a valid number"}), 400
     
     try:
+        touch_pet(weight_log.pet_id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
     
+    invalidate_weight_trend(weight_log.pet_id)
+    response_cache.invalidate(pet_scope(weight_log.pet_id))
     return jsonify({"message": "Weight log updated", "weight_log": weight_log.to_json()}), 200
 
 @weight_logs_bp.route("/<int:log_id>", methods=["DELETE"])
@@ -186,11 +281,15 @@ def delete_weight_log(log_id):
     if not weight_log:
         return jsonify({"message": "Weight log not found"}), 404
     
+    pet_id = weight_log.pet_id
     try:
         db.session.delete(weight_log)
+        touch_pet(pet_id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
     
+    invalidate_weight_trend(pet_id)
+    response_cache.invalidate(pet_scope(pet_id))
     return jsonify({"message": "Weight log deleted"}), 200 
\ No newline at end of file
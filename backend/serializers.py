@@ -0,0 +1,131 @@
+"""
+列表接口的快速序列化
+
+- RowSerializer: 只查询需要的列（with_entities 返回元组），按列类型用 isoformat 格式化日期/时间，
+  不创建 ORM 对象、也不逐个调用 to_json()；输出的字段和格式与模型的 to_json() 完全一致
+- FastJSONProvider: 安装了 orjson 时用它编码 jsonify() 的响应，没有安装时与 Flask 默认实现相同
+
+性能对比见 benchmarks/bench_serialization.py
+"""
+
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Date, DateTime, Time
+
+from models import Pet, DietLog, WeightLog, VaccineLog, PetGrowthLog, Reminder, Notification
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，没有安装时使用标准库 json
+    orjson = None
+
+
+def format_time(value):
+    return value.isoformat(timespec="minutes")
+
+
+def format_datetime(value):
+    return value.isoformat(sep=" ", timespec="seconds")
+
+
+# 与 to_json() 中的 strftime 格式一致: %Y-%m-%d / %H:%M / %Y-%m-%d %H:%M:%S
+COLUMN_FORMATTERS = (
+    (DateTime, format_datetime),
+    (Date, date.isoformat),
+    (Time, format_time),
+)
+
+
+class RowSerializer:
+    """按字段列表查询并序列化一个模型，fields 与模型 to_json() 的键相同"""
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = tuple(fields)
+        self.columns = tuple(getattr(model, field) for field in self.fields)
+        self._formatters = tuple(
+            (index, formatter)
+            for index, column in enumerate(self.columns)
+            for column_type, formatter in COLUMN_FORMATTERS
+            if isinstance(column.type, column_type)
+        )
+
+    def select(self, query):
+        """把 Model.query 换成只查询这些列，过滤和排序条件保持不变"""
+        return query.with_entities(*self.columns)
+
+    def row(self, row):
+        values = list(row)
+        for index, formatter in self._formatters:
+            if values[index] is not None:
+                values[index] = formatter(values[index])
+        return dict(zip(self.fields, values))
+
+    def rows(self, rows):
+        if not self._formatters:
+            return [dict(zip(self.fields, row)) for row in rows]
+        return [self.row(row) for row in rows]
+
+    def all(self, query):
+        return self.rows(self.select(query).all())
+
+
+pet_serializer = RowSerializer(Pet, (
+    "id", "name", "species", "breed", "birth_date", "color", "microchip_id", "notes", "user_id"
+))
+diet_log_serializer = RowSerializer(DietLog, (
+    "id", "pet_id", "date", "description", "food_amount", "unit", "meal_type", "feeding_time", "notes"
+))
+weight_log_serializer = RowSerializer(WeightLog, ("id", "pet_id", "date", "weight_kg", "notes"))
+vaccine_log_serializer = RowSerializer(VaccineLog, (
+    "id", "pet_id", "date", "vaccine_type", "next_due_date", "reminder_enabled", "notes"
+))
+growth_log_serializer = RowSerializer(PetGrowthLog, ("id", "pet_id", "date", "height_cm", "length_cm", "notes"))
+reminder_serializer = RowSerializer(Reminder, (
+    "id", "pet_id", "title", "description", "message", "due_date",
+    "reminder_type", "is_sent", "is_completed", "created_at", "vaccine_log_id",
+    "recurrence_rule", "recurrence_end", "completed_through"
+))
+notification_serializer = RowSerializer(Notification, (
+    "id", "pet_id", "reminder_id", "reminder_type", "message", "due_date", "is_read", "created_at"
+))
+
+SERIALIZERS = {
+    serializer.model: serializer
+    for serializer in (
+        pet_serializer, diet_log_serializer, weight_log_serializer,
+        vaccine_log_serializer, growth_log_serializer, reminder_serializer,
+    )
+}
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    用 orjson 编码响应；date/datetime 仍交给 Flask 的 default 处理（HTTP 日期格式），
+    保证与默认实现的输出一致
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = self._orjson_dumps(obj, orjson.OPT_INDENT_2 if indent else 0)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+    def _orjson_dumps(self, obj, option=0):
+        option |= orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
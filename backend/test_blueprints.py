@@ -0,0 +1,227 @@
+"""
+各个 Blueprint 的接口测试，在 SQLite 和 PostgreSQL 上各运行一遍（见 conftest.py）
+运行: python -m pytest test_blueprints.py
+      TEST_POSTGRES_URL=postgresql://... python -m pytest test_blueprints.py
+"""
+
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from conditional import touch_pet
+from config import db
+from models import WeightLog
+
+
+@pytest.fixture
+def user(client):
+    response = client.post("/users/register", json={
+        "firstName": "Alessia", "lastName": "Song", "email": "Alessia@Example.com", "password": "secret"
+    })
+    assert response.status_code == 201, response.json
+    return response.json
+
+
+@pytest.fixture
+def pet(client, user):
+    response = client.post("/pets/", json={
+        "user_id": user["id"], "name": "Bobby", "species": "Dog", "breed": "Corgi", "birth_date": "2020-05-01"
+    })
+    assert response.status_code == 201, response.json
+    return response.json["pet"]
+
+
+def test_register_and_login(client, user):
+    response = client.post("/users/login", json={"email": "alessia@example.com", "password": "secret"})
+    assert response.status_code == 200
+    assert response.json["email"] == "alessia@example.com"
+    assert response.json["token"]
+
+    response = client.post("/users/login", json={"email": "alessia@example.com", "password": "wrong"})
+    assert response.status_code == 401
+
+    response = client.post("/users/register", json={
+        "firstName": "A", "lastName": "S", "email": "ALESSIA@example.com ", "password": "x"
+    })
+    assert response.status_code == 409
+
+
+def test_pet_crud(client, user, pet):
+    assert pet["birth_date"] == "2020-05-01"
+
+    response = client.patch(f"/pets/{pet['id']}", json={"name": "Bob", "color": "brown"})
+    assert response.status_code == 200
+
+    response = client.put(f"/pets/{pet['id']}?user_id={user['id'] + 1}", json={"name": "Stolen"})
+    assert response.status_code == 403
+    response = client.patch(f"/pets/{pet['id']}", json={"user_id": user["id"] + 1, "name": "Stolen"})
+    assert response.status_code == 403
+
+    response = client.get(f"/pets/{pet['id']}")
+    assert response.json["pet"]["name"] == "Bob"
+    assert response.json["pet"]["color"] == "brown"
+
+    response = client.get(f"/pets/?user_id={user['id']}")
+    assert [p["id"] for p in response.json["pets"]] == [pet["id"]]
+
+    response = client.delete(f"/pets/{pet['id']}")
+    assert response.status_code == 200
+    assert client.get(f"/pets/{pet['id']}").status_code == 404
+
+
+def test_pet_listing_filters_sorting_and_pages(client, user, pet):
+    for name, species, breed, birth_date in [
+        ("bella", "Dog", "Poodle", "2019-01-01"), ("Alfie", "Cat", None, "2018-01-01"), ("Bo_x", "Dog", "Corgi", "2021-01-01")
+    ]:
+        client.post("/pets/", json={
+            "user_id": user["id"], "name": name, "species": species, "breed": breed, "birth_date": birth_date
+        })
+
+    url = f"/pets/?user_id={user['id']}"
+    # 名字的大小写、标点排序取决于数据库的排序规则，这里只检查翻页与完整排序结果一致
+    names = [p["name"] for p in client.get(f"{url}&sort=name").json["pets"]]
+    assert names[0] == "Alfie" and sorted(names) == sorted(["Alfie", "bella", "Bo_x", "Bobby"])
+    response = client.get(f"{url}&sort=name&per_page=2&page=2")
+    assert [p["name"] for p in response.json["pets"]] == names[2:]
+    assert response.json["total"] == 4 and response.json["page"] == 2
+
+    response = client.get(f"{url}&sort=birth_date&order=desc&species=Dog&breed=Corgi")
+    assert [p["name"] for p in response.json["pets"]] == ["Bo_x", "Bobby"]
+    assert response.json["total"] == 2
+
+    # 前缀匹配不区分大小写，"_" 按普通字符匹配
+    response = client.get(f"{url}&name_prefix=b&sort=id")
+    assert [p["name"] for p in response.json["pets"]] == ["Bobby", "bella", "Bo_x"]
+    response = client.get(f"{url}&name_prefix=bo_")
+    assert [p["name"] for p in response.json["pets"]] == ["Bo_x"]
+
+    assert client.get(f"{url}&sort=color").status_code == 400
+    assert client.get(f"{url}&page=0").status_code == 400
+
+
+def test_diet_logs_pagination_and_summary(client, pet):
+    for day, amount, unit in [(1, 100, "g"), (1, 0.2, "kg"), (2, 1, "杯"), (9, 50, "克")]:
+        response = client.post("/diet-logs/", json={
+            "pet_id": pet["id"], "date": f"2024-01-{day:02d}", "description": "狗粮",
+            "meal_type": "早餐", "food_amount": amount, "unit": unit
+        })
+        assert response.status_code == 201, response.json
+
+    first = client.get(f"/diet-logs/pet/{pet['id']}?limit=3").json
+    assert [log["date"] for log in first["diet_logs"]] == ["2024-01-09", "2024-01-02", "2024-01-01"]
+    second = client.get(f"/diet-logs/pet/{pet['id']}?limit=3&cursor={first['next_cursor']}").json
+    assert len(second["diet_logs"]) == 1 and second["next_cursor"] is None
+
+    summary = client.get(f"/diet-logs/pet/{pet['id']}/summary?group=week").json["summary"]
+    assert [(s["period_start"], s["total_grams"], s["entry_count"], s["unconverted_count"]) for s in summary] == [
+        ("2024-01-01", 300.0, 3, 1),
+        ("2024-01-08", 50.0, 1, 0),
+    ]
+
+    log_id = second["diet_logs"][0]["id"]
+    assert client.put(f"/diet-logs/{log_id}", json={"food_amount": 150}).status_code == 200
+    summary = client.get(f"/diet-logs/pet/{pet['id']}/summary?start_date=2024-01-01&end_date=2024-01-01").json["summary"]
+    assert summary[0]["total_grams"] == pytest.approx(350.0)
+
+    # 删除一天里唯一的记录后汇总行一起删除
+    assert client.delete(f"/diet-logs/{first['diet_logs'][0]['id']}").status_code == 200
+    summary = client.get(f"/diet-logs/pet/{pet['id']}/summary?group=week").json["summary"]
+    assert [s["period_start"] for s in summary] == ["2024-01-01"]
+
+
+def test_weight_trend_buckets(app, client, pet):
+    records = [
+        {"pet_id": pet["id"], "date": date, "weight_kg": weight}
+        for date, weight in [("2024-01-01", 10.0), ("2024-01-03", 10.4), ("2024-01-08", 11.0), ("2024-02-05", 12.0)]
+    ]
+    response = client.post("/weight-logs/bulk", json=records)
+    assert response.json == {"created": 4, "errors": []}
+
+    series = client.get(f"/weight-logs/pet/{pet['id']}/trend?bucket=week&window=2").json["series"]
+    assert [bucket["bucket_start"] for bucket in series] == ["2024-01-01", "2024-01-08", "2024-02-05"]
+    assert series[0]["count"] == 2 and series[0]["mean_kg"] == pytest.approx(10.2)
+    assert series[1]["change_kg"] == pytest.approx(0.8)
+    assert series[1]["rate_kg_per_day"] == pytest.approx(0.8 / 7, abs=1e-4)
+
+    series = client.get(f"/weight-logs/pet/{pet['id']}/trend?bucket=month").json["series"]
+    assert [bucket["bucket_start"] for bucket in series] == ["2024-01-01", "2024-02-01"]
+
+    # 其他进程的写操作不会清除这个进程的缓存，pet.version 变化后重新计算
+    with app.app_context():
+        db.session.add(WeightLog(pet_id=pet["id"], date=date(2024, 3, 1), weight_kg=12.5))
+        touch_pet(pet["id"])
+        db.session.commit()
+    series = client.get(f"/weight-logs/pet/{pet['id']}/trend?bucket=month").json["series"]
+    assert [bucket["bucket_start"] for bucket in series] == ["2024-01-01", "2024-02-01", "2024-03-01"]
+
+
+def test_vaccine_logs_and_latest(client, pet):
+    response = client.post("/vaccine-logs/", json={
+        "pet_id": pet["id"], "date": "2024-01-15", "vaccine_type": "Rabies", "next_due_date": "2025-01-15"
+    })
+    assert response.status_code == 201, response.json
+
+    response = client.get(f"/vaccine-logs/latest?pet_ids={pet['id']}&n=5")
+    assert [log["vaccine_type"] for log in response.json["vaccine_logs"][str(pet["id"])]] == ["Rabies"]
+
+    soon = (date.today() + timedelta(days=10)).strftime("%Y-%m-%d")
+    for reminder_enabled in (True, False):
+        client.post("/vaccine-logs/", json={
+            "pet_id": pet["id"], "date": "2024-01-15", "vaccine_type": "DHPP",
+            "next_due_date": soon, "reminder_enabled": reminder_enabled
+        })
+    upcoming = client.get(f"/vaccine-logs/pet/{pet['id']}/upcoming").json["upcoming_vaccines"]
+    assert [(log["vaccine_type"], log["reminder_enabled"]) for log in upcoming] == [("DHPP", True)]
+
+
+def test_reminders(client, pet):
+    today = date.today()
+    for days, message in [(-3, "洗澡"), (2, "剪指甲"), (20, "体检")]:
+        response = client.post("/reminders/", json={
+            "pet_id": pet["id"], "reminder_type": "general",
+            "due_date": (today + timedelta(days=days)).strftime("%Y-%m-%d"), "message": message
+        })
+        assert response.status_code == 201, response.json
+
+    user_id = pet["user_id"]
+    assert client.get("/reminders/overdue").status_code == 400
+    overdue = client.get(f"/reminders/overdue?user_id={user_id}").json["overdue_reminders"]
+    assert [reminder["message"] for reminder in overdue] == ["洗澡"]
+    assert client.get(f"/reminders/overdue?user_id={user_id}&days=2").json["overdue_reminders"] == []
+    due_soon = client.get(f"/reminders/due-soon?user_id={user_id}").json["due_soon_reminders"]
+    assert [reminder["message"] for reminder in due_soon] == ["剪指甲"]
+    assert client.get(f"/reminders/due-soon?user_id={user_id}&days=30&counts_only=1").json == {"count": 2}
+    assert client.get(f"/reminders/due-soon?user_id={user_id + 1}&days=30&counts_only=1").json == {"count": 0}
+    assert client.get(f"/reminders/due-soon?user_id={user_id}&days=0").status_code == 400
+
+    first = client.get(f"/reminders/due-soon?user_id={user_id}&days=30&limit=1").json
+    assert [reminder["message"] for reminder in first["due_soon_reminders"]] == ["剪指甲"]
+    second = client.get(f"/reminders/due-soon?user_id={user_id}&days=30&limit=1&cursor={first['next_cursor']}").json
+    assert [reminder["message"] for reminder in second["due_soon_reminders"]] == ["体检"]
+    assert second["next_cursor"] is None
+
+    response = client.patch(f"/reminders/{overdue[0]['id']}/mark-sent")
+    assert response.json["reminder"]["is_sent"] is True
+    assert client.get(f"/reminders/overdue?user_id={user_id}").json["overdue_reminders"] == []
+
+    # 已发送的提醒不再出现在仪表盘的即将到期列表中
+    client.patch(f"/reminders/{first['due_soon_reminders'][0]['id']}/mark-sent")
+    upcoming = client.get(f"/reminders/upcoming?pet_ids={pet['id']}").json["reminders"][str(pet["id"])]
+    assert [reminder["message"] for reminder in upcoming] == ["体检"]
+
+
+def test_pet_profile(client, pet):
+    client.post("/weight-logs/", json={"pet_id": pet["id"], "date": "2024-01-01", "weight_kg": 10.0})
+    response = client.get(f"/pets/{pet['id']}/profile?n=5")
+    assert response.status_code == 200
+    assert response.json["pet"]["id"] == pet["id"]
+    assert len(response.json["weight_logs"]) == 1
+    assert response.json["open_reminders"] == []
+
+
+def test_user_export_ndjson(client, user, pet):
+    client.post("/weight-logs/", json={"pet_id": pet["id"], "date": "2024-01-01", "weight_kg": 10.0})
+    response = client.get(f"/users/{user['id']}/export")
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["type"] for line in lines] == ["pet", "weight_log"]
@@ -0,0 +1,77 @@
+"""
+缓存测试：LRUCache 的 TTL 和命中统计，GET 接口的响应缓存在写操作后失效
+"""
+
+import time
+from datetime import date
+
+from cache import LRUCache
+from conditional import touch_pet
+from config import db
+from models import WeightLog
+
+
+def test_lru_cache_ttl_and_stats():
+    cache = LRUCache(maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=10)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # 淘汰最久未使用的 b
+    assert cache.get("b") is None
+
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "size": 1, "maxsize": 2}
+
+
+def test_pet_responses_are_cached_until_written(client):
+    user = client.post("/users/register", json={
+        "firstName": "A", "lastName": "S", "email": "a@example.com", "password": "x"
+    }).json
+    pet = client.post("/pets/", json={"user_id": user["id"], "name": "Bobby"}).json["pet"]
+
+    assert client.get(f"/pets/{pet['id']}").headers["X-Cache"] == "MISS"
+    assert client.get(f"/pets/{pet['id']}").headers["X-Cache"] == "HIT"
+    assert client.get(f"/pets/?user_id={user['id']}").headers["X-Cache"] == "MISS"
+
+    client.patch(f"/pets/{pet['id']}", json={"name": "Bob"})
+    response = client.get(f"/pets/{pet['id']}")
+    assert response.headers["X-Cache"] == "MISS" and response.json["pet"]["name"] == "Bob"
+    response = client.get(f"/pets/?user_id={user['id']}")
+    assert response.headers["X-Cache"] == "MISS" and response.json["pets"][0]["name"] == "Bob"
+
+    url = f"/weight-logs/pet/{pet['id']}"
+    assert client.get(url).json["weight_logs"] == []
+    assert client.get(url).headers["X-Cache"] == "HIT"
+    client.post("/weight-logs/", json={"pet_id": pet["id"], "date": "2024-01-01", "weight_kg": 10.0})
+    assert len(client.get(url).json["weight_logs"]) == 1
+
+    # 其他宠物的写操作不影响这只宠物的缓存
+    other = client.post("/pets/", json={"user_id": user["id"], "name": "Kitty"}).json["pet"]
+    client.post("/weight-logs/", json={"pet_id": other["id"], "date": "2024-01-01", "weight_kg": 4.0})
+    assert client.get(url).headers["X-Cache"] == "HIT"
+
+    stats = client.get("/metrics/cache").json["response_cache"]
+    assert stats["backend"] == "memory"
+    assert stats["hits"] >= 3 and stats["misses"] >= 5
+
+
+def test_writes_from_other_processes_bypass_cached_responses(app, client):
+    user = client.post("/users/register", json={
+        "firstName": "A", "lastName": "S", "email": "a@example.com", "password": "x"
+    }).json
+    pet = client.post("/pets/", json={"user_id": user["id"], "name": "Bobby"}).json["pet"]
+    url = f"/weight-logs/pet/{pet['id']}"
+    assert client.get(url).json["weight_logs"] == []
+    etag = client.get(url).headers["ETag"]
+
+    # 其他进程（另一个 worker、reminder_worker.py）写入时只更新 pet.version，不会让这个进程的缓存失效
+    with app.app_context():
+        db.session.add(WeightLog(pet_id=pet["id"], date=date(2024, 1, 1), weight_kg=10.0))
+        touch_pet(pet["id"])
+        db.session.commit()
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["X-Cache"] == "MISS"
+    assert len(response.json["weight_logs"]) == 1
+    assert client.get(url).headers["X-Cache"] == "HIT"
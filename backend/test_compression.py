@@ -0,0 +1,62 @@
+"""
+响应压缩测试：按 Accept-Encoding 协商、最小压缩大小、流式导出、按 Blueprint 关闭
+"""
+
+import gzip
+import json
+
+import pytest
+
+from compression import brotli
+
+
+@pytest.fixture
+def pet_with_logs(client):
+    user = client.post("/users/register", json={
+        "firstName": "A", "lastName": "S", "email": "a@example.com", "password": "x"
+    }).json
+    pet = client.post("/pets/", json={"user_id": user["id"], "name": "Bobby"}).json["pet"]
+    client.post("/diet-logs/bulk", json=[
+        {"pet_id": pet["id"], "date": f"2024-01-{day:02d}", "description": "dry food", "food_amount": 80, "unit": "g"}
+        for day in range(1, 29)
+    ])
+    return user, pet
+
+
+def test_large_json_is_gzipped_and_small_is_not(client, pet_with_logs):
+    _, pet = pet_with_logs
+    url = f"/diet-logs/pet/{pet['id']}"
+    plain = client.get(url)
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert len(response.data) < len(plain.data) / 3
+    assert json.loads(gzip.decompress(response.data)) == plain.json
+
+    # 压缩后 ETag 仍然可以用于条件请求
+    etag = response.headers["ETag"]
+    assert client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag}).status_code == 304
+
+    small = client.get("/pets/999", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli is not installed")
+def test_brotli_is_preferred(client, pet_with_logs):
+    _, pet = pet_with_logs
+    response = client.get(f"/diet-logs/pet/{pet['id']}", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert json.loads(brotli.decompress(response.data))["diet_logs"]
+
+
+def test_streamed_export_and_blueprint_override(app, client, pet_with_logs):
+    user, pet = pet_with_logs
+    response = client.get(f"/users/{user['id']}/export", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    lines = gzip.decompress(response.data).decode().splitlines()
+    assert len(lines) == 1 + 28
+
+    app.config["COMPRESS_BLUEPRINTS"] = {"diet_logs": None}
+    response = client.get(f"/diet-logs/pet/{pet['id']}", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
@@ -0,0 +1,60 @@
+"""
+ETag 测试：按版本号生成的 ETag、If-None-Match 返回 304、写操作后 ETag 变化
+"""
+
+
+def register(client):
+    return client.post("/users/register", json={
+        "firstName": "A", "lastName": "S", "email": "a@example.com", "password": "x"
+    }).json
+
+
+def test_pet_log_list_revalidates_with_etag(client):
+    user = register(client)
+    pet = client.post("/pets/", json={"user_id": user["id"], "name": "Bobby"}).json["pet"]
+
+    url = f"/weight-logs/pet/{pet['id']}"
+    response = client.get(url)
+    etag = response.headers["ETag"]
+    assert response.status_code == 200 and etag.startswith("W/")
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.data == b""
+
+    # 不同的查询参数有各自的 ETag
+    assert client.get(f"{url}?limit=1").headers["ETag"] != etag
+
+    response = client.post("/weight-logs/", json={"pet_id": pet["id"], "date": "2024-01-01", "weight_kg": 10.0})
+    assert response.status_code == 201, response.json
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200 and len(response.json["weight_logs"]) == 1
+    assert response.headers["ETag"] != etag
+
+    # 其他宠物的写操作不改变这只宠物的 ETag
+    etag = response.headers["ETag"]
+    other = client.post("/pets/", json={"user_id": user["id"], "name": "Kitty"}).json["pet"]
+    response = client.post("/diet-logs/", json={
+        "pet_id": other["id"], "date": "2024-01-01", "description": "dry food", "food_type": "dry"
+    })
+    assert response.status_code == 201, response.json
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_user_pet_list_and_fallback_etags(client):
+    user = register(client)
+    url = f"/pets/?user_id={user['id']}"
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    pet = client.post("/pets/", json={"user_id": user["id"], "name": "Bobby"}).json["pet"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+    etag = client.get(url).headers["ETag"]
+    client.patch(f"/pets/{pet['id']}", json={"name": "Bob"})
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+    # 没有版本号的接口按内容哈希生成 ETag
+    response = client.get("/users/")
+    assert client.get("/users/", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+    assert "ETag" not in client.get("/pets/999").headers
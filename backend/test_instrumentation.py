@@ -0,0 +1,66 @@
+"""
+请求统计测试：Server-Timing 响应头、/metrics 的 Prometheus 输出、慢请求的 cProfile 文件
+"""
+
+import json
+import os
+import re
+
+from config import db
+from main import create_app
+
+
+def test_server_timing_and_prometheus_metrics(client):
+    user = client.post("/users/register", json={
+        "firstName": "A", "lastName": "S", "email": "a@example.com", "password": "x"
+    }).json
+    client.post("/pets/", json={"user_id": user["id"], "name": "Bobby"})
+
+    timing = client.get("/users/").headers["Server-Timing"]
+    match = re.fullmatch(r'app;dur=[\d.]+, db;dur=[\d.]+;desc="(\d+) queries"', timing)
+    assert match and int(match.group(1)) == 2  # 用户 + 预加载的宠物
+
+    response = client.get("/metrics")
+    assert response.status_code == 200 and response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    assert 'paw_responses_total{blueprint="users",method="GET",status="200"} 1' in text
+    assert 'paw_request_duration_seconds_count{blueprint="pets",method="POST"} 1' in text
+    assert 'paw_request_sql_queries_bucket{blueprint="users",method="GET",le="2"} 1' in text
+    assert 'paw_cache_requests_total{cache="response_cache",result="miss"}' in text
+
+
+def test_slow_requests_are_profiled(tmp_path):
+    app = create_app({
+        "TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://", "PROFILE_SLOW_MS": 0, "PROFILE_DIR": str(tmp_path)
+    })
+    with app.app_context():
+        db.create_all()
+        app.test_client().get("/users/")
+        db.drop_all()
+
+    assert len(list(tmp_path.glob("*-GET-users-get_users-*ms.prof"))) == 1
+
+
+def test_metrics_are_merged_across_workers(tmp_path):
+    app = create_app({
+        "TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://", "METRICS_MULTIPROC_DIR": str(tmp_path)
+    })
+    # 另一个 worker 进程写入的统计
+    (tmp_path / "metrics-1.json").write_text(json.dumps({
+        "counters": {"paw_responses_total": [[[["blueprint", "users"], ["method", "GET"], ["status", "200"]], 2]]},
+        "histograms": {"paw_request_sql_queries": [
+            [[["blueprint", "users"], ["method", "GET"]], [0, 0, 1, 1, 1, 1, 1, 1, 1], 4.0, 2]
+        ]},
+    }))
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        client.get("/users/")
+        text = client.get("/metrics").get_data(as_text=True)
+        db.drop_all()
+
+    assert 'paw_responses_total{blueprint="users",method="GET",status="200"} 3' in text
+    assert 'paw_request_sql_queries_count{blueprint="users",method="GET"} 3' in text
+    assert 'paw_request_sql_queries_bucket{blueprint="users",method="GET",le="2"} 2' in text
+    assert 'paw_cache_requests_total{cache="response_cache",result="miss"}' in text
+    assert (tmp_path / f"metrics-{os.getpid()}.json").exists()
@@ -0,0 +1,100 @@
+"""
+数据库迁移测试
+- 旧数据库: 复制 instance/mydatabase.db（迁移系统引入前的表结构），插入旧格式的数据后升级
+- 新数据库: 在 SQLite 和 PostgreSQL 的空库上从头执行全部迁移（见 conftest.py）
+"""
+
+import os
+import shutil
+
+import pytest
+from sqlalchemy import inspect, text
+
+import migrations.ops
+from config import db
+from main import create_app
+from migrations import discover, status, upgrade
+
+LEGACY_DATABASE = os.path.join(os.path.dirname(__file__), "instance", "mydatabase.db")
+ALL_VERSIONS = [version for version, _, _ in discover()]
+
+
+@pytest.fixture
+def legacy_app(tmp_path, monkeypatch):
+    path = tmp_path / "legacy.db"
+    shutil.copy(LEGACY_DATABASE, path)
+    # 用很小的批次确保分批回填的每个分支都被执行到
+    monkeypatch.setattr(migrations.ops, "BATCH_SIZE", 2)
+
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+    with app.app_context():
+        db.session.execute(text("DELETE FROM pet"))
+        db.session.execute(text("DELETE FROM user"))
+        db.session.execute(text(
+            "INSERT INTO user (id, first_name, last_name, email, password) VALUES "
+            "(1, 'A', 'S', ' Alessia@Example.COM', 'x'), (2, 'B', 'S', 'b@example.com', 'x')"
+        ))
+        db.session.execute(text("INSERT INTO pet (id, name, user_id) VALUES (1, 'Bobby', 1)"))
+        db.session.execute(text(
+            "INSERT INTO diet_log (pet_id, date, description, meal_type, food_amount, unit) VALUES "
+            "(1, '2024-01-01', '狗粮', '早餐', 100, 'g'), (1, '2024-01-01', '狗粮', '早餐', 0.1, 'kg'), "
+            "(1, '2024-01-02', '罐头', NULL, 1, '罐')"
+        ))
+        db.session.execute(text(
+            "INSERT INTO vaccine_log (pet_id, date, vaccine_type, next_due_date, reminder_enabled) VALUES "
+            "(1, '2024-01-01', 'Rabies', '2025-01-01', NULL), (1, '2024-02-01', 'DHPP', NULL, 0)"
+        ))
+        db.session.execute(text(
+            "INSERT INTO reminder (pet_id, reminder_type, due_date, message, is_sent) VALUES "
+            "(1, 'general', '2024-01-01', '洗澡', NULL), (1, 'general', '2024-01-02', '剪指甲', NULL), "
+            "(1, 'vaccine', '2024-01-03', '打疫苗', 1)"
+        ))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_upgrade_legacy_database(legacy_app):
+    with legacy_app.app_context():
+        assert upgrade(db.engine) == ALL_VERSIONS
+        assert upgrade(db.engine) == []
+        assert all(applied for _, _, applied in status(db.engine))
+
+        inspector = inspect(db.engine)
+        assert {"feeding_time", "notes"} <= {c["name"] for c in inspector.get_columns("diet_log")}
+        assert {"title", "is_completed", "created_at"} <= {c["name"] for c in inspector.get_columns("reminder")}
+        assert "ix_reminder_is_sent_due_date" in {i["name"] for i in inspector.get_indexes("reminder")}
+        assert inspector.has_table("diet_daily_rollup")
+
+        rows = db.session.execute(text("SELECT is_sent, is_completed FROM reminder ORDER BY id")).fetchall()
+        assert [tuple(row) for row in rows] == [(0, 0), (0, 0), (1, 0)]
+        rows = db.session.execute(text("SELECT reminder_enabled FROM vaccine_log ORDER BY id")).fetchall()
+        assert [row[0] for row in rows] == [1, 0]
+        emails = db.session.execute(text("SELECT email FROM user ORDER BY id")).scalars().all()
+        assert emails == ["alessia@example.com", "b@example.com"]
+
+    client = legacy_app.test_client()
+    summary = client.get("/diet-logs/pet/1/summary").json["summary"]
+    assert [(s["period_start"], s["total_grams"], s["unconverted_count"]) for s in summary] == [
+        ("2024-01-01", 200.0, 0), ("2024-01-02", 0.0, 1)
+    ]
+
+    response = client.post("/reminders/", json={
+        "pet_id": 1, "reminder_type": "general", "due_date": "2024-03-01", "message": "体检"
+    })
+    assert response.status_code == 201, response.json
+    assert response.json["reminder"]["is_sent"] is False
+
+
+def test_upgrade_empty_database(app):
+    with app.app_context():
+        db.drop_all()
+        assert upgrade(db.engine) == ALL_VERSIONS
+        assert upgrade(db.engine) == []
+
+        inspector = inspect(db.engine)
+        assert set(db.metadata.tables) <= set(inspector.get_table_names())
+        for table in db.metadata.sorted_tables:
+            assert {c.name for c in table.columns} == {c["name"] for c in inspector.get_columns(table.name)}
+            assert {i.name for i in table.indexes} <= {i["name"] for i in inspector.get_indexes(table.name)}
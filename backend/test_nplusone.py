@@ -0,0 +1,92 @@
+"""
+N+1 检测测试：conftest.py 中打开了 NPLUSONE_RAISE，接口逐行懒加载时请求直接抛出 NPlusOneError
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from flask import Response
+
+from config import db
+from models import User
+from query_debug import NPlusOneError, query_debugger, statement_shape
+
+PET_COUNT = 8
+
+
+def test_statement_shape_ignores_in_list_length():
+    assert statement_shape("SELECT * FROM pet WHERE pet.id IN (?, ?, ?)") == \
+        statement_shape("SELECT * FROM pet\n WHERE pet.id IN (?)")
+    assert statement_shape("WHERE id IN (%(id_1_1)s, %(id_1_2)s)") == "WHERE id IN (?)"
+
+
+def test_lazy_loading_per_row_is_detected(app):
+    with app.app_context():
+        db.session.add_all([
+            User(first_name="A", last_name="S", email=f"user{n}@example.com", password="x")
+            for n in range(PET_COUNT)
+        ])
+        db.session.commit()
+
+    with app.test_request_context("/users/"):
+        query_debugger.before_request()
+        for user in User.query.all():
+            user.pets  # 每个用户一条 SELECT
+        with pytest.raises(NPlusOneError, match=f"{PET_COUNT}x SELECT"):
+            query_debugger.after_request(Response())
+
+    # 流式响应的查询在 after_request 之后执行，关闭响应时检查
+    with app.test_request_context("/users/"):
+        query_debugger.before_request()
+        response = query_debugger.after_request(Response(iter([b"[]"])))
+        for user in User.query.all():
+            user.pets
+        with pytest.raises(NPlusOneError, match=f"{PET_COUNT}x SELECT"):
+            response.close()
+
+
+def test_list_endpoints_do_not_query_per_row(client):
+    user = client.post("/users/register", json={
+        "firstName": "A", "lastName": "S", "email": "a@example.com", "password": "x"
+    }).json
+    pet_ids = []
+    for n in range(PET_COUNT):
+        response = client.post("/pets/", json={"user_id": user["id"], "name": f"Pet{n}"})
+        assert response.status_code == 201, response.json
+        pet_id = response.json["pet"]["id"]
+        pet_ids.append(pet_id)
+        for url, items in [
+            ("/diet-logs/bulk", [
+                {"pet_id": pet_id, "date": f"2024-01-{day:02d}", "description": "dry", "meal_type": "breakfast"}
+                for day in range(1, PET_COUNT + 1)
+            ]),
+            ("/weight-logs/bulk", [{"pet_id": pet_id, "date": "2024-01-01", "weight_kg": 5}]),
+            ("/vaccine-logs/bulk", [{"pet_id": pet_id, "date": "2024-01-01", "vaccine_type": "Rabies"}]),
+            # 过期的提醒出现在 /reminders/overdue，未来的出现在 /reminders/upcoming
+            ("/reminders/bulk", [
+                {"pet_id": pet_id, "reminder_type": "general", "message": "Check", "due_date": due_date}
+                for due_date in ("2024-01-01", (date.today() - timedelta(days=1)).isoformat(),
+                                 (date.today() + timedelta(days=1)).isoformat())
+            ]),
+        ]:
+            response = client.post(url, json=items)
+            assert response.status_code == 201, (url, response.json)
+
+    ids = ",".join(str(pet_id) for pet_id in pet_ids)
+    for url in [
+        "/users/",
+        f"/users/{user['id']}/export",
+        f"/pets/?user_id={user['id']}",
+        f"/pets/{pet_ids[0]}/profile",
+        f"/diet-logs/pet/{pet_ids[0]}",
+        f"/diet-logs/pet/{pet_ids[0]}/summary",
+        f"/diet-logs/latest?pet_ids={ids}",
+        f"/weight-logs/latest?pet_ids={ids}",
+        f"/vaccine-logs/latest?pet_ids={ids}",
+        f"/reminders/upcoming?pet_ids={ids}",
+        f"/reminders/overdue?user_id={user['id']}",
+    ]:
+        response = client.get(url)
+        assert response.status_code == 200, url
+        response.get_data()
+        response.close()  # 流式响应在关闭时检查
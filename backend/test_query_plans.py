@@ -0,0 +1,157 @@
+"""
+检查各个列表接口的查询是否走索引（EXPLAIN QUERY PLAN）
+请求真实的接口（或调用后台任务的查询构造函数），记录执行的 SQL 和绑定参数，再对同样的语句执行 EXPLAIN QUERY PLAN，
+接口的查询改变时这里检查的也是改变后的查询
+运行: python -m pytest test_query_plans.py
+"""
+
+import re
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from config import db
+from main import create_app
+from pagination import encode_key
+from reminder_worker import due_reminders_statement, vaccine_reminders_statement
+from routes.users import _email_to_user_id
+
+TODAY = date(2024, 3, 1)
+
+
+@pytest.fixture(scope="module")
+def app():
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://", "CACHE_ENABLED": False})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    _email_to_user_id.clear()
+
+
+@pytest.fixture(scope="module")
+def pets(app):
+    """一个用户和他的三只宠物，返回 (user_id, [pet_id, ...])"""
+    client = app.test_client()
+    user = client.post("/users/register", json={
+        "firstName": "A", "lastName": "S", "email": "a@example.com", "password": "x"
+    }).json
+    pet_ids = [
+        client.post("/pets/", json={"user_id": user["id"], "name": f"Pet{n}"}).json["pet"]["id"]
+        for n in range(3)
+    ]
+    return user["id"], pet_ids
+
+
+def query_plans(table, run):
+    """执行 run()，对其间所有读取 table 的 SELECT 用同样的参数执行 EXPLAIN QUERY PLAN，返回计划列表"""
+    statements = []
+    reads_table = re.compile(rf'\bFROM "?{table}"?\b')
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and reads_table.search(statement):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        run()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+
+    assert statements, f"no SELECT on {table}"
+    with db.engine.connect() as conn:
+        return [
+            " | ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+            for statement, parameters in statements
+        ]
+
+
+def route_plans(app, table, url):
+    def run():
+        response = app.test_client().get(url)
+        assert response.status_code == 200, (url, response.get_data(as_text=True))
+        response.get_data()
+        response.close()
+    return query_plans(table, run)
+
+
+# 各个按宠物的记录列表：按 pet_id 过滤、按 (date, id) 倒序游标分页
+PER_PET_LOG_URLS = {
+    "diet_logs": ("diet_log", "/diet-logs/pet/{pet_id}"),
+    "diet_logs_date_range": ("diet_log", "/diet-logs/pet/{pet_id}?start_date=2024-01-01&end_date=2024-01-31"),
+    "weight_logs": ("weight_log", "/weight-logs/pet/{pet_id}"),
+    # 游标分页的第二页及之后
+    "weight_logs_after_cursor": ("weight_log", "/weight-logs/pet/{pet_id}?cursor=" + encode_key(date(2024, 1, 1), 42)),
+    "vaccine_logs": ("vaccine_log", "/vaccine-logs/pet/{pet_id}"),
+    "pet_diet_logs": ("diet_log", "/pets/{pet_id}/diet_logs"),
+    "pet_weight_logs": ("weight_log", "/pets/{pet_id}/weight_logs"),
+    "pet_vaccine_logs": ("vaccine_log", "/pets/{pet_id}/vaccine_logs"),
+}
+
+
+@pytest.mark.parametrize("name", sorted(PER_PET_LOG_URLS))
+def test_per_pet_log_listing_uses_pet_date_index(app, pets, name):
+    table, url = PER_PET_LOG_URLS[name]
+    for plan in route_plans(app, table, url.format(pet_id=pets[1][0])):
+        assert f"USING INDEX ix_{table}_pet_id_date" in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
+
+
+def test_upcoming_vaccines_use_indexes(app, pets):
+    # 单只宠物 30 天内到期的疫苗: 该宠物的记录不多，按 (pet_id, date) 取出后排序
+    for plan in route_plans(app, "vaccine_log", f"/vaccine-logs/pet/{pets[1][0]}/upcoming"):
+        assert "USING INDEX ix_vaccine_log_pet_id_date (pet_id=?)" in plan, plan
+
+    # 后台任务扫描所有宠物即将到期的疫苗: next_due_date 上的范围查询
+    [plan] = query_plans("vaccine_log", lambda: db.session.execute(vaccine_reminders_statement(TODAY, 7, 100)).all())
+    assert "USING INDEX ix_vaccine_log_next_due_date" in plan, plan
+
+
+def test_user_pet_list_sorted_by_name_uses_index(app, pets):
+    user_id = pets[0]
+    for plan in route_plans(app, "pet", f"/pets/?user_id={user_id}&sort=name&per_page=2"):
+        assert "USING INDEX ix_pet_user_id_name" in plan or "USING COVERING INDEX ix_pet_user_id_name" in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
+
+    for plan in route_plans(app, "pet", "/pets/?species=Dog&breed=Corgi"):
+        assert "USING INDEX ix_pet_species_breed" in plan, plan
+
+
+def test_worker_due_reminders_use_index(app):
+    # 后台任务扫描所有用户到期未发送的提醒
+    [plan] = query_plans("reminder", lambda: db.session.execute(due_reminders_statement(TODAY, 7, 100)).all())
+    assert "USING INDEX ix_reminder_is_sent_due_date" in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
+
+
+@pytest.mark.parametrize("view", [
+    "due-soon?user_id={user_id}",
+    "due-soon?user_id={user_id}&counts_only=1",
+    "due-soon?user_id={user_id}&limit=1&cursor=" + encode_key(TODAY, 42),
+    "overdue?user_id={user_id}&days=30",
+    "overdue?user_id={user_id}",
+])
+def test_user_scoped_due_reminders_use_pet_index(app, pets, view):
+    # 单次提醒（每只宠物一个分支）和循环提醒都按 (pet_id, is_sent, due_date) 读取这个用户的宠物，
+    # 不扫描全局的 (is_sent, due_date) 索引
+    plans = route_plans(app, "reminder", "/reminders/" + view.format(user_id=pets[0]))
+    for plan in plans:
+        assert "ix_reminder_pet_id_is_sent_due_date (pet_id=? AND is_sent=?" in plan, plan
+        assert "ix_reminder_is_sent_due_date" not in plan, plan
+
+
+def test_latest_per_pet_reads_each_pet_through_index(app, pets):
+    pet_ids = ",".join(map(str, pets[1]))
+    [plan] = route_plans(app, "weight_log", f"/weight-logs/latest?pet_ids={pet_ids}")
+    assert plan.count("USING COVERING INDEX ix_weight_log_pet_id_date (pet_id=?)") == 3, plan
+
+
+def test_upcoming_reminders_per_pet_use_index(app, pets):
+    pet_ids = ",".join(map(str, pets[1][:2]))
+    [plan] = route_plans(app, "reminder", f"/reminders/upcoming?pet_ids={pet_ids}")
+    assert plan.count(
+        "USING COVERING INDEX ix_reminder_pet_id_is_sent_is_completed_due_date "
+        "(pet_id=? AND is_sent=? AND is_completed=? AND due_date>?)"
+    ) == 2, plan
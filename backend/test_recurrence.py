@@ -0,0 +1,131 @@
+"""
+循环提醒测试：规则校验、只在请求的窗口内展开、后台任务按发生日期写入通知
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from models import Notification, Reminder
+from recurrence import occurrences, parse_recurrence
+from reminder_worker import run_once
+
+
+def test_parse_recurrence():
+    assert parse_recurrence("rrule:freq=monthly", date(2024, 1, 31)) == ("FREQ=MONTHLY", None)
+    assert parse_recurrence("FREQ=WEEKLY;COUNT=3", date(2024, 1, 1)) == ("FREQ=WEEKLY;COUNT=3", date(2024, 1, 15))
+    assert parse_recurrence("FREQ=DAILY;UNTIL=20240110", date(2024, 1, 1), date(2024, 1, 5))[1] == date(2024, 1, 5)
+    for rule in ("FREQ=HOURLY", "COUNT=3", "FREQ=DAILY;BYDAY=XX", "DTSTART:20240101\nRRULE:FREQ=DAILY"):
+        with pytest.raises(ValueError):
+            parse_recurrence(rule, date(2024, 1, 1))
+    with pytest.raises(ValueError):
+        parse_recurrence("FREQ=DAILY", date(2024, 1, 10), date(2024, 1, 1))
+
+
+def test_occurrences_are_limited_to_the_window():
+    start = date(2020, 1, 1)
+    assert occurrences("FREQ=MONTHLY", start, date(2024, 1, 15), date(2024, 4, 1)) == [
+        date(2024, 2, 1), date(2024, 3, 1), date(2024, 4, 1)
+    ]
+    assert occurrences("FREQ=MONTHLY", start, date(2024, 1, 15), date(2024, 4, 1), after=date(2024, 3, 1)) == [
+        date(2024, 4, 1)
+    ]
+    assert occurrences("FREQ=DAILY", start, date(2024, 1, 1), date(2024, 1, 31), recurrence_end=date(2024, 1, 2)) == [
+        date(2024, 1, 1), date(2024, 1, 2)
+    ]
+
+
+def test_recurring_reminders_in_views_and_worker(app, client):
+    today = date.today()
+    user = client.post("/users/register", json={
+        "firstName": "A", "lastName": "S", "email": "a@example.com", "password": "x"
+    }).json
+    pet_id = client.post("/pets/", json={"user_id": user["id"], "name": "Bobby"}).json["pet"]["id"]
+    response = client.post("/reminders/", json={
+        "pet_id": pet_id, "reminder_type": "general", "message": "驱虫药",
+        "due_date": (today - timedelta(days=10)).isoformat(), "recurrence_rule": "FREQ=DAILY;INTERVAL=3"
+    })
+    assert response.status_code == 201, response.json
+    reminder = response.json["reminder"]
+    assert reminder["recurrence_rule"] == "FREQ=DAILY;INTERVAL=3" and reminder["recurrence_end"] is None
+    client.post("/reminders/", json={
+        "pet_id": pet_id, "reminder_type": "general", "message": "体检", "due_date": (today + timedelta(days=1)).isoformat()
+    })
+    assert client.post("/reminders/", json={
+        "pet_id": pet_id, "reminder_type": "general", "message": "x", "due_date": today.isoformat(),
+        "recurrence_rule": "FREQ=MINUTELY"
+    }).status_code == 400
+
+    expected = [(today + timedelta(days=offset)).isoformat() for offset in (-10, -7, -4, -1, 2, 5)]
+    window = f"start_date={expected[0]}&end_date={(today + timedelta(days=6)).isoformat()}"
+    reminders = client.get(f"/reminders/pet/{pet_id}?{window}&reminder_type=general").json["reminders"]
+    assert [r["due_date"] for r in reminders if r["id"] == reminder["id"]] == expected
+    assert len(reminders) == len(expected) + 1
+    # 不传窗口时循环提醒只返回规则本身
+    assert len(client.get(f"/reminders/pet/{pet_id}").json["reminders"]) == 2
+
+    due_soon = client.get(f"/reminders/due-soon?user_id={user['id']}&limit=2").json
+    assert [(r["message"], r["due_date"]) for r in due_soon["due_soon_reminders"]] == [
+        ("体检", (today + timedelta(days=1)).isoformat()), ("驱虫药", expected[4])
+    ]
+    rest = client.get(f"/reminders/due-soon?user_id={user['id']}&limit=2&cursor={due_soon['next_cursor']}").json
+    # counts_only 返回整个窗口的总数，单次提醒和循环提醒的发生都不受游标影响
+    assert client.get(
+        f"/reminders/due-soon?user_id={user['id']}&counts_only=1&cursor={due_soon['next_cursor']}"
+    ).json == {"count": 3}
+    assert [r["due_date"] for r in rest["due_soon_reminders"]] == [expected[5]] and rest["next_cursor"] is None
+    overdue = client.get(f"/reminders/overdue?user_id={user['id']}&days=5").json["overdue_reminders"]
+    assert [r["due_date"] for r in overdue] == expected[2:4]
+
+    app.config["REMINDER_LEAD_DAYS"] = 2
+    with app.app_context():
+        assert run_once(today) == (0, 2)
+        assert run_once(today) == (0, 0)
+        notifications = Notification.query.filter_by(reminder_id=reminder["id"]).order_by(Notification.due_date)
+        assert [n.due_date.isoformat() for n in notifications] == expected[:5]
+        series = Reminder.query.get(reminder["id"])
+        assert series.completed_through == today + timedelta(days=2) and not series.is_sent
+
+    # 已发送的发生不再出现在过期/即将到期视图中
+    assert client.get(f"/reminders/overdue?user_id={user['id']}&counts_only=1").json == {"count": 0}
+    assert client.get(f"/reminders/due-soon?user_id={user['id']}&counts_only=1").json == {"count": 1}
+
+    # 手动标记下一次发生为已发送
+    response = client.patch(f"/reminders/{reminder['id']}/mark-sent")
+    assert response.json["reminder"]["completed_through"] == expected[5]
+    assert response.json["reminder"]["is_sent"] is False
+
+    # 改成有限规则后已发送的进度截断到新的最后一次发生，整个系列已经发送完
+    response = client.put(f"/reminders/{reminder['id']}", json={"recurrence_rule": "FREQ=DAILY;INTERVAL=3;COUNT=2"})
+    assert response.json["reminder"]["recurrence_end"] == expected[1]
+    assert response.json["reminder"]["completed_through"] == expected[1]
+    assert response.json["reminder"]["is_sent"] is True
+
+
+def test_update_recurring_reminder(client):
+    user = client.post("/users/register", json={
+        "firstName": "A", "lastName": "S", "email": "a@example.com", "password": "x"
+    }).json
+    pet_id = client.post("/pets/", json={"user_id": user["id"], "name": "Bobby"}).json["pet"]["id"]
+    reminder_id = client.post("/reminders/", json={
+        "pet_id": pet_id, "reminder_type": "general", "message": "驱虫药", "due_date": "2024-01-01",
+        "recurrence_rule": "FREQ=MONTHLY", "recurrence_end": "2024-12-31"
+    }).json["reminder"]["id"]
+    client.patch(f"/reminders/{reminder_id}/mark-sent")
+    client.patch(f"/reminders/{reminder_id}/mark-sent")
+
+    # 只改第一次发生的日期时保留单独设置的结束日期；新的开始日期之前的进度作废
+    reminder = client.put(f"/reminders/{reminder_id}", json={"due_date": "2024-03-15"}).json["reminder"]
+    assert reminder["recurrence_end"] == "2024-12-31"
+    assert reminder["completed_through"] is None and reminder["is_sent"] is False
+
+    reminder = client.put(f"/reminders/{reminder_id}", json={"recurrence_rule": "FREQ=WEEKLY"}).json["reminder"]
+    assert reminder["recurrence_rule"] == "FREQ=WEEKLY" and reminder["recurrence_end"] == "2024-12-31"
+    reminder = client.put(f"/reminders/{reminder_id}", json={"recurrence_end": None}).json["reminder"]
+    assert reminder["recurrence_end"] is None
+
+    # 规则推算出的结束日期不会沿用到新规则
+    reminder = client.put(f"/reminders/{reminder_id}", json={"recurrence_rule": "FREQ=WEEKLY;COUNT=2"}).json["reminder"]
+    assert reminder["recurrence_end"] == "2024-03-22"
+    reminder = client.put(f"/reminders/{reminder_id}", json={"recurrence_rule": "FREQ=DAILY"}).json["reminder"]
+    assert reminder["recurrence_end"] is None
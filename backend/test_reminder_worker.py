@@ -0,0 +1,82 @@
+"""
+后台提醒任务测试：疫苗到期自动生成提醒、到期提醒分批写入通知队列、重复执行不会重复写入
+"""
+
+from datetime import date, timedelta
+
+from config import db
+from models import Reminder
+from reminder_worker import run_once
+
+TODAY = date(2024, 3, 1)
+
+
+def day(offset):
+    return (TODAY + timedelta(days=offset)).strftime("%Y-%m-%d")
+
+
+def test_worker_materializes_due_vaccines_and_reminders(app, client):
+    app.config["REMINDER_WORKER_BATCH_SIZE"] = 2
+    user = client.post("/users/register", json={
+        "firstName": "A", "lastName": "S", "email": "a@example.com", "password": "x"
+    }).json
+    pet_id = client.post("/pets/", json={"user_id": user["id"], "name": "Bobby"}).json["pet"]["id"]
+    vaccine_id = client.post("/vaccine-logs/", json={
+        "pet_id": pet_id, "date": day(-365), "vaccine_type": "Rabies", "next_due_date": day(10)
+    }).json["vaccine_log"]["id"]
+    client.post("/vaccine-logs/", json={
+        "pet_id": pet_id, "date": day(-365), "vaccine_type": "DHPP", "next_due_date": day(5), "reminder_enabled": False
+    })
+    client.post("/reminders/bulk", json=[
+        {"pet_id": pet_id, "reminder_type": "general", "due_date": due, "message": f"due {due}"}
+        for due in (day(-2), day(0), day(3), day(30))
+    ])
+
+    with app.app_context():
+        assert run_once(TODAY) == (1, 3)  # Rabies 提醒还有 10 天，超出提前 7 天的窗口
+        assert run_once(TODAY) == (0, 0)
+
+    notifications = client.get(f"/notifications/?user_id={user['id']}&limit=2").json
+    assert [n["message"] for n in notifications["notifications"]] == [f"due {day(3)}", f"due {day(0)}"]
+    rest = client.get(f"/notifications/?user_id={user['id']}&before_id={notifications['next_before_id']}").json
+    assert [n["message"] for n in rest["notifications"]] == [f"due {day(-2)}"]
+    assert rest["next_before_id"] is None
+
+    # 修改到期日后未发送的自动提醒按新日期重新生成
+    client.put(f"/vaccine-logs/{vaccine_id}", json={"next_due_date": day(6)})
+    with app.app_context():
+        assert run_once(TODAY) == (1, 1)
+        assert Reminder.query.filter_by(vaccine_log_id=vaccine_id).one().is_sent
+
+    unread = client.get(f"/notifications/?user_id={user['id']}&unread=1").json["notifications"]
+    assert unread[0]["message"] == "Rabies 疫苗到期提醒" and unread[0]["due_date"] == day(6)
+    assert client.patch(f"/notifications/read-all?user_id={user['id']}").json["updated"] == 4
+    assert client.get(f"/notifications/?user_id={user['id']}&unread=1").json["notifications"] == []
+    assert client.get("/notifications/?user_id=999").json["notifications"] == []
+
+    # 删除疫苗记录时保留已发送的提醒
+    assert client.delete(f"/vaccine-logs/{vaccine_id}").status_code == 200
+    with app.app_context():
+        assert db.session.query(Reminder).filter_by(reminder_type="vaccine").one().vaccine_log_id is None
+
+
+def test_worker_requeues_reminder_marked_unsent(app, client):
+    user = client.post("/users/register", json={
+        "firstName": "A", "lastName": "S", "email": "a@example.com", "password": "x"
+    }).json
+    pet_id = client.post("/pets/", json={"user_id": user["id"], "name": "Bobby"}).json["pet"]["id"]
+    reminder_id = client.post("/reminders/", json={
+        "pet_id": pet_id, "reminder_type": "general", "due_date": day(0), "message": "first"
+    }).json["reminder"]["id"]
+    with app.app_context():
+        assert run_once(TODAY) == (0, 1)
+
+    # 改回未发送后已有同一到期日的通知，再次处理时跳过，不影响同一批的其他提醒
+    assert client.put(f"/reminders/{reminder_id}", json={"is_sent": False}).status_code == 200
+    client.post("/reminders/", json={"pet_id": pet_id, "reminder_type": "general", "due_date": day(1), "message": "second"})
+    with app.app_context():
+        assert run_once(TODAY) == (0, 2)
+        assert Reminder.query.get(reminder_id).is_sent
+
+    notifications = client.get(f"/notifications/?user_id={user['id']}").json["notifications"]
+    assert [n["message"] for n in notifications] == ["second", "first"]
@@ -0,0 +1,41 @@
+"""
+序列化测试：RowSerializer 的输出与模型 to_json() 一致，FastJSONProvider 与 Flask 默认实现的结果一致
+"""
+
+from datetime import date, datetime, time
+
+from flask import json
+from flask.json.provider import DefaultJSONProvider
+
+from config import db
+from models import User, Pet, DietLog, Reminder
+from serializers import SERIALIZERS
+
+
+def test_row_serializers_match_to_json(app):
+    with app.app_context():
+        user = User(first_name="A", last_name="S", email="a@example.com", password="x")
+        pet = Pet(name="Bobby", birth_date=date(2020, 5, 1), owner=user)
+        db.session.add_all([pet, Pet(name="Kitty", owner=user)])
+        db.session.flush()
+        db.session.add_all([
+            DietLog(pet_id=pet.id, date=date(2024, 1, 1), description="dry", food_amount=80.5,
+                    unit="g", feeding_time=time(7, 30, 15)),
+            DietLog(pet_id=pet.id, date=date(2024, 1, 2), description="wet"),
+            Reminder(pet_id=pet.id, title="Vaccine", due_date=date(2024, 2, 1),
+                     created_at=datetime(2024, 1, 1, 8, 0, 5, 123456)),
+        ])
+        db.session.commit()
+
+        for model, serializer in SERIALIZERS.items():
+            query = model.query.order_by(model.id)
+            assert serializer.all(query) == [item.to_json() for item in query.all()]
+
+
+def test_fast_json_provider_matches_default(app):
+    data = {"b": [1, 2.5, None, True], "a": {"名字": "Bobby", "x": 3}, "date": date(2024, 1, 1)}
+    with app.test_request_context():
+        fast = app.json.response(data).get_data()
+        default = DefaultJSONProvider(app).response(data).get_data()
+        assert json.loads(fast) == json.loads(default)
+        assert app.json.loads(app.json.dumps(data)) == json.loads(default)
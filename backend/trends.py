@@ -0,0 +1,114 @@
+"""
+体重趋势序列：按天/周/月分桶，在 SQL 中计算每个桶的 count/min/max/mean，
+再用窗口函数计算滑动平均和相对上一个桶的变化量
+
+结果按宠物缓存在进程内，缓存条目带上 pet.version：其他进程（多个 gunicorn worker）中的写操作
+同样会更新版本号，版本号不一致时重新计算；本进程内体重记录的增删改还会通过 invalidate_weight_trend() 直接失效
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Date, cast, func, select
+
+from cache import LRUCache
+from config import db
+from models import WeightLog
+
+BUCKETS = ("day", "week", "month")
+DEFAULT_WINDOW = 3
+MAX_WINDOW = 52
+
+# pet_id -> (pet.version, {(bucket, start_date, end_date, window): series})
+_trend_cache = LRUCache(maxsize=512)
+MAX_SERIES_PER_PET = 32
+
+
+def bucket_start(column, bucket, dialect="sqlite"):
+    """返回桶起始日期的 SQL 表达式（周从周一开始）"""
+    if dialect == "postgresql":
+        # PostgreSQL 的 date_trunc('week') 同样以周一为一周的开始
+        return cast(func.date_trunc(bucket, column), Date)
+    if bucket == "day":
+        return func.date(column)
+    if bucket == "week":
+        return func.date(column, "weekday 0", "-6 days")
+    return func.strftime("%Y-%m-01", column)
+
+
+def build_trend_statement(pet_id, bucket, start_date=None, end_date=None, window=DEFAULT_WINDOW, dialect="sqlite"):
+    bucket_column = bucket_start(WeightLog.date, bucket, dialect).label("bucket_start")
+    stats = select(
+        bucket_column,
+        func.count(WeightLog.id).label("count"),
+        func.min(WeightLog.weight_kg).label("min_kg"),
+        func.max(WeightLog.weight_kg).label("max_kg"),
+        func.avg(WeightLog.weight_kg).label("mean_kg"),
+    ).where(WeightLog.pet_id == pet_id)
+    if start_date:
+        stats = stats.where(WeightLog.date >= start_date)
+    if end_date:
+        stats = stats.where(WeightLog.date <= end_date)
+    stats = stats.group_by(bucket_column).subquery()
+
+    return select(
+        stats,
+        func.avg(stats.c.mean_kg).over(
+            order_by=stats.c.bucket_start, rows=(-(window - 1), 0)
+        ).label("rolling_mean_kg"),
+        func.lag(stats.c.mean_kg).over(order_by=stats.c.bucket_start).label("previous_mean_kg"),
+        func.lag(stats.c.bucket_start).over(order_by=stats.c.bucket_start).label("previous_bucket_start"),
+    ).order_by(stats.c.bucket_start)
+
+
+def compute_weight_trend(pet_id, bucket, start_date=None, end_date=None, window=DEFAULT_WINDOW):
+    """每个桶一行；变化率 rate_kg_per_day = 与上一个桶均值的差 / 两个桶起始日期相差的天数"""
+    dialect = db.session.get_bind().dialect.name
+    statement = build_trend_statement(pet_id, bucket, start_date, end_date, window, dialect)
+    series = []
+    for row in db.session.execute(statement):
+        change_kg = rate_kg_per_day = None
+        if row.previous_mean_kg is not None:
+            change_kg = row.mean_kg - row.previous_mean_kg
+            days = (_as_date(row.bucket_start) - _as_date(row.previous_bucket_start)).days
+            rate_kg_per_day = round(change_kg / days, 4) if days else None
+            change_kg = round(change_kg, 3)
+
+        series.append({
+            "bucket_start": _as_date(row.bucket_start).strftime("%Y-%m-%d"),
+            "count": row.count,
+            "min_kg": row.min_kg,
+            "max_kg": row.max_kg,
+            "mean_kg": round(row.mean_kg, 3),
+            "rolling_mean_kg": round(row.rolling_mean_kg, 3),
+            "change_kg": change_kg,
+            "rate_kg_per_day": rate_kg_per_day,
+        })
+    return series
+
+
+def get_weight_trend(pet_id, version, bucket, start_date=None, end_date=None, window=DEFAULT_WINDOW):
+    """带缓存的 compute_weight_trend()；version 为宠物当前的 pet.version"""
+    key = (bucket, start_date, end_date, window)
+    cached_version, pet_series = _trend_cache.get(pet_id, (None, None))
+    if cached_version != version:
+        pet_series = None
+    if pet_series is not None and key in pet_series:
+        return pet_series[key]
+
+    series = compute_weight_trend(pet_id, bucket, start_date, end_date, window)
+    if pet_series is None or len(pet_series) >= MAX_SERIES_PER_PET:
+        pet_series = {}
+        _trend_cache.set(pet_id, (version, pet_series))
+    pet_series[key] = series
+    return series
+
+
+def invalidate_weight_trend(pet_id):
+    _trend_cache.pop(pet_id)
+
+
+def _as_date(value):
+    """SQLite 返回 "YYYY-MM-DD" 字符串，PostgreSQL 返回 date 对象"""
+    if isinstance(value, str):
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    return value
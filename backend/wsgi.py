@@ -0,0 +1,7 @@
+"""
+生产环境 WSGI 入口: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from main import create_app
+
+app = create_app()
@@ -5,8 +5,13 @@ import PetProfile from "./PetProfile";
 import { API_BASE_URL } from "./config";
 import "./Dashboard.css";
 
+// Pets are loaded a page at a time so large accounts (shelters, breeders) render quickly
+const PETS_PER_PAGE = 50;
+
 function Dashboard({ user }) {
   const [pets, setPets] = useState([]);
+  const [totalPets, setTotalPets] = useState(0);
+  const [page, setPage] = useState(1);
   const [selectedPet, setSelectedPet] = useState(null);
   const [showPetForm, setShowPetForm] = useState(false);
   const [loading, setLoading] = useState(true);
@@ -15,11 +20,20 @@ function Dashboard({ user }) {
     fetchPets();
   }, []);
 
-  const fetchPets = async () => {
+  const fetchPets = async (nextPage = 1) => {
     try {
-      const response = await fetch(`${API_BASE_URL}/pets?user_id=${user.id}`);
+      const response = await fetch(
+        `${API_BASE_URL}/pets?user_id=${user.id}&sort=name&page=${nextPage}&per_page=${PETS_PER_PAGE}`
+      );
       const data = await response.json();
-      setPets(data.pets || []);
+      const loaded = data.pets || [];
+      // Pages are offset-based, so a pet added between page loads can shift rows onto the next page
+      setPets(nextPage === 1 ? loaded : (current) => {
+        const seen = new Set(current.map((pet) => pet.id));
+        return [...current, ...loaded.filter((pet) => !seen.has(pet.id))];
+      });
+      setTotalPets(data.total ?? loaded.length);
+      setPage(nextPage);
       setLoading(false);
     } catch (error) {
       console.error("Error fetching pets:", error);
@@ -27,8 +41,9 @@ function Dashboard({ user }) {
     }
   };
 
-  const handlePetCreated = (newPet) => {
-    setPets([...pets, newPet]);
+  const handlePetCreated = () => {
+    // Reload the first page so the new pet shows up in name order and isn't repeated by "Load more"
+    fetchPets(1);
     setShowPetForm(false);
   };
 
@@ -95,6 +110,11 @@ function Dashboard({ user }) {
               </div>
             ))
           )}
+          {pets.length < totalPets && (
+            <button className="btn btn-secondary btn-sm" onClick={() => fetchPets(page + 1)}>
+              Load more ({totalPets - pets.length})
+            </button>
+          )}
         </div>
       </div>
 
@@ -115,7 +135,7 @@ function Dashboard({ user }) {
                   <PawPrint size={24} color="#007AFF" />
                 </div>
                 <div className="stat-content">
-                  <div className="stat-number">{pets.length}</div>
+                  <div className="stat-number">{totalPets}</div>
                   <div className="stat-label">Total Pets</div>
                 </div>
               </div>
@@ -34,19 +34,13 @@ function PetProfile({ pet, onPetUpdated }) {
   const fetchPetLogs = async () => {
     setLoading(true);
     try {
-      const [weightRes, dietRes, vaccineRes] = await Promise.all([
-        fetch(`${API_BASE_URL}/pets/${pet.id}/weight_logs`),
-        fetch(`${API_BASE_URL}/pets/${pet.id}/diet_logs`),
-        fetch(`${API_BASE_URL}/pets/${pet.id}/vaccine_logs`),
-      ]);
+      // 一次请求获取宠物详情页需要的全部记录
+      const response = await fetch(`${API_BASE_URL}/pets/${pet.id}/profile?n=50`);
+      const data = await response.json();
 
-      const weightData = await weightRes.json();
-      const dietData = await dietRes.json();
-      const vaccineData = await vaccineRes.json();
-
-      setWeightLogs(weightData.weight_logs || []);
-      setDietLogs(dietData.diet_logs || []);
-      setVaccineLogs(vaccineData.vaccine_logs || []);
+      setWeightLogs(data.weight_logs || []);
+      setDietLogs(data.diet_logs || []);
+      setVaccineLogs(data.vaccine_logs || []);
       setLoading(false);
     } catch (error) {
       console.error("Error fetching pet logs:", error);
@@ -53,20 +53,23 @@ function UserLogin({ setLoggedInUser, updateCallback }) {
     setLoading(true);
     
     try {
-      const response = await fetch(`${API_BASE_URL}/users`);
-      const data = await response.json();
-      
-      if (data.users) {
-        const user = data.users.find(u => 
-          u.email === formData.email && u.password === formData.password
-        );
-        
-        if (user) {
-          setLoggedInUser(user);
-          updateCallback();
-        } else {
-          setErrors({ email: 'Invalid email or password' });
-        }
+      const response = await fetch(`${API_BASE_URL}/users/login`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          email: formData.email,
+          password: formData.password,
+        }),
+      });
+
+      if (response.ok) {
+        const user = await response.json();
+        setLoggedInUser(user);
+        updateCallback();
+      } else {
+        setErrors({ email: 'Invalid email or password' });
       }
     } catch (error) {
       console.error('Error logging in:', error);